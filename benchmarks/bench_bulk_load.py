@@ -0,0 +1,153 @@
+"""
+Benchmark of writing places_raw, crimes and weather tables: pandas to_sql with default settings vs bulk loader
+(executemany and LOAD DATA LOCAL INFILE). Writes to <table>_benchmark tables, which are dropped at the end.
+Needs the database from config.yml, LOAD DATA is skipped unless MYSQL_ALLOW_LOCAL_INFILE is set.
+Run from the project root:
+    python -m benchmarks.bench_bulk_load 100000 500000
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_utils.database_connection import connect_to_db, MYSQL_ALLOW_LOCAL_INFILE
+from db_utils.bulk_load import (
+    TABLE_MODELS,
+    build_table,
+    insert_with_executemany,
+    insert_with_load_data,
+    EXECUTEMANY_CHUNKSIZE,
+)
+from config import (
+    CRIMES_COLUMNS,
+    WEATHER_COLUMNS,
+    PLACES_COLUMNS,
+    WEALTH_COLUMNS,
+    AREA_FEEL_COLUMNS,
+    ACTIVITIES_COLUMNS,
+    FAMILIES_COLUMNS,
+    GRADES,
+)
+
+
+def create_table_data(table_name: str, number_of_rows: int) -> pd.DataFrame:
+    """
+    Random data with the columns of the table.
+    Args:
+        table_name: str -> "places_raw", "crimes" or "weather"
+        number_of_rows: int
+    Returns:
+        places_df: pd.DataFrame
+    """
+    rng = np.random.default_rng(0)
+    unique_names = [f"place-{i}-county-st" for i in range(number_of_rows)]
+    if table_name == "crimes":
+        columns = CRIMES_COLUMNS[1:]
+    elif table_name == "weather":
+        columns = WEATHER_COLUMNS[1:]
+    else:
+        columns = list(
+            dict.fromkeys(
+                PLACES_COLUMNS
+                + WEALTH_COLUMNS
+                + AREA_FEEL_COLUMNS
+                + ACTIVITIES_COLUMNS
+                + FAMILIES_COLUMNS
+                + CRIMES_COLUMNS
+            )
+        )
+        columns.remove("unique_name")
+
+    places_df = pd.DataFrame({"unique_name": unique_names})
+    for column in columns:
+        if column.endswith("rating"):
+            places_df[column] = rng.choice(GRADES, number_of_rows)
+        elif column in (
+            "name",
+            "link",
+            "type_of_place",
+            "state",
+            "name_with_state",
+            "area_feel",
+        ):
+            places_df[column] = rng.choice(
+                ["Iowa", "Suburb of Boston, MA", "Urban"], number_of_rows
+            )
+        else:
+            places_df[column] = rng.gamma(2.0, 200.0, number_of_rows)
+
+    return places_df
+
+
+def time_load(places_df: pd.DataFrame, table_name: str, method: str) -> float:
+    """
+    Loads the dataframe to an empty <table_name>_benchmark table and returns the time it took. Tables with a
+    foreign key to places refer to a places_benchmark table with the same unique names, filled before the timing.
+    """
+    engine = connect_to_db()
+    benchmark_table_name = f"{table_name}_benchmark"
+    table = build_table(
+        places_df,
+        benchmark_table_name,
+        model_name=table_name,
+        referred_tables={"places": "places_benchmark"},
+    )
+    model = TABLE_MODELS.get(table_name)
+    parent_table = None
+    if model is not None and model.__table__.foreign_keys:
+        parent_table = build_table(
+            places_df[["unique_name"]], "places_benchmark", model_name="places"
+        )
+
+    with engine.begin() as connection:
+        table.drop(connection, checkfirst=True)
+        if parent_table is not None:
+            parent_table.drop(connection, checkfirst=True)
+            parent_table.create(connection)
+            insert_with_executemany(
+                connection,
+                parent_table,
+                places_df[["unique_name"]],
+                EXECUTEMANY_CHUNKSIZE,
+            )
+        table.create(connection)
+
+    start = time.perf_counter()
+    if method == "to_sql":
+        places_df.to_sql(benchmark_table_name, engine, if_exists="append", index=False)
+    else:
+        with engine.begin() as connection:
+            if method == "load_data":
+                insert_with_load_data(connection, table, places_df)
+            else:
+                insert_with_executemany(
+                    connection, table, places_df, EXECUTEMANY_CHUNKSIZE
+                )
+    load_time = time.perf_counter() - start
+
+    with engine.begin() as connection:
+        table.drop(connection)
+        if parent_table is not None:
+            parent_table.drop(connection)
+
+    return load_time
+
+
+def main(sizes: list):
+    methods = ["to_sql", "executemany"]
+    if MYSQL_ALLOW_LOCAL_INFILE:
+        methods.append("load_data")
+
+    for table_name in ["places_raw", "crimes", "weather"]:
+        for number_of_rows in sizes:
+            places_df = create_table_data(table_name, number_of_rows)
+            results = ", ".join(
+                f"{method} {number_of_rows / time_load(places_df, table_name, method):,.0f} rows/s"
+                for method in methods
+            )
+            print(f"{table_name:>10} {number_of_rows:>9} rows: {results}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 500_000])
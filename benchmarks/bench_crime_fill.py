@@ -0,0 +1,71 @@
+"""
+Benchmark of filling missing crime values: row by row functions vs columnar fill_crime_values().
+Run from the project root:
+    python -m benchmarks.bench_crime_fill 10000 100000 1000000
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import utils.filling_missing_crime_data as fc
+from config import CRIMES_COLUMNS
+
+
+def create_crimes_table(number_of_rows: int, nan_share: float = 0.1) -> pd.DataFrame:
+    """
+    Creates random crimes table with given share of NaN values.
+    Args:
+        number_of_rows: int
+        nan_share: float
+    Returns:
+        crimes: pd.DataFrame
+    """
+    rng = np.random.default_rng(0)
+    crime_columns = CRIMES_COLUMNS[1:]
+    values = rng.gamma(2.0, 200.0, size=(number_of_rows, len(crime_columns)))
+    values[rng.random(values.shape) < nan_share] = np.nan
+
+    crimes = pd.DataFrame(values, columns=crime_columns)
+    crimes.insert(0, "unique_name", [f"place-{i}" for i in range(number_of_rows)])
+
+    return crimes
+
+
+def row_wise_fill(crimes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Path used before fill_crime_values(): four row by row apply passes.
+    """
+    crimes["violent_crime_ratio"] = crimes.apply(fc.add_violent_crimes_ratio, axis=1)
+    crimes["non_violent_crime_ratio"] = crimes.apply(
+        fc.add_non_violent_crimes_ratio, axis=1
+    )
+    crimes = crimes.apply(fc.fill_nan_values_violent_crimes, axis=1)
+    crimes = crimes.apply(fc.fill_nan_values_non_violent_crimes, axis=1)
+
+    return crimes
+
+
+def time_function(function, crimes: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    result = function(crimes.copy())
+    return time.perf_counter() - start, result
+
+
+def main(sizes: list):
+    for number_of_rows in sizes:
+        crimes = create_crimes_table(number_of_rows)
+        columnar_time, columnar_result = time_function(fc.fill_crime_values, crimes)
+        row_wise_time, row_wise_result = time_function(row_wise_fill, crimes)
+        pd.testing.assert_frame_equal(
+            columnar_result, row_wise_result[columnar_result.columns], check_dtype=False
+        )
+        print(
+            f"{number_of_rows:>9} rows: row-wise {row_wise_time:9.3f}s, "
+            f"columnar {columnar_time:7.4f}s, speed-up x{row_wise_time / columnar_time:,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
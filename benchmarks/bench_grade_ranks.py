@@ -0,0 +1,171 @@
+"""
+Benchmark of the recommendation query ordered by CASE ladders over the letter grades and by the crime values
+(before) vs ordered by the precomputed rank columns (after). Synthetic places are written to <table>_benchmark
+tables in the configured database, which are dropped at the end.
+Run from the project root:
+    python -m benchmarks.bench_grade_ranks 10000 100000
+The speedup is meant for MySQL and has not been measured there yet. On in-memory SQLite both orderings take the
+same time within noise (10000 places: about 0.5 ms each, 100000 places: 10-14 ms each).
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from db_utils.database_connection import connect_to_db
+from db_utils.bulk_load import bulk_load_dataframe
+from db_utils.table_swap import drop_tables
+from utils.ranks import add_rank_columns
+from config import (
+    GRADES,
+    US_STATES,
+    CRIMES_COLUMNS,
+    ACTIVITIES_COLUMNS,
+    AREA_FEEL_COLUMNS,
+    WEALTH_COLUMNS,
+    FAMILIES_COLUMNS,
+    PLACES_COLUMNS,
+    SAFETY_RANK_ORDER,
+    SELECT_PART,
+    FAMILIES_QUERY,
+    SCHOOLS_QUERY,
+    NIGHTLIFE_QUERY,
+)
+
+TABLES = ["places", "families", "wealth", "crimes", "activities", "area_feel"]
+
+REPETITIONS = 20
+
+
+def case_ladder(column: str) -> str:
+    """
+    ORDER BY fragment used before the rank columns.
+    """
+    return f"""
+    CASE
+        WHEN {column} = 'A+' THEN 1
+        WHEN {column} = 'A' THEN 2
+        WHEN {column} = 'A-' THEN 3
+        WHEN {column} = 'B+' THEN 4
+        WHEN {column} = 'B' THEN 5
+        ELSE 6
+    END,
+"""
+
+
+def create_places(number_of_rows: int) -> pd.DataFrame:
+    """
+    Creates random places with all columns of the place tables.
+    Args:
+        number_of_rows: int
+    Returns:
+        places_df: pd.DataFrame
+    """
+    rng = np.random.default_rng(0)
+    places_df = pd.DataFrame(
+        {"unique_name": [f"place-{i}" for i in range(number_of_rows)]}
+    )
+    places_df["name"] = places_df["unique_name"]
+    places_df["name_with_state"] = places_df["unique_name"]
+    places_df["link"] = "https://www.niche.com/places-to-live/place/"
+    places_df["type_of_place"] = rng.choice(["city", "town", "village"], number_of_rows)
+    places_df["state"] = rng.choice(list(US_STATES.values()), number_of_rows)
+    places_df["latitude"] = rng.uniform(25, 49, number_of_rows)
+    places_df["longitude"] = rng.uniform(-124, -67, number_of_rows)
+    places_df["area_feel"] = rng.choice(
+        ["Rural", "Suburban", "Dense Suburban", "Urban"], number_of_rows
+    )
+    for column in AREA_FEEL_COLUMNS[2:]:
+        places_df[column] = rng.integers(0, 100_000, number_of_rows)
+    for column in WEALTH_COLUMNS[1:]:
+        places_df[column] = rng.integers(500, 500_000, number_of_rows)
+    for column in CRIMES_COLUMNS[1:]:
+        places_df[column] = rng.gamma(2.0, 200.0, number_of_rows).round(1)
+    for column in ["school_rating", "families_rating", "nightlife_rating"]:
+        places_df[column] = rng.choice(GRADES, number_of_rows)
+    for column in ["restaurants", "bars", "cafes"]:
+        places_df[column] = rng.integers(0, 60, number_of_rows)
+
+    return add_rank_columns(places_df)
+
+
+def load_benchmark_tables(places_df: pd.DataFrame):
+    """
+    Writes the place tables as <table>_benchmark, with the schema of the live tables.
+    """
+    table_columns = {
+        "places": PLACES_COLUMNS,
+        "families": FAMILIES_COLUMNS,
+        "wealth": WEALTH_COLUMNS,
+        "crimes": CRIMES_COLUMNS + list(SAFETY_RANK_ORDER),
+        "activities": ACTIVITIES_COLUMNS,
+        "area_feel": AREA_FEEL_COLUMNS,
+    }
+    referred_tables = {table: f"{table}_benchmark" for table in TABLES}
+    for table in TABLES:
+        bulk_load_dataframe(
+            places_df[table_columns[table]],
+            f"{table}_benchmark",
+            model_name=table,
+            referred_tables=referred_tables,
+        )
+
+
+def build_query(order_by: str, state: str) -> str:
+    """
+    Recommendation query for families, schools and nightlife on the benchmark tables.
+    """
+    select_part = SELECT_PART
+    for table in TABLES:
+        select_part = select_part.replace(f" {table} ", f" {table}_benchmark ")
+    return (
+        select_part
+        + f"WHERE p.state = '{state}' AND w.median_household_income < 120000 "
+        + "AND a.restaurants > 20 AND af.area_feel IN ('Suburban', 'Urban') "
+        + f"ORDER BY {order_by} LIMIT 10"
+    )
+
+
+def time_query(query: str) -> float:
+    """
+    Median time of the query in milliseconds.
+    """
+    engine = connect_to_db()
+    times = []
+    with engine.connect() as connection:
+        for _ in range(REPETITIONS):
+            start = time.perf_counter()
+            connection.execute(text(query)).fetchall()
+            times.append(time.perf_counter() - start)
+
+    return statistics.median(times) * 1000
+
+
+def main(sizes: list):
+    before_order_by = (
+        case_ladder("f.families_rating")
+        + case_ladder("f.school_rating")
+        + case_ladder("a.nightlife_rating")
+        + "c.assault, c.murder, c.rape, c.robbery, c.theft DESC"
+    )
+    after_order_by = FAMILIES_QUERY + SCHOOLS_QUERY + NIGHTLIFE_QUERY + "c.safety_rank"
+    engine = connect_to_db()
+
+    for number_of_rows in sizes:
+        load_benchmark_tables(create_places(number_of_rows))
+        before_time = time_query(build_query(before_order_by, "Colorado"))
+        after_time = time_query(build_query(after_order_by, "Colorado"))
+        print(
+            f"{number_of_rows:>9} places: CASE ladders {before_time:.2f} ms, "
+            f"rank columns {after_time:.2f} ms ({before_time / after_time:.1f}x)"
+        )
+
+    with engine.begin() as connection:
+        drop_tables(connection, [f"{table}_benchmark" for table in TABLES[::-1]])
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000])
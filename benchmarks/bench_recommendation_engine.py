@@ -0,0 +1,80 @@
+"""
+Benchmark of the recommendation query in the database vs the in-memory engine. Synthetic places are written to
+<table>_benchmark tables in the configured database, which are dropped at the end.
+Run from the project root:
+    python -m benchmarks.bench_recommendation_engine 10000 100000
+"""
+import statistics
+import sys
+import time
+
+from db_utils.database_connection import connect_to_db
+from db_utils.database_operations import load_merged_dataset
+from db_utils.recommendation_engine import (
+    RecommendationEngine,
+    ENGINE_COLUMNS,
+    ENGINE_TABLES,
+)
+from db_utils.table_swap import drop_tables
+from benchmarks.bench_grade_ranks import (
+    TABLES,
+    create_places,
+    load_benchmark_tables,
+    build_query,
+    time_query,
+)
+from config import FAMILIES_QUERY, SCHOOLS_QUERY, NIGHTLIFE_QUERY
+
+REPETITIONS = 1000
+
+
+def time_engine(engine: RecommendationEngine) -> float:
+    """
+    Median time of the engine query in microseconds.
+    """
+    times = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        engine.recommend(
+            "Colorado",
+            120000,
+            ["Suburban", "Urban"],
+            nightlife=True,
+            families=True,
+            schools=True,
+            restaurants=True,
+        )
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times) * 1_000_000
+
+
+def main(sizes: list):
+    order_by = FAMILIES_QUERY + SCHOOLS_QUERY + NIGHTLIFE_QUERY + "c.safety_rank"
+    engine = connect_to_db()
+
+    for number_of_rows in sizes:
+        load_benchmark_tables(create_places(number_of_rows))
+        database_time = time_query(build_query(order_by, "Colorado")) * 1000
+
+        start = time.perf_counter()
+        places_df = load_merged_dataset(
+            columns=ENGINE_COLUMNS,
+            table_names=[f"{table}_benchmark" for table in ENGINE_TABLES],
+        )
+        recommendation_engine = RecommendationEngine(places_df)
+        load_time = time.perf_counter() - start
+        engine_time = time_engine(recommendation_engine)
+
+        print(
+            f"{number_of_rows:>9} places: database {database_time:.0f} us, "
+            f"engine {engine_time:.0f} us ({database_time / engine_time:.0f}x), "
+            f"engine loaded in {load_time:.2f} s"
+        )
+
+    with engine.begin() as connection:
+        drop_tables(connection, [f"{table}_benchmark" for table in TABLES[::-1]])
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000])
@@ -11,6 +11,52 @@ MYSQL_DATABASE = data["MYSQL_DATABASE"]
 
 AREA_WEALTH_THRESHOLD = 0.8
 
+INTERMEDIATE_DATA_FORMAT = "parquet"
+
+STAGE_CACHE_DIRECTORY = ".stage_cache"
+
+KNN_NEIGHBOURS = 5
+
+KNN_MAX_DISTANCE_KM = 25
+
+EARTH_RADIUS_KM = 6371.0088
+
+GRADES = ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "D-", "F"]
+
+GRADE_COLUMNS = ["school_rating", "nightlife_rating", "families_rating"]
+
+# Grades with their own rank (1 for A+ to 5 for B), other grades and missing values get UNRANKED_GRADE
+RANKED_GRADES = ["A+", "A", "A-", "B+", "B"]
+UNRANKED_GRADE = 6
+GRADE_RANK_COLUMNS = {column: f"{column}_rank" for column in GRADE_COLUMNS}
+
+# Order of the crimes in the safety ranks, True for ascending
+SAFETY_RANK_ORDER = {
+    "safety_rank": [
+        ("assault", True),
+        ("murder", True),
+        ("rape", True),
+        ("robbery", True),
+        ("theft", False),
+    ],
+    "safety_rank_women": [
+        ("rape", True),
+        ("assault", True),
+        ("murder", True),
+        ("robbery", True),
+        ("theft", False),
+    ],
+}
+
+CATEGORY_COLUMNS = ["state", "area_feel", "type_of_place"]
+
+RAW_NUMBER_COLUMNS = [
+    "population",
+    "median_home_value",
+    "median_rent",
+    "median_household_income",
+]
+
 US_AVERAGE_CRIMES = {
     "US_AVERAGE_ASSAULT": 282.7,
     "US_AVERAGE_MURDER": 6.1,
@@ -51,7 +97,14 @@ VIOLENT_CRIMES_COLUMNS = ["assault", "murder", "rape", "robbery"]
 
 NON_VIOLENT_CRIMES_COLUMNS = ["burglary", "theft", "motor_vehicle_theft"]
 
-ACTIVITIES_COLUMNS = ["unique_name", "nightlife_rating", "restaurants", "bars", "cafes"]
+ACTIVITIES_COLUMNS = [
+    "unique_name",
+    "nightlife_rating",
+    "restaurants",
+    "bars",
+    "cafes",
+    "nightlife_rating_rank",
+]
 
 WEALTH_COLUMNS = [
     "unique_name",
@@ -89,6 +142,20 @@ FAMILIES_COLUMNS = [
     "unique_name",
     "school_rating",
     "families_rating",
+    "school_rating_rank",
+    "families_rating_rank",
+]
+
+WEATHER_COLUMNS = [
+    "unique_name",
+    "temp_first_quarter",
+    "temp_second_quarter",
+    "temp_third_quarter",
+    "temp_fourth_quarter",
+    "prcp_first_quarter",
+    "prcp_second_quarter",
+    "prcp_third_quarter",
+    "prcp_fourth_quarter",
 ]
 
 PLACES_COLUMNS = [
@@ -102,6 +169,16 @@ PLACES_COLUMNS = [
     "unique_name",
 ]
 
+MERGED_TABLES = [
+    "places",
+    "area_feel",
+    "wealth",
+    "crimes",
+    "activities",
+    "families",
+    "weather",
+]
+
 US_STATES = {
     "AL": "Alabama",
     "AK": "Alaska",
@@ -171,6 +248,42 @@ MONTH_TO_SEASON = {
     "November": "Autumn",
 }
 
+# Minimum number of venues when the user wants them nearby, and number of recommended places
+VENUE_THRESHOLDS = {"restaurants": 20, "bars": 10, "cafes": 10}
+
+RECOMMENDATIONS_LIMIT = 10
+
+# Profiles of the same state evaluated together in batch recommendations
+RECOMMENDATIONS_BATCH_SIZE = 256
+
+# Weighted scoring of the places: quarterly mean temperature (Celsius) felt as the most comfortable and the distance
+# from it at which the climate scores 0, ratio between the place and user income at which the income fit scores 0
+COMFORT_TEMPERATURE = 21
+
+COMFORT_TEMPERATURE_RANGE = 20
+
+INCOME_FIT_RATIO = 2
+
+SCORING_LIMIT = 10
+
+# In-process caches of the query results, checked against the dataset generation every GENERATION_CHECK_SECONDS
+RECOMMENDATIONS_CACHE_SIZE = 1024
+
+PROFILES_CACHE_SIZE = 10_000
+
+CACHE_TTL_SECONDS = 600
+
+GENERATION_CHECK_SECONDS = 5
+
+# Local recommendation service, latencies of the last SERVICE_LATENCY_WINDOW requests per endpoint are reported
+SERVICE_HOST = "127.0.0.1"
+
+SERVICE_PORT = 8000
+
+SERVICE_LATENCY_WINDOW = 10_000
+
+# Text form of the recommendation query used by the benchmarks, the application builds it with
+# db_utils.query_builder
 SELECT_PART = r"""
     SELECT
     f.unique_name
@@ -179,38 +292,17 @@ SELECT_PART = r"""
     LEFT JOIN wealth w ON f.unique_name = w.unique_name
     LEFT JOIN crimes c ON f.unique_name = c.unique_name
     LEFT JOIN activities a on f.unique_name = a.unique_name
-    LEFT JOIN areafeel af on f.unique_name = af.unique_name
+    LEFT JOIN area_feel af on f.unique_name = af.unique_name
 """
 
 FAMILIES_QUERY = """
-    CASE
-        WHEN f.families_rating = 'A+' THEN 1
-        WHEN f.families_rating = 'A' THEN 2
-        WHEN f.families_rating = 'A-' THEN 3
-        WHEN f.families_rating = 'B+' THEN 4
-        WHEN f.families_rating = 'B' THEN 5
-        ELSE 6
-    END,
+    f.families_rating_rank,
 """
 
 SCHOOLS_QUERY = """
-    CASE
-        WHEN f.school_rating = 'A+' THEN 1
-        WHEN f.school_rating = 'A' THEN 2
-        WHEN f.school_rating = 'A-' THEN 3
-        WHEN f.school_rating = 'B+' THEN 4
-        WHEN f.school_rating = 'B' THEN 5
-    ELSE 6
-END,
+    f.school_rating_rank,
 """
 
 NIGHTLIFE_QUERY = """
-    CASE
-        WHEN a.nightlife_rating = 'A+' THEN 1
-        WHEN a.nightlife_rating = 'A' THEN 2
-        WHEN a.nightlife_rating = 'A-' THEN 3
-        WHEN a.nightlife_rating = 'B+' THEN 4
-        WHEN a.nightlife_rating = 'B' THEN 5
-    ELSE 6
-END,
+    a.nightlife_rating_rank,
 """
@@ -0,0 +1,305 @@
+"""
+Bulk loading of dataframes into MySQL tables. Tables are created with explicit column types taken from the
+SQLAlchemy dataclasses and rows are loaded either with chunked multi-row executemany or with
+LOAD DATA LOCAL INFILE from a temporary file.
+"""
+import csv
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    inspect,
+)
+
+from db_utils.database_connection import connect_to_db, MYSQL_ALLOW_LOCAL_INFILE
+from db_utils.data_classes import (
+    Places,
+    Activities,
+    AreaFeel,
+    Crimes,
+    Families,
+    Wealth,
+    Weather,
+)
+
+TABLE_MODELS = {
+    "places": Places,
+    "activities": Activities,
+    "area_feel": AreaFeel,
+    "crimes": Crimes,
+    "families": Families,
+    "wealth": Wealth,
+    "weather": Weather,
+}
+
+# Tables referred to by foreign keys, written before and removed after the tables referring to them
+PARENT_TABLES = {
+    foreign_key.column.table.name
+    for model in TABLE_MODELS.values()
+    for foreign_key in model.__table__.foreign_keys
+}
+
+# Used for the tables without their own dataclass, e.g. places_raw
+MODEL_COLUMNS = {
+    column.name: column
+    for model in TABLE_MODELS.values()
+    for column in model.__table__.columns
+}
+
+EXECUTEMANY_CHUNKSIZE = 10_000
+
+LOAD_DATA_MIN_ROWS = 50_000
+
+
+def parents_first(table_names: list) -> list:
+    """
+    Orders the tables so the ones referred to by foreign keys come first.
+    Args:
+        table_names: list
+    Returns:
+        table_names: list
+    """
+    return sorted(table_names, key=lambda table_name: table_name not in PARENT_TABLES)
+
+
+def column_type_from_dtype(dtype):
+    """
+    SQLAlchemy type for the columns that are not in any of the dataclasses.
+    Args:
+        dtype: numpy or pandas dtype
+    Returns:
+        column_type: sqlalchemy type
+    """
+    if pd.api.types.is_bool_dtype(dtype):
+        return Boolean()
+    if pd.api.types.is_integer_dtype(dtype):
+        return BigInteger()
+    if pd.api.types.is_float_dtype(dtype):
+        return Float(precision=53)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return DateTime()
+    return Text()
+
+
+def copy_foreign_key(
+    foreign_key: ForeignKey, referred_tables: dict, metadata: MetaData
+) -> ForeignKey:
+    """
+    Copy of the dataclass foreign key, pointing to the renamed table if it is in referred_tables. The referred
+    column is added to the metadata, so the foreign key can be resolved when creating the table.
+    Args:
+        foreign_key: ForeignKey
+        referred_tables: dict -> original table name: new table name
+        metadata: MetaData -> metadata of the created table
+    Returns:
+        foreign_key: ForeignKey
+    """
+    referred_column = foreign_key.column
+    referred_table = referred_tables.get(
+        referred_column.table.name, referred_column.table.name
+    )
+    if referred_table not in metadata.tables:
+        Table(
+            referred_table,
+            metadata,
+            Column(referred_column.name, referred_column.type, primary_key=True),
+        )
+    return ForeignKey(
+        f"{referred_table}.{referred_column.name}", ondelete=foreign_key.ondelete
+    )
+
+
+def build_table(
+    places_df: pd.DataFrame,
+    table_name: str,
+    model_name: str | None = None,
+    referred_tables: dict | None = None,
+) -> Table:
+    """
+    Builds table definition for the dataframe columns. Types, foreign keys and indexes come from the dataclass of
+    the table. Columns of tables without a dataclass get the type from any dataclass having the column, or from
+    the dataframe dtype. Strings without length are VARCHAR(255) for keys and TEXT otherwise. Floats are created
+    as double precision, same as pandas to_sql did.
+    Args:
+        places_df: pd.DataFrame
+        table_name: str
+        model_name: str | None -> table of the dataclass to use, table_name if None (e.g. for shadow tables)
+        referred_tables: dict | None -> names of the tables the foreign keys should point to instead, e.g.
+            {"places": "places__shadow"}
+    Returns:
+        table: Table
+    """
+    model = TABLE_MODELS.get(model_name or table_name)
+    model_columns = model.__table__.columns if model is not None else MODEL_COLUMNS
+    referred_tables = referred_tables or {}
+    metadata = MetaData()
+
+    columns = []
+    for column_name in places_df.columns:
+        model_column = model_columns.get(column_name)
+        if model_column is None:
+            columns.append(
+                Column(
+                    column_name, column_type_from_dtype(places_df[column_name].dtype)
+                )
+            )
+            continue
+        is_primary_key = model is not None and model_column.primary_key
+        column_type = model_column.type
+        if isinstance(column_type, String) and column_type.length is None:
+            column_type = String(255) if is_primary_key else Text()
+        elif isinstance(column_type, Float) and column_type.precision is None:
+            column_type = Float(precision=53)
+        foreign_keys = (
+            [
+                copy_foreign_key(foreign_key, referred_tables, metadata)
+                for foreign_key in model_column.foreign_keys
+            ]
+            if model is not None
+            else []
+        )
+        columns.append(
+            Column(column_name, column_type, *foreign_keys, primary_key=is_primary_key)
+        )
+
+    table = Table(table_name, metadata, *columns)
+    if model is not None:
+        for index in model.__table__.indexes:
+            if all(column.name in table.c for column in index.columns):
+                Index(index.name, *[table.c[column.name] for column in index.columns])
+
+    return table
+
+
+def dataframe_to_rows(places_df: pd.DataFrame) -> list:
+    """
+    Rows as tuples of python values, missing values as None.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        rows: list
+    """
+    values = places_df.astype(object)
+    values = values.where(places_df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def insert_with_executemany(
+    connection, table: Table, places_df: pd.DataFrame, chunksize: int
+):
+    """
+    Inserts rows in chunks with the driver's executemany, which sends multi-row INSERT statements.
+    """
+    column_names = ", ".join(f"`{column.name}`" for column in table.columns)
+    placeholder = "?" if connection.dialect.paramstyle == "qmark" else "%s"
+    placeholders = ", ".join([placeholder] * len(table.columns))
+    insert_query = (
+        f"INSERT INTO `{table.name}` ({column_names}) VALUES ({placeholders})"
+    )
+
+    for start in range(0, len(places_df), chunksize):
+        rows = dataframe_to_rows(places_df.iloc[start : start + chunksize])
+        connection.exec_driver_sql(insert_query, rows)
+
+
+def insert_with_load_data(connection, table: Table, places_df: pd.DataFrame):
+    """
+    Writes rows to a temporary CSV file and loads it with LOAD DATA LOCAL INFILE. Missing values are written as
+    \\N, the NULL marker of LOAD DATA, so the text "NULL" stays a string. Backslashes in the text are escaped.
+    """
+    text_columns = places_df.select_dtypes(include=["object", "string"]).columns
+    if len(text_columns):
+        places_df = places_df.copy()
+        for column in text_columns:
+            places_df[column] = places_df[column].map(
+                lambda value: value.replace("\\", "\\\\")
+                if isinstance(value, str)
+                else value
+            )
+    temporary_file = tempfile.NamedTemporaryFile(
+        mode="w", suffix=".csv", delete=False, encoding="utf-8", newline=""
+    )
+    try:
+        with temporary_file:
+            places_df.to_csv(
+                temporary_file,
+                index=False,
+                header=False,
+                na_rep="\\N",
+                quoting=csv.QUOTE_MINIMAL,
+                lineterminator="\n",
+            )
+        file_path = temporary_file.name.replace("\\", "/")
+        column_names = ", ".join(f"`{column.name}`" for column in table.columns)
+        connection.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{file_path}' INTO TABLE `{table.name}` "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+            f"LINES TERMINATED BY '\\n' ({column_names})"
+        )
+    finally:
+        os.remove(temporary_file.name)
+
+
+def choose_load_method(number_of_rows: int) -> str:
+    """
+    LOAD DATA LOCAL INFILE for big tables if it is enabled, executemany otherwise.
+    Args:
+        number_of_rows: int
+    Returns:
+        method: str
+    """
+    if MYSQL_ALLOW_LOCAL_INFILE and number_of_rows >= LOAD_DATA_MIN_ROWS:
+        return "load_data"
+    return "executemany"
+
+
+def bulk_load_dataframe(
+    places_df: pd.DataFrame,
+    table_name: str,
+    if_exists: str = "replace",
+    method: str = "auto",
+    chunksize: int = EXECUTEMANY_CHUNKSIZE,
+    model_name: str | None = None,
+    referred_tables: dict | None = None,
+):
+    """
+    Saves the dataframe to the table in one transaction. With "replace" the table is dropped and created from
+    build_table(), with "append" it is created only if it does not exist.
+    Args:
+        places_df: pd.DataFrame
+        table_name: str
+        if_exists: str -> "replace" or "append"
+        method: str -> "auto", "executemany" or "load_data"
+        chunksize: int -> rows per executemany call
+        model_name: str | None -> table of the dataclass with column types, table_name if None
+        referred_tables: dict | None -> tables the foreign keys point to instead of the ones from the dataclass
+    """
+    engine = connect_to_db()
+    table = build_table(places_df, table_name, model_name, referred_tables)
+    if method == "auto":
+        method = choose_load_method(len(places_df))
+
+    with engine.begin() as connection:
+        if if_exists == "replace":
+            table.drop(connection, checkfirst=True)
+        if not inspect(connection).has_table(table_name):
+            table.create(connection)
+
+        if method == "load_data":
+            insert_with_load_data(connection, table, places_df)
+        else:
+            insert_with_executemany(connection, table, places_df, chunksize)
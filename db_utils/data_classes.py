@@ -9,24 +9,50 @@ SQLAlchemy Dataclasses:
     - Activities
 """
 
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# Bounded, so the keys and the secondary indexes fit into InnoDB index limits
+UNIQUE_NAME_LENGTH = 255
+NAME_LENGTH = 255
+LINK_LENGTH = 512
+CATEGORY_LENGTH = 32
+GRADE_LENGTH = 8
+
+
+def place_foreign_key():
+    """
+    unique_name column of the tables describing a place, rows are removed together with the place.
+    """
+    return Column(
+        String(UNIQUE_NAME_LENGTH),
+        ForeignKey("places.unique_name", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
 
 class Places(Base):
     __tablename__ = "places"
-    unique_name = Column(String, primary_key=True)
-    name = Column(String)
-    type_of_place = Column(String)
-    state = Column(String)
-    link = Column(String)
+    __table_args__ = (Index("ix_places_state_type_of_place", "state", "type_of_place"),)
+    unique_name = Column(String(UNIQUE_NAME_LENGTH), primary_key=True)
+    name = Column(String(NAME_LENGTH))
+    # e.g. Neighborhood in Colorado Springs, CO
+    type_of_place = Column(String(NAME_LENGTH))
+    state = Column(String(CATEGORY_LENGTH))
+    link = Column(String(LINK_LENGTH))
+    name_with_state = Column(String(NAME_LENGTH))
+    latitude = Column(Float)
+    longitude = Column(Float)
 
 
 class Wealth(Base):
     __tablename__ = "wealth"
-    unique_name = Column(String, primary_key=True)
+    __table_args__ = (
+        Index("ix_wealth_median_household_income", "median_household_income"),
+    )
+    unique_name = place_foreign_key()
     median_home_value = Column(Integer)
     median_rent = Column(Integer)
     median_household_income = Column(Integer)
@@ -34,7 +60,7 @@ class Wealth(Base):
 
 class Weather(Base):
     __tablename__ = "weather"
-    unique_name = Column(String, primary_key=True)
+    unique_name = place_foreign_key()
     temp_first_quarter = Column(Float)
     temp_second_quarter = Column(Float)
     temp_third_quarter = Column(Float)
@@ -46,23 +72,28 @@ class Weather(Base):
 
 
 class AreaFeel(Base):
-    __tablename__ = "areafeel"
-    unique_name = Column(String, primary_key=True)
-    area_feel = Column(String)
+    __tablename__ = "area_feel"
+    __table_args__ = (Index("ix_area_feel_area_feel", "area_feel"),)
+    unique_name = place_foreign_key()
+    area_feel = Column(String(CATEGORY_LENGTH))
     population = Column(Integer)
-    under_ten = Column(Integer)
-    ten_to_seventeen = Column(Integer)
-    eighteen_to_twentyfour = Column(Integer)
-    twentyfive_to_thirtyfour = Column(Integer)
-    thirtyfive_to_fourtyfour = Column(Integer)
-    fourtyfive_to_fiftyfour = Column(Integer)
-    fiftyfive_to_sixtyfour = Column(Integer)
-    over_sixtyfive = Column(Integer)
+    under_ten = Column(Float)
+    ten_to_seventeen = Column(Float)
+    eighteen_to_twentyfour = Column(Float)
+    twentyfive_to_thirtyfour = Column(Float)
+    thirtyfive_to_fourtyfour = Column(Float)
+    fourtyfive_to_fiftyfour = Column(Float)
+    fiftyfive_to_sixtyfour = Column(Float)
+    over_sixtyfive = Column(Float)
 
 
 class Crimes(Base):
     __tablename__ = "crimes"
-    unique_name = Column(String, primary_key=True)
+    __table_args__ = (
+        Index("ix_crimes_safety_rank", "safety_rank"),
+        Index("ix_crimes_safety_rank_women", "safety_rank_women"),
+    )
+    unique_name = place_foreign_key()
     assault = Column(Float)
     murder = Column(Float)
     rape = Column(Float)
@@ -70,19 +101,27 @@ class Crimes(Base):
     burglary = Column(Float)
     theft = Column(Float)
     motor_vehicle_theft = Column(Float)
+    safety_rank = Column(Integer)
+    safety_rank_women = Column(Integer)
 
 
 class Families(Base):
     __tablename__ = "families"
-    unique_name = Column(String, primary_key=True)
-    school_rating = Column(String)
-    families_rating = Column(String)
+    unique_name = place_foreign_key()
+    school_rating = Column(String(GRADE_LENGTH))
+    families_rating = Column(String(GRADE_LENGTH))
+    school_rating_rank = Column(SmallInteger)
+    families_rating_rank = Column(SmallInteger)
 
 
 class Activities(Base):
     __tablename__ = "activities"
-    unique_name = Column(String, primary_key=True)
-    nightlife_rating = Column(String)
+    __table_args__ = (
+        Index("ix_activities_restaurants_cafes_bars", "restaurants", "cafes", "bars"),
+    )
+    unique_name = place_foreign_key()
+    nightlife_rating = Column(String(GRADE_LENGTH))
     restaurants = Column(Integer)
     bars = Column(Integer)
     cafes = Column(Integer)
+    nightlife_rating_rank = Column(SmallInteger)
@@ -1,6 +1,9 @@
 """
 Generic database connection functions
 """
+import threading
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -15,37 +18,91 @@ MYSQL_USER = data["MYSQL_USER"]
 MYSQL_PASSWORD = data["MYSQL_PASSWORD"]
 MYSQL_DATABASE = data["MYSQL_DATABASE"]
 
+# Optional in config.yml
+MYSQL_ECHO = data.get("MYSQL_ECHO", False)
+MYSQL_POOL_SIZE = data.get("MYSQL_POOL_SIZE", 5)
+MYSQL_MAX_OVERFLOW = data.get("MYSQL_MAX_OVERFLOW", 10)
+MYSQL_POOL_RECYCLE = data.get("MYSQL_POOL_RECYCLE", 3600)
+# LOAD DATA LOCAL INFILE needs to be enabled on the server as well (local_infile=ON)
+MYSQL_ALLOW_LOCAL_INFILE = data.get("MYSQL_ALLOW_LOCAL_INFILE", False)
+
+_engine = None
+_session_factory = None
+# Guards creating and disposing the engine, connect_to_db() is called from several threads at once
+_engine_lock = threading.Lock()
+
 
 def connect_to_db():
     """
-    Establishes a database connection and returns the engine.
+    Returns the process-wide engine, it is created on the first call. Connections are pooled, checked before use
+    (pre-ping) and recycled after MYSQL_POOL_RECYCLE seconds. SQL queries are logged only if MYSQL_ECHO is set.
+    Threads calling it at the same time get the same engine.
     """
-    mysql_host = MYSQL_HOST
-    mysql_user = MYSQL_USER
-    mysql_password = MYSQL_PASSWORD
-    mysql_database = MYSQL_DATABASE
+    global _engine, _session_factory
+
+    engine = _engine
+    if engine is not None:
+        return engine
+
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+        mysql_host = MYSQL_HOST
+        mysql_user = MYSQL_USER
+        mysql_password = MYSQL_PASSWORD
+        mysql_database = MYSQL_DATABASE
 
-    engine = create_engine(
-        f"mysql+mysqlconnector://{mysql_user}:{mysql_password}@{mysql_host}/{mysql_database}",
-        echo=True,  # Set echo to True to see SQL queries being executed
-    )
+        _engine = create_engine(
+            f"mysql+mysqlconnector://{mysql_user}:{mysql_password}@{mysql_host}/{mysql_database}",
+            echo=MYSQL_ECHO,  # Set MYSQL_ECHO to True to see SQL queries being executed
+            pool_size=MYSQL_POOL_SIZE,
+            max_overflow=MYSQL_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=MYSQL_POOL_RECYCLE,
+            connect_args={"allow_local_infile": MYSQL_ALLOW_LOCAL_INFILE},
+        )
+        _session_factory = sessionmaker(bind=_engine)
 
-    return engine
+        return _engine
 
 
-def disconnect_from_db(engine):
+def disconnect_from_db(engine=None):
     """
-    Closes the database connection.
+    Closes all pooled connections of the engine. The process-wide engine is created again on the next
+    connect_to_db() call.
     """
-    engine.dispose()
+    global _engine, _session_factory
+
+    with _engine_lock:
+        if engine is None or engine is _engine:
+            engine, _engine, _session_factory = _engine, None, None
+    if engine is not None:
+        engine.dispose()
 
 
 def create_sqlalchemy_session():
     """
-    Creates sqlalchemy session.
+    Creates sqlalchemy session bound to the process-wide engine. Caller is responsible for closing it, use
+    session_scope() where possible.
     """
-    engine = connect_to_db()
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    connect_to_db()
+    session = _session_factory()
 
     return session
+
+
+@contextmanager
+def session_scope():
+    """
+    Provides a transactional scope around a series of operations. Commits on success, rolls back on error and
+    always closes the session, so the connection goes back to the pool.
+    """
+    session = create_sqlalchemy_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
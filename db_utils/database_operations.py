@@ -6,29 +6,43 @@ database_operations contain:
     - sending queries to the database based on the specific input
     - loading data from SQLAlchemy dataclasses
 """
+import concurrent.futures
+
 import pandas as pd
-from toolz import pipe
+from sqlalchemy import inspect, select, sql, text
+from sqlalchemy.exc import SQLAlchemyError
 
+from utils.dtypes import apply_dtype_schema
 from db_utils.database_connection import (
     connect_to_db,
-    disconnect_from_db,
-    create_sqlalchemy_session,
+    session_scope,
+)
+from db_utils.bulk_load import bulk_load_dataframe
+from db_utils.upsert import upsert_dataframe, upsert_tables
+from db_utils.table_swap import refresh_tables
+from db_utils.place_profiles import get_place_profiles
+from db_utils.dataset_generation import bump_dataset_generation
+from db_utils.result_cache import (
+    RECOMMENDATIONS_CACHE,
+    MISSING,
+    check_dataset_generation,
+    recommendation_key,
+)
+from db_utils.query_builder import (
+    build_recommendation_query,
+    recommendation_parameters,
 )
 
 from config import (
+    MERGED_TABLES,
     CRIMES_COLUMNS,
     ACTIVITIES_COLUMNS,
     AREA_FEEL_COLUMNS,
     WEALTH_COLUMNS,
     FAMILIES_COLUMNS,
+    WEATHER_COLUMNS,
     PLACES_COLUMNS,
-)
-
-from config import (
-    SELECT_PART,
-    FAMILIES_QUERY,
-    SCHOOLS_QUERY,
-    NIGHTLIFE_QUERY,
+    SAFETY_RANK_ORDER,
 )
 
 
@@ -54,82 +68,225 @@ def load_database_to_dataframe(table_name: str) -> pd.DataFrame:
 
     query = f"SELECT * FROM {table_name}"
 
-    places_df = pd.read_sql(query, con=engine)
-
-    disconnect_from_db(engine)
+    with engine.connect() as connection:
+        places_df = pd.read_sql(text(query), con=connection)
 
     return places_df
 
 
-def save_dataframe_to_database(places_df: pd.DataFrame, table_name: str):
+def save_dataframe_to_database(
+    places_df: pd.DataFrame, table_name: str, if_exists: str = "replace"
+):
     """
-    Saves the whole dataframe to the database.
+    Saves the whole dataframe to the database using the bulk loader with column types from the dataclasses.
     Attributes:
         table_name: str
         places_df: pd.DataFrame
+        if_exists: str -> "replace" or "append"
     """
-    engine = connect_to_db()
+    bulk_load_dataframe(places_df, table_name, if_exists=if_exists)
 
-    places_df.to_sql(name=table_name, con=engine, if_exists="replace", index=False)
 
-    disconnect_from_db(engine)
+def upsert_dataframe_to_database(places_df: pd.DataFrame, table_name: str) -> dict:
+    """
+    Saves only the rows that differ from the stored ones (by unique_name and row hash), rows missing from the
+    dataframe are deleted.
+    Attributes:
+        table_name: str
+        places_df: pd.DataFrame
+    Returns:
+        changes: dict -> number of inserted, updated and deleted rows
+    """
+    return upsert_dataframe(places_df, table_name)
 
 
-def load_data_and_merge():
+def table_checksums(table_names: list) -> dict:
     """
-    Merging all tables into one dataframe.
+    Returns live checksums of the tables calculated by the database server (CHECKSUM TABLE), so it can be checked
+    if the tables changed without loading them.
+    Args:
+        table_names: list
+    Returns:
+        checksums: dict
     """
-    places = load_database_to_dataframe("places")
-    weather = load_database_to_dataframe("weather")
-    crimes = load_database_to_dataframe("crimes")
-    activities = load_database_to_dataframe("activities")
-    area_feel = load_database_to_dataframe("area_feel")
-    wealth = load_database_to_dataframe("wealth")
-    families = load_database_to_dataframe("families")
+    engine = connect_to_db()
+
+    with engine.connect() as connection:
+        query_results = connection.execute(
+            text(f"CHECKSUM TABLE {', '.join(table_names)}")
+        )
+        checksums = {row[0]: row[1] for row in query_results}
 
-    dataframes = [places, area_feel, wealth, crimes, activities, families, weather]
+    return checksums
 
-    places_df = dataframes[0]
-    for df in dataframes[1:]:
-        places_df = places_df.merge(df, on="unique_name", how="outer")
+
+def load_table_columns(table_name: str, columns: list) -> pd.DataFrame:
+    """
+    Loads only the given columns of the table, indexed by unique_name.
+    Args:
+        table_name: str
+        columns: list -> without unique_name
+    Returns:
+        places_df: pd.DataFrame
+    """
+    engine = connect_to_db()
+    query = select(
+        sql.table(table_name, *[sql.column(name) for name in ["unique_name", *columns]])
+    )
+
+    with engine.connect() as connection:
+        places_df = pd.read_sql(query, con=connection, index_col="unique_name")
 
     return places_df
 
 
-def reassign_values_to_separate_db_tables() -> bool:
+def drop_duplicated_places(places_df: pd.DataFrame, table_name: str) -> pd.DataFrame:
     """
-    Reads the places_raw table from the database and creates separate dataframes from it. Then saves them into the
-    database as separate tables: - crimes - activities - area_feel - wealth - families - places Returns: True or False
+    Keeps the last row of every unique_name, the same row the upsert keeps, so the tables can be joined on the
+    index.
+    Args:
+        places_df: pd.DataFrame -> indexed by unique_name
+        table_name: str
+    Returns:
+        places_df: pd.DataFrame
     """
-    places_df = load_database_to_dataframe("places_raw")
-    db_map = (
-        (places_df[CRIMES_COLUMNS], "crimes"),
-        (places_df[ACTIVITIES_COLUMNS], "activities"),
-        (places_df[AREA_FEEL_COLUMNS], "area_feel"),
-        (places_df[WEALTH_COLUMNS], "wealth"),
-        (places_df[FAMILIES_COLUMNS], "families"),
-        (places_df[PLACES_COLUMNS], "places"),
+    is_duplicated = places_df.index.duplicated(keep="last")
+    if is_duplicated.any():
+        print(
+            f"Table {table_name}: dropped {is_duplicated.sum()} rows with duplicated unique_name."
+        )
+    return places_df[~is_duplicated]
+
+
+def load_merged_dataset(
+    columns: list | None = None, table_names: list | None = None
+) -> pd.DataFrame:
+    """
+    Loads the tables concurrently over pooled connections and joins them once on the unique_name index (full
+    outer join, the same as chained outer merges). Only the requested columns are selected, so tables without
+    them are not read at all. Columns stored in more than one table are read from the first table and duplicated
+    unique_name rows are dropped (drop_duplicated_places()), so the join does not fail on them.
+    Args:
+        columns: list | None -> columns to load, all columns if None
+        table_names: list | None -> tables to join, MERGED_TABLES if None
+    Returns:
+        places_df: pd.DataFrame -> unique_name and the requested columns
+    """
+    table_names = table_names or MERGED_TABLES
+    engine = connect_to_db()
+
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        stored_columns = {
+            table: [column["name"] for column in inspector.get_columns(table)]
+            for table in table_names
+        }
+    # Column order of the chained merges: columns of the first table, then of the next ones
+    ordered_columns = list(
+        dict.fromkeys(
+            column
+            for table in table_names
+            for column in stored_columns[table]
+            if column == "unique_name" or columns is None or column in columns
+        )
     )
+    # A column stored in more than one table is loaded from the first of them only
+    loaded_columns = {"unique_name"}
+    table_columns = {}
+    for table, table_column_names in stored_columns.items():
+        table_columns[table] = [
+            column
+            for column in table_column_names
+            if column not in loaded_columns and (columns is None or column in columns)
+        ]
+        loaded_columns.update(table_columns[table])
+    table_columns = {
+        table: table_column_names
+        for table, table_column_names in table_columns.items()
+        if table_column_names
+    } or {table_names[0]: []}
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(table_columns)
+    ) as executor:
+        dataframes = list(
+            executor.map(
+                load_table_columns, table_columns.keys(), table_columns.values()
+            )
+        )
+
+    dataframes = [
+        drop_duplicated_places(table_df, table)
+        for table, table_df in zip(table_columns, dataframes)
+    ]
+    places_df = pd.concat(dataframes, axis=1, join="outer", sort=True)
+    places_df.index.name = "unique_name"
+
+    return apply_dtype_schema(places_df.reset_index()[ordered_columns])
 
-    db_sanity_check = map(lambda x: save_dataframe_to_database(*x), db_map)
 
-    if all(db_sanity_check):
-        return True
-    else:
-        return False
+def load_data_and_merge():
+    """
+    Merging all tables into one dataframe.
+    """
+    return load_merged_dataset()
 
 
-def send_query_to_db(query: str) -> any:
+def reassign_values_to_separate_db_tables(incremental: bool = True) -> dict:
+    """
+    Reads the places_raw table from the database and creates separate dataframes from it. Then saves them into the
+    database as separate tables: - crimes - activities - area_feel - wealth - families - weather - places
+    All tables are refreshed as one unit, readers never see missing tables or a mix of old and new data. Tables are
+    read or written concurrently over pooled connections.
+    Args:
+        incremental: bool -> if True, only changed rows are written (upsert in one transaction), otherwise tables
+            are written to shadow tables and swapped in
+    Returns:
+        written: dict -> table name: True if the table was written, the new data becomes visible only if all were
+    """
+    places_df = load_database_to_dataframe("places_raw")
+    dataframes = {
+        "crimes": places_df[CRIMES_COLUMNS + list(SAFETY_RANK_ORDER)],
+        "activities": places_df[ACTIVITIES_COLUMNS],
+        "area_feel": places_df[AREA_FEEL_COLUMNS],
+        "wealth": places_df[WEALTH_COLUMNS],
+        "families": places_df[FAMILIES_COLUMNS],
+        "weather": places_df[WEATHER_COLUMNS],
+        "places": places_df[PLACES_COLUMNS],
+    }
+
+    if not incremental:
+        written = refresh_tables(dataframes)
+        if all(written.values()):
+            bump_dataset_generation()
+        return written
+
+    try:
+        upsert_tables(dataframes)
+    except (SQLAlchemyError, RuntimeError) as error:
+        print(f"Reassigning values to separate tables failed: {error}")
+        return {table: False for table in dataframes}
+
+    bump_dataset_generation()
+    return {table: True for table in dataframes}
+
+
+def send_query_to_db(query, parameters: dict | None = None) -> any:
     """
     Sends a query to the database and receives a result back.
     Args:
-        query: str
+        query: str | sqlalchemy statement -> strings are sent as text() queries
+        parameters: dict | None -> values of the bound parameters
 
     Returns:
         query_results: any
     """
-    session = create_sqlalchemy_session()
-    query_results = session.execute(query)
+    engine = connect_to_db()
+    if isinstance(query, str):
+        query = text(query)
+
+    with engine.connect() as connection:
+        query_results = connection.execute(query, parameters or {}).fetchall()
 
     return query_results
 
@@ -166,7 +323,7 @@ def get_responses():
 def create_db_data_from_website_responses(
     state: str,
     median_household_income: int,
-    area_feel: list,
+    area_feel: list | str,
     is_woman: bool = False,
     nightlife: bool = False,
     families: bool = False,
@@ -176,11 +333,12 @@ def create_db_data_from_website_responses(
     cafes: bool = False,
 ) -> list:
     """
-    Creating SQL query based on the user responses.
+    Runs the recommendation query for the user responses. Responses are passed as bound parameters. Results are
+    cached until the tables are refreshed.
     Args:
         state: str
         median_household_income: int
-        area_feel: list
+        area_feel: list -> or a comma separated string
         is_woman: bool
         nightlife: bool
         families: bool
@@ -192,69 +350,25 @@ def create_db_data_from_website_responses(
     Returns:
         list_of_places: list
     """
-    state_query = f"WHERE \np.state = '{state}'"
-    median_household_income_query = (
-        f"\nAND w.median_household_income < {median_household_income}"
+    query = build_recommendation_query(
+        is_woman, nightlife, families, schools, restaurants, bars, cafes
     )
-    if restaurants:
-        restaurants_query = f"\nAND a.restaurants > 20"
-    else:
-        restaurants_query = ""
-
-    if cafes:
-        cafes_query = f"\nAND a.cafes > 10"
-    else:
-        cafes_query = ""
-
-    if bars:
-        bars_query = f"\nAND a.bars > 10"
-    else:
-        bars_query = ""
-    area_feel_str = ", ".join(f"'{area_type}'" for area_type in area_feel)
-    area_feel_query = f"\nAND af.area_feel IN ({area_feel_str})"
-    order_by_query = "\nORDER BY"
-    if families:
-        families_query = FAMILIES_QUERY
-    else:
-        families_query = ""
-
-    if schools:
-        schools_query = SCHOOLS_QUERY
-    else:
-        schools_query = ""
-
-    if nightlife:
-        nightlife_query = NIGHTLIFE_QUERY
-    else:
-        nightlife_query = ""
-
-    if is_woman:
-        sorting_query = "\nc.Rape, c.Assault, c.Murder, c.Robbery, c.Theft DESC"
-    else:
-        sorting_query = "\nc.Assault, c.Murder, c.Rape, c.Robbery, c.Theft DESC"
-
-    limit_query = "\n LIMIT 10;"
-    query = (
-        SELECT_PART
-        + state_query
-        + median_household_income_query
-        + restaurants_query
-        + cafes_query
-        + bars_query
-        + area_feel_query
-        + order_by_query
-        + families_query
-        + schools_query
-        + nightlife_query
-        + sorting_query
-        + limit_query
+    parameters = recommendation_parameters(state, median_household_income, area_feel)
+
+    generation = check_dataset_generation()
+    key = recommendation_key(
+        parameters, (is_woman, nightlife, families, schools, restaurants, bars, cafes)
     )
+    cached_places = RECOMMENDATIONS_CACHE.get(key)
+    if cached_places is not MISSING:
+        return list(cached_places)
 
-    query_results = send_query_to_db(query)
+    query_results = send_query_to_db(query, parameters)
     list_of_places = []
     for place in query_results:
         list_of_places.append(place.unique_name)
 
+    RECOMMENDATIONS_CACHE.set(key, tuple(list_of_places), generation)
     return list_of_places
 
 
@@ -269,13 +383,13 @@ def get_object_variables_from_places_db(place_name: str) -> tuple:
         state: str
         link: str
     """
-    session = create_sqlalchemy_session()
-    place = session.query(Places).filter_by(unique_name=place_name).first()
+    with session_scope() as session:
+        place = session.query(Places).filter_by(unique_name=place_name).first()
 
-    name = place.name
-    type_of_place = place.type_of_place
-    state = place.state
-    link = place.link
+        name = place.name
+        type_of_place = place.type_of_place
+        state = place.state
+        link = place.link
 
     return name, type_of_place, state, link
 
@@ -291,13 +405,13 @@ def get_object_variables_from_activities_db(place_name: str) -> tuple:
         bars: int
         cafes: int
     """
-    session = create_sqlalchemy_session()
-    activity = session.query(Activities).filter_by(unique_name=place_name).first()
+    with session_scope() as session:
+        activity = session.query(Activities).filter_by(unique_name=place_name).first()
 
-    nightlife_rating = activity.nightlife_rating
-    restaurants = activity.restaurants
-    bars = activity.bars
-    cafes = activity.cafes
+        nightlife_rating = activity.nightlife_rating
+        restaurants = activity.restaurants
+        bars = activity.bars
+        cafes = activity.cafes
 
     return nightlife_rating, restaurants, bars, cafes
 
@@ -319,19 +433,19 @@ def get_object_variables_from_area_feel_db(place_name: str) -> tuple:
         fiftyfive_to_sixtyfour: int
         over_sixtyfive: int
     """
-    session = create_sqlalchemy_session()
-    area_feels = session.query(AreaFeel).filter_by(unique_name=place_name).first()
-
-    area_feel = area_feels.area_feel
-    population = area_feels.population
-    under_ten = area_feels.under_ten
-    ten_to_seventeen = area_feels.ten_to_seventeen
-    eighteen_to_twentyfour = area_feels.eighteen_to_twentyfour
-    twentyfive_to_thirtyfour = area_feels.twentyfive_to_thirtyfour
-    thirtyfive_to_fourtyfour = area_feels.thirtyfive_to_fourtyfour
-    fourtyfive_to_fiftyfour = area_feels.fourtyfive_to_fiftyfour
-    fiftyfive_to_sixtyfour = area_feels.fiftyfive_to_sixtyfour
-    over_sixtyfive = area_feels.over_sixtyfive
+    with session_scope() as session:
+        area_feels = session.query(AreaFeel).filter_by(unique_name=place_name).first()
+
+        area_feel = area_feels.area_feel
+        population = area_feels.population
+        under_ten = area_feels.under_ten
+        ten_to_seventeen = area_feels.ten_to_seventeen
+        eighteen_to_twentyfour = area_feels.eighteen_to_twentyfour
+        twentyfive_to_thirtyfour = area_feels.twentyfive_to_thirtyfour
+        thirtyfive_to_fourtyfour = area_feels.thirtyfive_to_fourtyfour
+        fourtyfive_to_fiftyfour = area_feels.fourtyfive_to_fiftyfour
+        fiftyfive_to_sixtyfour = area_feels.fiftyfive_to_sixtyfour
+        over_sixtyfive = area_feels.over_sixtyfive
 
     return (
         area_feel,
@@ -361,16 +475,16 @@ def get_object_variables_from_crimes_db(place_name: str) -> tuple:
         theft: float
         motor_vehicle_theft: float
     """
-    session = create_sqlalchemy_session()
-    crime = session.query(Crimes).filter_by(unique_name=place_name).first()
+    with session_scope() as session:
+        crime = session.query(Crimes).filter_by(unique_name=place_name).first()
 
-    assault = crime.assault
-    murder = crime.murder
-    rape = crime.rape
-    robbery = crime.robbery
-    burglary = crime.burglary
-    theft = crime.theft
-    motor_vehicle_theft = crime.motor_vehicle_theft
+        assault = crime.assault
+        murder = crime.murder
+        rape = crime.rape
+        robbery = crime.robbery
+        burglary = crime.burglary
+        theft = crime.theft
+        motor_vehicle_theft = crime.motor_vehicle_theft
 
     return assault, murder, rape, robbery, burglary, theft, motor_vehicle_theft
 
@@ -384,11 +498,11 @@ def get_object_variables_from_families_db(place_name: str) -> tuple:
           school_rating: str
           families_rating: str
     """
-    session = create_sqlalchemy_session()
-    families = session.query(Families).filter_by(unique_name=place_name).first()
+    with session_scope() as session:
+        families = session.query(Families).filter_by(unique_name=place_name).first()
 
-    school_rating = families.school_rating
-    families_rating = families.families_rating
+        school_rating = families.school_rating
+        families_rating = families.families_rating
 
     return school_rating, families_rating
 
@@ -403,12 +517,12 @@ def get_object_variables_from_wealth_db(place_name: str) -> tuple:
         median_rent: int
         median_household_income: int
     """
-    session = create_sqlalchemy_session()
-    wealth = session.query(Wealth).filter_by(unique_name=place_name).first()
+    with session_scope() as session:
+        wealth = session.query(Wealth).filter_by(unique_name=place_name).first()
 
-    median_home_value = wealth.median_home_value
-    median_rent = wealth.median_rent
-    median_household_income = wealth.median_household_income
+        median_home_value = wealth.median_home_value
+        median_rent = wealth.median_rent
+        median_household_income = wealth.median_household_income
 
     return median_home_value, median_rent, median_household_income
 
@@ -428,17 +542,17 @@ def get_object_variables_from_weather_db(place_name: str) -> tuple:
         prcp_third_quarter: float
         prcp_fourth_quarter: float
     """
-    session = create_sqlalchemy_session()
-    weather = session.query(Weather).filter_by(unique_name=place_name).first()
-
-    temp_first_quarter = weather.temp_first_quarter
-    temp_second_quarter = weather.temp_second_quarter
-    temp_third_quarter = weather.temp_third_quarter
-    temp_fourth_quarter = weather.temp_fourth_quarter
-    prcp_first_quarter = weather.prcp_first_quarter
-    prcp_second_quarter = weather.prcp_second_quarter
-    prcp_third_quarter = weather.prcp_third_quarter
-    prcp_fourth_quarter = weather.prcp_fourth_quarter
+    with session_scope() as session:
+        weather = session.query(Weather).filter_by(unique_name=place_name).first()
+
+        temp_first_quarter = weather.temp_first_quarter
+        temp_second_quarter = weather.temp_second_quarter
+        temp_third_quarter = weather.temp_third_quarter
+        temp_fourth_quarter = weather.temp_fourth_quarter
+        prcp_first_quarter = weather.prcp_first_quarter
+        prcp_second_quarter = weather.prcp_second_quarter
+        prcp_third_quarter = weather.prcp_third_quarter
+        prcp_fourth_quarter = weather.prcp_fourth_quarter
 
     return (
         temp_first_quarter,
@@ -452,14 +566,45 @@ def get_object_variables_from_weather_db(place_name: str) -> tuple:
     )
 
 
-def return_places(responses):
-    pipe(
-        responses,
-        create_db_data_from_website_responses,
-        get_object_variables_from_places_db,
-        get_object_variables_from_wealth_db,
-        get_object_variables_from_activities_db,
-        get_object_variables_from_area_feel_db,
-        get_object_variables_from_crimes_db,
-        get_object_variables_from_families_db,
+def return_places(
+    state: str,
+    median_household_income: int,
+    area_feel: list | str,
+    is_woman: bool = False,
+    nightlife: bool = False,
+    families: bool = False,
+    schools: bool = False,
+    restaurants: bool = False,
+    bars: bool = False,
+    cafes: bool = False,
+) -> list:
+    """
+    Recommended places for the user responses with their full details.
+    Args:
+        state: str
+        median_household_income: int
+        area_feel: list | str
+        is_woman: bool
+        nightlife: bool
+        families: bool
+        schools: bool
+        restaurants: bool
+        bars: bool
+        cafes: bool
+    Returns:
+        profiles: list -> PlaceProfile objects, best place first
+    """
+    list_of_places = create_db_data_from_website_responses(
+        state,
+        median_household_income,
+        area_feel,
+        is_woman,
+        nightlife,
+        families,
+        schools,
+        restaurants,
+        bars,
+        cafes,
     )
+
+    return get_place_profiles(list_of_places)
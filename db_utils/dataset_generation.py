@@ -0,0 +1,101 @@
+"""
+Dataset generation number, increased every time the place tables are refreshed. Caches of the query results are
+valid only for the generation they were filled with.
+"""
+import time
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    Table,
+    func,
+    inspect,
+    select,
+)
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from db_utils.database_connection import connect_to_db
+
+from config import GENERATION_CHECK_SECONDS
+
+DATASET_GENERATION_TABLE = Table(
+    "dataset_generation",
+    MetaData(),
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("generation", BigInteger, nullable=False),
+    Column("refreshed_at", DateTime, server_default=func.now(), onupdate=func.now()),
+)
+
+# Last generation read from the database and when it was read (time.monotonic)
+_last_check = {"generation": None, "checked_at": None}
+
+
+def get_dataset_generation() -> int:
+    """
+    Reads the generation from the database, 0 if the data was never refreshed. The table is created by migrate()
+    and bump_dataset_generation(), not on this read path.
+    Returns:
+        generation: int
+    """
+    engine = connect_to_db()
+
+    with engine.connect() as connection:
+        try:
+            generation = connection.execute(
+                select(DATASET_GENERATION_TABLE.c.generation).where(
+                    DATASET_GENERATION_TABLE.c.id == 1
+                )
+            ).scalar()
+        except (OperationalError, ProgrammingError):
+            connection.rollback()
+            if inspect(connection).has_table(DATASET_GENERATION_TABLE.name):
+                raise
+            generation = None
+
+    return generation or 0
+
+
+def bump_dataset_generation() -> int:
+    """
+    Increases the generation after the tables were refreshed.
+    Returns:
+        generation: int -> new generation
+    """
+    engine = connect_to_db()
+    table = DATASET_GENERATION_TABLE
+
+    with engine.begin() as connection:
+        table.create(connection, checkfirst=True)
+        updated = connection.execute(
+            table.update()
+            .where(table.c.id == 1)
+            .values(generation=table.c.generation + 1)
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(id=1, generation=1))
+        generation = connection.execute(
+            select(table.c.generation).where(table.c.id == 1)
+        ).scalar()
+
+    _last_check["checked_at"] = None
+    print(f"Dataset generation {generation}.")
+    return generation
+
+
+def current_dataset_generation() -> int:
+    """
+    Generation read from the database at most once per GENERATION_CHECK_SECONDS, so cache lookups do not need a
+    database round trip.
+    Returns:
+        generation: int
+    """
+    now = time.monotonic()
+    checked_at = _last_check["checked_at"]
+    if checked_at is None or now - checked_at >= GENERATION_CHECK_SECONDS:
+        _last_check["generation"] = get_dataset_generation()
+        _last_check["checked_at"] = now
+
+    return _last_check["generation"]
@@ -0,0 +1,180 @@
+"""
+Schema migrations of the database. Applied migrations are recorded in the schema_version table, migrate() runs
+the pending ones in order. Tables are rebuilt through the shadow table swap, so they stay readable while migrating.
+"""
+import pandas as pd
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    inspect,
+    select,
+)
+
+from db_utils.database_connection import connect_to_db
+from db_utils.database_operations import load_database_to_dataframe
+from db_utils.table_swap import refresh_tables
+from db_utils.dataset_generation import (
+    DATASET_GENERATION_TABLE,
+    bump_dataset_generation,
+)
+from utils.ranks import add_rank_columns
+
+SCHEMA_VERSION_TABLE = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255)),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+PLACE_TABLES = [
+    "places",
+    "crimes",
+    "activities",
+    "area_feel",
+    "wealth",
+    "families",
+    "weather",
+]
+
+# Names the tables had before, the data is read from them if the new one does not exist
+LEGACY_TABLE_NAMES = {"area_feel": "areafeel"}
+
+
+def load_place_tables() -> dict | None:
+    """
+    Loads the existing place tables. Duplicated keys and rows of places missing from the places table are
+    dropped, as they would break the keys.
+    Returns:
+        dataframes: dict | None -> table name: pd.DataFrame, None if there is no places table
+    """
+    engine = connect_to_db()
+    with engine.connect() as connection:
+        existing_tables = set(inspect(connection).get_table_names())
+
+    if "places" not in existing_tables:
+        print("No places table, tables will be created with the new schema when saved.")
+        return None
+
+    dataframes = {}
+    for table_name in PLACE_TABLES:
+        source_table = table_name
+        if source_table not in existing_tables:
+            source_table = LEGACY_TABLE_NAMES.get(table_name)
+        if source_table not in existing_tables:
+            continue
+        places_df = load_database_to_dataframe(source_table)
+        dataframes[table_name] = places_df.drop_duplicates(
+            subset="unique_name", keep="last"
+        )
+
+    place_names = dataframes["places"]["unique_name"]
+    for table_name, places_df in dataframes.items():
+        dataframes[table_name] = places_df[places_df["unique_name"].isin(place_names)]
+
+    return dataframes
+
+
+def rebuild_tables(dataframes: dict):
+    """
+    Writes the tables with the schema from the dataclasses through the shadow table swap.
+    Args:
+        dataframes: dict -> table name: pd.DataFrame
+    """
+    written = refresh_tables(dataframes)
+    failed_tables = [table for table, is_written in written.items() if not is_written]
+    if failed_tables:
+        raise RuntimeError(f"Tables not rebuilt: {', '.join(failed_tables)}.")
+
+
+def rebuild_place_tables():
+    """
+    Writes the place tables again with the schema from the dataclasses: bounded VARCHAR keys, foreign keys to
+    places and secondary indexes used by the recommendation query.
+    """
+    dataframes = load_place_tables()
+    if dataframes is not None:
+        rebuild_tables(dataframes)
+
+
+def add_rank_columns_to_place_tables():
+    """
+    Adds grade ranks to families and activities and safety ranks to crimes, calculated from the stored values.
+    """
+    dataframes = load_place_tables()
+    if dataframes is not None:
+        rebuild_tables(
+            {
+                table_name: add_rank_columns(places_df)
+                for table_name, places_df in dataframes.items()
+            }
+        )
+
+
+MIGRATIONS = [
+    (
+        1,
+        "Bounded keys, foreign keys to places and indexes for the recommendation query",
+        rebuild_place_tables,
+    ),
+    (
+        2,
+        "Grade and safety rank columns used to order the recommendations",
+        add_rank_columns_to_place_tables,
+    ),
+]
+
+
+def applied_versions() -> set:
+    """
+    Versions recorded in the schema_version table, which is created if it does not exist, together with the
+    dataset_generation table.
+    Returns:
+        versions: set
+    """
+    engine = connect_to_db()
+
+    with engine.begin() as connection:
+        SCHEMA_VERSION_TABLE.create(connection, checkfirst=True)
+        DATASET_GENERATION_TABLE.create(connection, checkfirst=True)
+        versions = set(
+            pd.read_sql(select(SCHEMA_VERSION_TABLE.c.version), con=connection)[
+                "version"
+            ]
+        )
+
+    return versions
+
+
+def migrate() -> list:
+    """
+    Runs the migrations which were not applied yet, in order of their versions.
+    Returns:
+        versions: list -> versions applied now
+    """
+    engine = connect_to_db()
+    versions = applied_versions()
+
+    applied_now = []
+    for version, description, migration in MIGRATIONS:
+        if version in versions:
+            continue
+        migration()
+        with engine.begin() as connection:
+            connection.execute(
+                SCHEMA_VERSION_TABLE.insert().values(
+                    version=version, description=description
+                )
+            )
+        print(f"Applied migration {version}: {description}.")
+        applied_now.append(version)
+
+    if applied_now:
+        bump_dataset_generation()
+
+    return applied_now
@@ -0,0 +1,149 @@
+"""
+Full details of the places from all tables. Profiles of all requested places are fetched with one joined query
+on one session, instead of one session and query per table and place (get_object_variables_from_*_db).
+"""
+from dataclasses import dataclass, fields
+
+from sqlalchemy import bindparam, select
+
+from db_utils.database_connection import session_scope
+from db_utils.result_cache import PROFILES_CACHE, MISSING, check_dataset_generation
+from db_utils.data_classes import (
+    Places,
+    Activities,
+    AreaFeel,
+    Crimes,
+    Families,
+    Wealth,
+    Weather,
+)
+
+
+@dataclass(frozen=True)
+class PlaceProfile:
+    unique_name: str
+    # places
+    name: str | None
+    type_of_place: str | None
+    state: str | None
+    link: str | None
+    # wealth
+    median_home_value: int | None
+    median_rent: int | None
+    median_household_income: int | None
+    # activities
+    nightlife_rating: str | None
+    restaurants: int | None
+    bars: int | None
+    cafes: int | None
+    # area_feel
+    area_feel: str | None
+    population: int | None
+    under_ten: float | None
+    ten_to_seventeen: float | None
+    eighteen_to_twentyfour: float | None
+    twentyfive_to_thirtyfour: float | None
+    thirtyfive_to_fourtyfour: float | None
+    fourtyfive_to_fiftyfour: float | None
+    fiftyfive_to_sixtyfour: float | None
+    over_sixtyfive: float | None
+    # crimes
+    assault: float | None
+    murder: float | None
+    rape: float | None
+    robbery: float | None
+    burglary: float | None
+    theft: float | None
+    motor_vehicle_theft: float | None
+    # families
+    school_rating: str | None
+    families_rating: str | None
+    # weather
+    temp_first_quarter: float | None
+    temp_second_quarter: float | None
+    temp_third_quarter: float | None
+    temp_fourth_quarter: float | None
+    prcp_first_quarter: float | None
+    prcp_second_quarter: float | None
+    prcp_third_quarter: float | None
+    prcp_fourth_quarter: float | None
+
+
+PROFILE_TABLES = [Places, Wealth, Activities, AreaFeel, Crimes, Families, Weather]
+
+
+def build_profiles_query(filter_by_names: bool = True):
+    """
+    places LEFT JOIN all other tables on unique_name, for the unique names bound as expanding "unique_names"
+    parameter. Every PlaceProfile field is selected from the first table having the column.
+    Args:
+        filter_by_names: bool -> if False, profiles of all places are selected
+    Returns:
+        query: Select
+    """
+    tables = [model.__table__ for model in PROFILE_TABLES]
+    places = tables[0]
+
+    columns = []
+    for field in fields(PlaceProfile):
+        table = next(table for table in tables if field.name in table.c)
+        columns.append(table.c[field.name])
+
+    joined_tables = places
+    for table in tables[1:]:
+        joined_tables = joined_tables.outerjoin(
+            table, places.c.unique_name == table.c.unique_name
+        )
+
+    query = select(*columns).select_from(joined_tables)
+    if filter_by_names:
+        query = query.where(
+            places.c.unique_name.in_(bindparam("unique_names", expanding=True))
+        )
+
+    return query
+
+
+PROFILES_QUERY = build_profiles_query()
+
+ALL_PROFILES_QUERY = build_profiles_query(filter_by_names=False)
+
+
+def get_place_profiles(unique_names: list) -> list:
+    """
+    Returns profiles of the places in the order of unique_names. Places missing from the places table are
+    skipped. Cached profiles are reused, the other ones are fetched with one query.
+    Args:
+        unique_names: list
+    Returns:
+        profiles: list -> PlaceProfile objects
+    """
+    if not unique_names:
+        return []
+
+    generation = check_dataset_generation()
+    profiles = {name: PROFILES_CACHE.get(name) for name in unique_names}
+    missing_names = [name for name, profile in profiles.items() if profile is MISSING]
+
+    if missing_names:
+        with session_scope() as session:
+            rows = session.execute(
+                PROFILES_QUERY, {"unique_names": missing_names}
+            ).all()
+        for row in rows:
+            profiles[row.unique_name] = PlaceProfile(*row)
+            PROFILES_CACHE.set(row.unique_name, profiles[row.unique_name], generation)
+
+    return [profiles[name] for name in unique_names if profiles[name] is not MISSING]
+
+
+def load_all_place_profiles() -> dict:
+    """
+    Profiles of all places, for services keeping them in memory.
+    Returns:
+        profiles: dict -> unique name: PlaceProfile
+    """
+    with session_scope() as session:
+        rows = session.execute(ALL_PROFILES_QUERY).all()
+
+    return {row.unique_name: PlaceProfile(*row) for row in rows}
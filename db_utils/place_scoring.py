@@ -0,0 +1,212 @@
+"""
+Weighted scoring of the places. Every criterion is normalized once into a per-place feature between 0 (worst) and
+1 (best), a query combines them with the user weights in one matrix-vector product and picks the best places with
+argpartition, instead of a fixed lexicographic order and on/off filters.
+"""
+import numpy as np
+import pandas as pd
+
+from db_utils.database_operations import load_merged_dataset
+from db_utils.recommendation_engine import collation_key
+from config import (
+    US_AVERAGE_CRIMES,
+    CRIMES_COLUMNS,
+    WEATHER_COLUMNS,
+    GRADE_RANK_COLUMNS,
+    UNRANKED_GRADE,
+    VENUE_THRESHOLDS,
+    COMFORT_TEMPERATURE,
+    COMFORT_TEMPERATURE_RANGE,
+    INCOME_FIT_RATIO,
+    SCORING_LIMIT,
+)
+
+SCORING_TABLES = ["places", "wealth", "crimes", "activities", "families", "weather"]
+
+CRIME_COLUMNS = CRIMES_COLUMNS[1:]
+
+TEMPERATURE_COLUMNS = [
+    column for column in WEATHER_COLUMNS if column.startswith("temp")
+]
+
+GRADE_FEATURES = {
+    "families": GRADE_RANK_COLUMNS["families_rating"],
+    "schools": GRADE_RANK_COLUMNS["school_rating"],
+    "nightlife": GRADE_RANK_COLUMNS["nightlife_rating"],
+}
+
+# Features precomputed per place, the income fit depends on the user income and is calculated per query
+FEATURES = ["safety", *GRADE_FEATURES, *VENUE_THRESHOLDS, "climate"]
+
+SCORING_COLUMNS = [
+    "state",
+    "median_household_income",
+    *CRIME_COLUMNS,
+    *GRADE_FEATURES.values(),
+    *VENUE_THRESHOLDS,
+    *TEMPERATURE_COLUMNS,
+]
+
+
+def safety_feature(places_df: pd.DataFrame) -> pd.Series:
+    """
+    1 / (1 + crime index), where the crime index is the mean ratio of the crimes to the US averages: 0.5 for a
+    place with average crime, 1 for a place without crime.
+    """
+    crime_ratios = places_df[CRIME_COLUMNS].astype(float) / [
+        US_AVERAGE_CRIMES[f"US_AVERAGE_{column.upper()}"] for column in CRIME_COLUMNS
+    ]
+
+    return 1 / (1 + crime_ratios.mean(axis=1, skipna=False))
+
+
+def grade_feature(ranks: pd.Series) -> pd.Series:
+    """
+    1 for A+ down to 0 for grades below B.
+    """
+    return (UNRANKED_GRADE - ranks.astype(float)) / (UNRANKED_GRADE - 1)
+
+
+def venue_feature(venues: pd.Series, threshold: int) -> pd.Series:
+    """
+    count / (count + threshold): 0.5 at the threshold of the hard filter, approaching 1 for many venues.
+    """
+    venues = venues.astype(float)
+
+    return venues / (venues + threshold)
+
+
+def climate_feature(places_df: pd.DataFrame) -> pd.Series:
+    """
+    1 if all quarterly mean temperatures are COMFORT_TEMPERATURE, 0 if they are on average
+    COMFORT_TEMPERATURE_RANGE or more away from it.
+    """
+    distances = (
+        places_df[TEMPERATURE_COLUMNS].astype(float) - COMFORT_TEMPERATURE
+    ).abs()
+
+    return (1 - distances.mean(axis=1, skipna=False) / COMFORT_TEMPERATURE_RANGE).clip(
+        lower=0
+    )
+
+
+def create_feature_matrix(places_df: pd.DataFrame) -> np.ndarray:
+    """
+    Features of the places in FEATURES order. Missing features are replaced by the median of the feature, so
+    places with incomplete data are neither favoured nor excluded.
+    Args:
+        places_df: pd.DataFrame -> SCORING_COLUMNS
+    Returns:
+        features: np.ndarray -> shape (places, FEATURES)
+    """
+    features_df = pd.DataFrame(
+        {
+            "safety": safety_feature(places_df),
+            **{
+                feature: grade_feature(places_df[column])
+                for feature, column in GRADE_FEATURES.items()
+            },
+            **{
+                venue: venue_feature(places_df[venue], threshold)
+                for venue, threshold in VENUE_THRESHOLDS.items()
+            },
+            "climate": climate_feature(places_df),
+        }
+    )
+    features_df = features_df.fillna(features_df.median()).fillna(0)
+
+    return features_df[FEATURES].to_numpy(dtype=np.float32)
+
+
+class PlaceScorer:
+    def __init__(self, places_df: pd.DataFrame):
+        """
+        Args:
+            places_df: pd.DataFrame -> unique_name and SCORING_COLUMNS
+        """
+        places_df = places_df.reset_index(drop=True)
+        self.unique_names = places_df["unique_name"].to_numpy(dtype=object)
+        # Keyed like the engine lookups, so states match regardless of case as in MySQL
+        self.state_rows = places_df.groupby(
+            places_df["state"].astype("object").map(collation_key)
+        ).indices
+        self.log_income = np.log(
+            places_df["median_household_income"]
+            .astype("Float64")
+            .to_numpy(dtype=float, na_value=np.nan)
+        )
+        self.features = create_feature_matrix(places_df)
+
+    @classmethod
+    def from_database(cls):
+        """
+        Loads the place tables once and calculates the features.
+        """
+        places_df = load_merged_dataset(
+            columns=SCORING_COLUMNS, table_names=SCORING_TABLES
+        )
+
+        return cls(places_df[places_df["state"].notna()])
+
+    def __len__(self):
+        return len(self.unique_names)
+
+    def income_fit(self, median_household_income: int, rows) -> np.ndarray:
+        """
+        1 if the median income of the place equals the user income, 0 if it is INCOME_FIT_RATIO times lower or
+        higher, or missing.
+        """
+        distances = np.abs(self.log_income[rows] - np.log(median_household_income))
+        fit = 1 - distances / np.log(INCOME_FIT_RATIO)
+
+        return np.nan_to_num(np.clip(fit, 0, 1))
+
+    def score(
+        self,
+        weights: dict,
+        median_household_income: int | None = None,
+        state: str | None = None,
+        limit: int = SCORING_LIMIT,
+    ) -> list:
+        """
+        Best places by the weighted mean of their features.
+        Args:
+            weights: dict -> feature name from FEATURES or "income": weight, missing features have weight 0
+            median_household_income: int | None -> user income, needed for the "income" weight
+            state: str | None -> only places in the state (case-insensitive), all places if None
+            limit: int
+        Returns:
+            places: list -> (unique name, score between 0 and 1) tuples, best place first
+        """
+        unknown_features = set(weights) - set(FEATURES) - {"income"}
+        if unknown_features:
+            raise ValueError(
+                f"Unknown features: {', '.join(sorted(unknown_features))}."
+            )
+        if weights.get("income") and median_household_income is None:
+            raise ValueError("Income weight needs median_household_income.")
+        total_weight = sum(abs(weight) for weight in weights.values())
+        if total_weight == 0:
+            raise ValueError("At least one weight must not be 0.")
+
+        weight_vector = np.array(
+            [weights.get(feature, 0) for feature in FEATURES], dtype=np.float32
+        )
+        rows = (
+            slice(None)
+            if state is None
+            else self.state_rows.get(collation_key(state), np.array([], dtype=int))
+        )
+        scores = self.features[rows] @ weight_vector
+        if weights.get("income"):
+            scores += weights["income"] * self.income_fit(median_household_income, rows)
+        scores /= total_weight
+
+        limit = min(limit, len(scores))
+        if limit == 0:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        unique_names = self.unique_names[rows][best]
+
+        return list(zip(unique_names.tolist(), scores[best].tolist()))
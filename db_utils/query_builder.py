@@ -0,0 +1,101 @@
+"""
+Recommendation query built with SQLAlchemy Core. User input is passed only as bound parameters, the statement
+depends only on which filter and sort options are set. Statements are cached per combination of the options, so
+they are built and compiled once and the same statement text is sent to the server for every request.
+"""
+from functools import lru_cache
+
+from sqlalchemy import Select, bindparam, select
+
+from db_utils.data_classes import Places, Wealth, Crimes, Activities, AreaFeel, Families
+
+from config import VENUE_THRESHOLDS, RECOMMENDATIONS_LIMIT
+
+
+@lru_cache(maxsize=128)
+def build_recommendation_query(
+    is_woman: bool = False,
+    nightlife: bool = False,
+    families: bool = False,
+    schools: bool = False,
+    restaurants: bool = False,
+    bars: bool = False,
+    cafes: bool = False,
+) -> Select:
+    """
+    Builds the recommendation query for the set options. Values are bound at execution with
+    recommendation_parameters().
+    Args:
+        is_woman: bool
+        nightlife: bool
+        families: bool
+        schools: bool
+        restaurants: bool
+        bars: bool
+        cafes: bool
+    Returns:
+        query: Select
+    """
+    f = Families.__table__
+    p = Places.__table__
+    w = Wealth.__table__
+    c = Crimes.__table__
+    a = Activities.__table__
+    af = AreaFeel.__table__
+
+    query = (
+        select(f.c.unique_name)
+        .select_from(
+            f.outerjoin(p, f.c.unique_name == p.c.unique_name)
+            .outerjoin(w, f.c.unique_name == w.c.unique_name)
+            .outerjoin(c, f.c.unique_name == c.c.unique_name)
+            .outerjoin(a, f.c.unique_name == a.c.unique_name)
+            .outerjoin(af, f.c.unique_name == af.c.unique_name)
+        )
+        .where(
+            p.c.state == bindparam("state"),
+            w.c.median_household_income < bindparam("median_household_income"),
+            af.c.area_feel.in_(bindparam("area_feel", expanding=True)),
+        )
+    )
+    for venue, is_wanted in (
+        ("restaurants", restaurants),
+        ("cafes", cafes),
+        ("bars", bars),
+    ):
+        if is_wanted:
+            query = query.where(a.c[venue] > VENUE_THRESHOLDS[venue])
+
+    order_by = []
+    if families:
+        order_by.append(f.c.families_rating_rank)
+    if schools:
+        order_by.append(f.c.school_rating_rank)
+    if nightlife:
+        order_by.append(a.c.nightlife_rating_rank)
+    order_by.append(c.c.safety_rank_women if is_woman else c.c.safety_rank)
+
+    return query.order_by(*order_by).limit(RECOMMENDATIONS_LIMIT)
+
+
+def recommendation_parameters(
+    state: str, median_household_income: int, area_feel: list | str
+) -> dict:
+    """
+    Bound parameters of the recommendation query. Area feel can be a list or a comma separated string.
+    Args:
+        state: str
+        median_household_income: int
+        area_feel: list | str
+    Returns:
+        parameters: dict
+    """
+    if isinstance(area_feel, str):
+        area_feel = [area_type.strip() for area_type in area_feel.split(",")]
+    area_feel = [area_type for area_type in area_feel if area_type]
+
+    return {
+        "state": state,
+        "median_household_income": median_household_income,
+        "area_feel": area_feel,
+    }
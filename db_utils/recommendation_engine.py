@@ -0,0 +1,319 @@
+"""
+In-memory recommendation engine. The joined place tables are loaded once into numpy column arrays sorted by state,
+so a query only scans the row range of one state with boolean masks instead of running the joined query in the
+database. Filters and ordering are the same as in build_recommendation_query(). State and area feel are compared
+case-insensitively, like the case-insensitive collation of the MySQL tables (accents and trailing spaces are not
+normalized).
+"""
+import numpy as np
+import pandas as pd
+
+from db_utils.database_operations import load_merged_dataset
+from db_utils.query_builder import recommendation_parameters
+from config import (
+    RANKED_GRADES,
+    VENUE_THRESHOLDS,
+    RECOMMENDATIONS_LIMIT,
+    RECOMMENDATIONS_BATCH_SIZE,
+)
+
+ENGINE_TABLES = ["families", "places", "wealth", "crimes", "activities", "area_feel"]
+
+RANK_COLUMNS = [
+    "families_rating_rank",
+    "school_rating_rank",
+    "nightlife_rating_rank",
+    "safety_rank",
+    "safety_rank_women",
+]
+
+ENGINE_COLUMNS = [
+    "state",
+    "median_household_income",
+    "area_feel",
+    *VENUE_THRESHOLDS,
+    *RANK_COLUMNS,
+]
+
+# Options of the recommendation query changing the order, profiles with the same ones share the sort keys
+ORDER_OPTIONS = ["is_woman", "nightlife", "families", "schools"]
+
+# Grade ranks go from 1 up to UNRANKED_GRADE, missing ranks are stored as 0
+GRADE_RANK_BASE = len(RANKED_GRADES) + 2
+
+
+def collation_key(value: str) -> str:
+    """
+    Key of the string in the lookups of the engine, equal for strings differing only in case.
+    """
+    return value.casefold()
+
+
+def rank_array(ranks: pd.Series) -> np.ndarray:
+    """
+    Ranks as int64 with missing values as 0, so they are sorted first like NULLs in MySQL ascending order.
+    """
+    return ranks.astype("Float64").fillna(0).to_numpy(dtype=np.int64)
+
+
+class RecommendationEngine:
+    def __init__(self, places_df: pd.DataFrame):
+        """
+        Args:
+            places_df: pd.DataFrame -> unique_name and ENGINE_COLUMNS of the places present in the families table,
+                which the recommendation query starts from
+        """
+        places_df = places_df.dropna(subset=["state"])
+        places_df = places_df.assign(
+            state=places_df["state"].astype("object").map(collation_key)
+        ).sort_values(["state", "unique_name"], kind="stable")
+
+        self.unique_names = places_df["unique_name"].to_numpy(dtype=object)
+        self.median_household_income = (
+            places_df["median_household_income"]
+            .astype("Float64")
+            .to_numpy(dtype=float, na_value=np.nan)
+        )
+        area_feel = pd.Categorical(
+            places_df["area_feel"]
+            .astype("object")
+            .map(collation_key, na_action="ignore")
+        )
+        self.area_feel_codes = {
+            area_type: code for code, area_type in enumerate(area_feel.categories)
+        }
+        # Missing area feel has code -1, which points to the last, never wanted, entry of the lookup
+        self.area_feel = area_feel.codes
+        self.venues = {
+            venue: places_df[venue]
+            .astype("Float64")
+            .to_numpy(dtype=float, na_value=np.nan)
+            for venue in VENUE_THRESHOLDS
+        }
+        self.ranks = {column: rank_array(places_df[column]) for column in RANK_COLUMNS}
+        self.safety_rank_base = (
+            max(
+                self.ranks["safety_rank"].max(initial=0),
+                self.ranks["safety_rank_women"].max(initial=0),
+            )
+            + 1
+        )
+
+        states = places_df["state"].to_numpy(dtype=object)
+        state_names, starts = np.unique(states, return_index=True)
+        stops = np.append(starts[1:], len(states))
+        self.state_ranges = {
+            state: (start, stop)
+            for state, start, stop in zip(state_names, starts, stops)
+        }
+
+    @classmethod
+    def from_database(cls):
+        """
+        Loads the place tables once and builds the engine.
+        """
+        places_df = load_merged_dataset(
+            columns=ENGINE_COLUMNS, table_names=ENGINE_TABLES
+        )
+        # Joined from families, so places missing from it are never recommended
+        places_df = places_df[places_df["families_rating_rank"].notna()]
+
+        return cls(places_df)
+
+    def __len__(self):
+        return len(self.unique_names)
+
+    def sort_keys(
+        self,
+        rows: np.ndarray,
+        is_woman: bool,
+        nightlife: bool,
+        families: bool,
+        schools: bool,
+    ) -> np.ndarray:
+        """
+        One int64 key per row, ordering the rows the same as the ORDER BY of the recommendation query: the wanted
+        grade ranks one after another, then the safety rank. The row position is the last part of the key, so rows
+        with equal ranks stay in unique name order and all keys are distinct.
+        Args:
+            rows: np.ndarray -> row positions
+        Returns:
+            keys: np.ndarray
+        """
+        keys = np.zeros(len(rows), dtype=np.int64)
+        for column, is_wanted in (
+            ("families_rating_rank", families),
+            ("school_rating_rank", schools),
+            ("nightlife_rating_rank", nightlife),
+        ):
+            if is_wanted:
+                keys = keys * GRADE_RANK_BASE + self.ranks[column][rows]
+        safety_column = "safety_rank_women" if is_woman else "safety_rank"
+        keys = keys * self.safety_rank_base + self.ranks[safety_column][rows]
+
+        return keys * len(self) + rows
+
+    def wanted_area_feel(self, area_feel: list) -> np.ndarray:
+        """
+        Lookup of the area feel codes: True for the wanted ones. The last entry, for missing area feel (code -1),
+        is never wanted.
+        """
+        is_wanted = np.zeros(len(self.area_feel_codes) + 1, dtype=bool)
+        for area_type in map(collation_key, area_feel):
+            if area_type in self.area_feel_codes:
+                is_wanted[self.area_feel_codes[area_type]] = True
+
+        return is_wanted
+
+    def recommend(
+        self,
+        state: str,
+        median_household_income: int,
+        area_feel: list | str,
+        is_woman: bool = False,
+        nightlife: bool = False,
+        families: bool = False,
+        schools: bool = False,
+        restaurants: bool = False,
+        bars: bool = False,
+        cafes: bool = False,
+        limit: int = RECOMMENDATIONS_LIMIT,
+    ) -> list:
+        """
+        Same results as create_db_data_from_website_responses(), places with equal ranks are returned in order of
+        their unique names.
+        Args:
+            state: str
+            median_household_income: int
+            area_feel: list | str
+            is_woman: bool
+            nightlife: bool
+            families: bool
+            schools: bool
+            restaurants: bool
+            bars: bool
+            cafes: bool
+            limit: int
+        Returns:
+            list_of_places: list -> unique names, best place first
+        """
+        parameters = recommendation_parameters(
+            state, median_household_income, area_feel
+        )
+        state = collation_key(state)
+        if state not in self.state_ranges:
+            return []
+        start, stop = self.state_ranges[state]
+
+        mask = self.wanted_area_feel(parameters["area_feel"])[
+            self.area_feel[start:stop]
+        ]
+        mask &= self.median_household_income[start:stop] < median_household_income
+        for venue, is_wanted in (
+            ("restaurants", restaurants),
+            ("cafes", cafes),
+            ("bars", bars),
+        ):
+            if is_wanted:
+                mask &= self.venues[venue][start:stop] > VENUE_THRESHOLDS[venue]
+
+        rows = start + np.flatnonzero(mask)
+        keys = self.sort_keys(rows, is_woman, nightlife, families, schools)
+        if len(rows) > limit:
+            best = np.argpartition(keys, limit - 1)[:limit]
+            rows, keys = rows[best], keys[best]
+
+        return self.unique_names[rows[np.argsort(keys)]].tolist()
+
+    def batch_mask(self, profiles: list, start: int, stop: int) -> np.ndarray:
+        """
+        Filters of the recommendation query for many profiles of the same state at once.
+        Args:
+            profiles: list -> dicts with the arguments of recommend()
+            start: int -> first row of the state
+            stop: int -> row after the last row of the state
+        Returns:
+            mask: np.ndarray -> shape (profiles, rows of the state)
+        """
+        incomes = np.array(
+            [profile["median_household_income"] for profile in profiles], dtype=float
+        )
+        mask = self.median_household_income[start:stop] < incomes[:, np.newaxis]
+
+        wanted_area_feel = np.array(
+            [
+                self.wanted_area_feel(
+                    recommendation_parameters(
+                        profile["state"],
+                        profile["median_household_income"],
+                        profile["area_feel"],
+                    )["area_feel"]
+                )
+                for profile in profiles
+            ]
+        )
+        mask &= wanted_area_feel[:, self.area_feel[start:stop]]
+
+        for venue, threshold in VENUE_THRESHOLDS.items():
+            is_wanted = np.array([bool(profile.get(venue)) for profile in profiles])
+            if is_wanted.any():
+                mask &= ~is_wanted[:, np.newaxis] | (
+                    self.venues[venue][start:stop] > threshold
+                )
+
+        return mask
+
+    def recommend_batch(
+        self, profiles: list, limit: int = RECOMMENDATIONS_LIMIT
+    ) -> list:
+        """
+        Same results as recommend() for every profile. Profiles are grouped by state and ordering options, so
+        the sort keys are calculated once per group and the filters of up to RECOMMENDATIONS_BATCH_SIZE profiles
+        are evaluated as one profiles x places mask.
+        Args:
+            profiles: list -> dicts with the arguments of recommend(), missing options are False
+            limit: int
+        Returns:
+            recommendations: list -> list of unique names per profile, in order of the profiles
+        """
+        groups = {}
+        for position, profile in enumerate(profiles):
+            group = (
+                collation_key(profile["state"]),
+                *(bool(profile.get(option)) for option in ORDER_OPTIONS),
+            )
+            groups.setdefault(group, []).append(position)
+
+        recommendations = [[] for _ in profiles]
+        for (state, *order_options), positions in groups.items():
+            if state not in self.state_ranges:
+                continue
+            start, stop = self.state_ranges[state]
+            keys = self.sort_keys(np.arange(start, stop), *order_options)
+            # Larger than all keys, for the rows filtered out
+            filtered_key = np.iinfo(np.int64).max
+            group_limit = min(limit, stop - start)
+
+            for chunk_start in range(0, len(positions), RECOMMENDATIONS_BATCH_SIZE):
+                chunk = positions[
+                    chunk_start : chunk_start + RECOMMENDATIONS_BATCH_SIZE
+                ]
+                mask = self.batch_mask(
+                    [profiles[position] for position in chunk], start, stop
+                )
+                masked_keys = np.where(mask, keys, filtered_key)
+
+                best = np.argpartition(masked_keys, group_limit - 1, axis=1)[
+                    :, :group_limit
+                ]
+                best_keys = np.take_along_axis(masked_keys, best, axis=1)
+                order = np.argsort(best_keys, axis=1)
+                best = np.take_along_axis(best, order, axis=1)
+                best_keys = np.take_along_axis(best_keys, order, axis=1)
+
+                for position, rows, row_keys in zip(chunk, best, best_keys):
+                    recommendations[position] = self.unique_names[
+                        start + rows[row_keys != filtered_key]
+                    ].tolist()
+
+        return recommendations
@@ -0,0 +1,65 @@
+"""
+Read-through caches of the recommendation results and place profiles. The data changes only when the tables are
+refreshed, so entries are valid until the dataset generation changes or their time to live passes.
+"""
+from utils.ttl_cache import TTLCache, MISSING
+from db_utils.dataset_generation import current_dataset_generation
+
+from config import RECOMMENDATIONS_CACHE_SIZE, PROFILES_CACHE_SIZE, CACHE_TTL_SECONDS
+
+RECOMMENDATIONS_CACHE = TTLCache(RECOMMENDATIONS_CACHE_SIZE, CACHE_TTL_SECONDS)
+
+PROFILES_CACHE = TTLCache(PROFILES_CACHE_SIZE, CACHE_TTL_SECONDS)
+
+
+def check_dataset_generation() -> int:
+    """
+    Clears the caches if the tables were refreshed since they were filled. The returned generation is passed to
+    set() of the values read after the check, so values read while the tables are refreshed are not stored.
+    Returns:
+        generation: int
+    """
+    generation = current_dataset_generation()
+    RECOMMENDATIONS_CACHE.check_generation(generation)
+    PROFILES_CACHE.check_generation(generation)
+
+    return generation
+
+
+def recommendation_key(parameters: dict, options: tuple) -> tuple:
+    """
+    Cache key of the recommendation query. Area feel is matched with IN, so its order and duplicates do not
+    change the key.
+    Args:
+        parameters: dict -> from recommendation_parameters()
+        options: tuple -> boolean options of the query
+    Returns:
+        key: tuple
+    """
+    return (
+        parameters["state"],
+        parameters["median_household_income"],
+        tuple(sorted(set(parameters["area_feel"]))),
+        tuple(bool(option) for option in options),
+    )
+
+
+def cache_metrics() -> dict:
+    """
+    Returns:
+        metrics: dict -> hits, misses, evictions and size of both caches
+    """
+    return {
+        "recommendations": RECOMMENDATIONS_CACHE.metrics(),
+        "profiles": PROFILES_CACHE.metrics(),
+    }
+
+
+__all__ = [
+    "MISSING",
+    "RECOMMENDATIONS_CACHE",
+    "PROFILES_CACHE",
+    "check_dataset_generation",
+    "recommendation_key",
+    "cache_metrics",
+]
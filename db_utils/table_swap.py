@@ -0,0 +1,218 @@
+"""
+Zero-downtime refresh of the tables. New data is written to shadow tables while the live tables stay untouched,
+then all live tables are exchanged with the shadow ones in a single RENAME TABLE statement, which MySQL runs
+atomically. Readers see either the old or the new generation of all tables, never a missing or half-written one.
+"""
+import concurrent.futures
+
+import pandas as pd
+from sqlalchemy import inspect
+
+from db_utils.database_connection import connect_to_db
+from db_utils.bulk_load import PARENT_TABLES, bulk_load_dataframe, parents_first
+
+SHADOW_SUFFIX = "__shadow"
+OLD_SUFFIX = "__old"
+
+
+def shadow_table_name(table_name: str) -> str:
+    """
+    Name of the table the new data is written to before the swap.
+    """
+    return f"{table_name}{SHADOW_SUFFIX}"
+
+
+def old_table_name(table_name: str) -> str:
+    """
+    Name the live table gets during the swap, before it is dropped.
+    """
+    return f"{table_name}{OLD_SUFFIX}"
+
+
+def live_table_name(table_name: str) -> str:
+    """
+    Name of the live table for the shadow or old table.
+    """
+    return table_name.removesuffix(SHADOW_SUFFIX).removesuffix(OLD_SUFFIX)
+
+
+def drop_tables(connection, table_names: list):
+    """
+    Drops the tables if they exist, the ones referred to by foreign keys last. SQLite (used in tests) drops one
+    table per statement.
+    """
+    table_names = sorted(
+        table_names, key=lambda table: live_table_name(table) in PARENT_TABLES
+    )
+    if not table_names:
+        return
+    if connection.dialect.name == "sqlite":
+        for table in table_names:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS `{table}`")
+        return
+    connection.exec_driver_sql(
+        f"DROP TABLE IF EXISTS {', '.join(f'`{table}`' for table in table_names)}"
+    )
+
+
+def drop_stale_tables(connection) -> list:
+    """
+    Drops shadow and old tables left by a refresh that did not finish.
+    Returns:
+        stale_tables: list
+    """
+    stale_tables = [
+        table
+        for table in inspect(connection).get_table_names()
+        if table.endswith((SHADOW_SUFFIX, OLD_SUFFIX))
+    ]
+    drop_tables(connection, stale_tables)
+    if stale_tables:
+        print(f"Dropped stale tables: {', '.join(stale_tables)}.")
+
+    return stale_tables
+
+
+def table_renames(table_names: list, existing_tables: set) -> list:
+    """
+    Renames moving live tables aside and shadow tables in their place, in order. Tables that do not exist yet are
+    only renamed from their shadow.
+    Args:
+        table_names: list
+        existing_tables: set
+    Returns:
+        renames: list -> (old name, new name) pairs
+    """
+    renames = []
+    for table in table_names:
+        if table in existing_tables:
+            renames.append((table, old_table_name(table)))
+        renames.append((shadow_table_name(table), table))
+
+    return renames
+
+
+def rename_statement(table_names: list, existing_tables: set) -> str:
+    """
+    One RENAME TABLE statement doing all table_renames().
+    Args:
+        table_names: list
+        existing_tables: set
+    Returns:
+        statement: str
+    """
+    renames = table_renames(table_names, existing_tables)
+
+    return f"RENAME TABLE {', '.join(f'`{old}` TO `{new}`' for old, new in renames)}"
+
+
+def swap_in_shadow_tables(table_names: list):
+    """
+    Atomically replaces the live tables with their shadow tables and drops the previous generation. SQLite (used
+    in tests) has no multi-table RENAME TABLE, the tables are renamed one by one in the same transaction instead.
+    Args:
+        table_names: list
+    """
+    engine = connect_to_db()
+
+    with engine.begin() as connection:
+        existing_tables = set(inspect(connection).get_table_names())
+        if connection.dialect.name == "sqlite":
+            for old, new in table_renames(table_names, existing_tables):
+                connection.exec_driver_sql(f"ALTER TABLE `{old}` RENAME TO `{new}`")
+        else:
+            connection.exec_driver_sql(rename_statement(table_names, existing_tables))
+        drop_tables(
+            connection,
+            [
+                old_table_name(table)
+                for table in table_names
+                if table in existing_tables
+            ],
+        )
+
+
+def load_shadow_table(
+    table_name: str, places_df: pd.DataFrame, referred_tables: dict | None = None
+):
+    """
+    Bulk loads the dataframe to the shadow table with the column types, foreign keys and indexes of the live table.
+    Args:
+        table_name: str -> name of the live table
+        places_df: pd.DataFrame
+        referred_tables: dict | None -> tables the foreign keys point to instead of the live ones
+    """
+    bulk_load_dataframe(
+        places_df,
+        shadow_table_name(table_name),
+        if_exists="replace",
+        model_name=table_name,
+        referred_tables=referred_tables,
+    )
+
+
+def load_shadow_tables(dataframes: dict, max_workers: int | None = None) -> dict:
+    """
+    Loads the tables referred to by foreign keys first, then the rest concurrently. Foreign keys of the shadow
+    tables point to the shadow tables of the same refresh, after the swap they point to the live tables.
+    Args:
+        dataframes: dict -> table name: pd.DataFrame
+        max_workers: int | None -> number of threads, one per table if None
+    Returns:
+        futures: dict -> table name: concurrent.futures.Future
+    """
+    referred_tables = {table: shadow_table_name(table) for table in dataframes}
+    parent_tables = [
+        table for table in parents_first(dataframes) if table in PARENT_TABLES
+    ]
+    futures = {}
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers or len(dataframes)
+    ) as executor:
+        for table_name in parent_tables:
+            futures[table_name] = executor.submit(
+                load_shadow_table, table_name, dataframes[table_name], referred_tables
+            )
+            concurrent.futures.wait([futures[table_name]])
+        for table_name, places_df in dataframes.items():
+            if table_name not in futures:
+                futures[table_name] = executor.submit(
+                    load_shadow_table, table_name, places_df, referred_tables
+                )
+
+    return futures
+
+
+def refresh_tables(dataframes: dict, max_workers: int | None = None) -> dict:
+    """
+    Writes every dataframe to the shadow table with the bulk loader, concurrently over pooled connections, so it
+    takes about as long as the largest table. Then swaps all of them in as one unit, only if all were written. If
+    writing fails, the live tables are not changed and the shadow tables are dropped by the next refresh.
+    Args:
+        dataframes: dict -> table name: pd.DataFrame
+        max_workers: int | None -> number of threads, one per table if None
+    Returns:
+        written: dict -> table name: True if the shadow table was written
+    """
+    engine = connect_to_db()
+
+    with engine.begin() as connection:
+        drop_stale_tables(connection)
+
+    futures = load_shadow_tables(dataframes, max_workers)
+
+    written = {}
+    for table_name in dataframes:
+        exception = futures[table_name].exception()
+        if exception is not None:
+            print(f"Writing table {table_name} failed: {exception}")
+        written[table_name] = exception is None
+
+    if all(written.values()):
+        swap_in_shadow_tables(list(dataframes))
+        print(f"Tables swapped in: {', '.join(dataframes)}.")
+    else:
+        print("Tables not swapped in, live tables are unchanged.")
+
+    return written
@@ -0,0 +1,292 @@
+"""
+Incremental writes of dataframes to the database. Incoming rows are compared with the stored ones by the key
+(unique_name) and a hash of the row, then only the new and changed rows are written with batched
+INSERT ... ON DUPLICATE KEY UPDATE and the rows missing from the dataframe are removed with batched DELETE.
+"""
+import concurrent.futures
+import itertools
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, Table, inspect, select
+from sqlalchemy.dialects import mysql, sqlite
+
+from db_utils.database_connection import connect_to_db
+from db_utils.bulk_load import (
+    EXECUTEMANY_CHUNKSIZE,
+    build_table,
+    dataframe_to_rows,
+    parents_first,
+)
+from db_utils.table_swap import refresh_tables
+
+
+def round_half_away_from_zero(values: pd.Series) -> pd.Series:
+    """
+    Rounds the same way MySQL does when a float is saved to an integer column.
+    Args:
+        values: pd.Series
+    Returns:
+        values: pd.Series
+    """
+    return np.sign(values) * np.floor(np.abs(values) + 0.5)
+
+
+def normalize_for_hash(places_df: pd.DataFrame, table: Table) -> pd.DataFrame:
+    """
+    Converts the columns to the form in which they come back from the database, so the hashes of incoming and
+    stored rows can be compared: numbers as float64 (rounded for integer columns) and everything else as string.
+    Args:
+        places_df: pd.DataFrame
+        table: Table -> definition from build_table()
+    Returns:
+        normalized_df: pd.DataFrame
+    """
+    normalized_df = pd.DataFrame(index=places_df.index)
+    for column in places_df.columns:
+        values = places_df[column]
+        if pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(
+            values.dtype
+        ):
+            values = pd.to_numeric(values, errors="coerce").astype("float64")
+            if isinstance(table.c[column].type, Integer):
+                values = round_half_away_from_zero(values)
+        else:
+            values = values.astype("string")
+        normalized_df[column] = values
+
+    return normalized_df
+
+
+def row_hashes(places_df: pd.DataFrame, table: Table, key: str) -> pd.Series:
+    """
+    Hash of every row without the key, indexed by the key.
+    Args:
+        places_df: pd.DataFrame
+        table: Table
+        key: str
+    Returns:
+        hashes: pd.Series
+    """
+    value_columns = [column for column in table.c.keys() if column != key]
+    normalized_df = normalize_for_hash(places_df[value_columns], table)
+    hashes = pd.util.hash_pandas_object(normalized_df, index=False)
+    hashes.index = places_df[key].astype("string").to_numpy()
+
+    return hashes
+
+
+def diff_rows(
+    incoming_df: pd.DataFrame, stored_df: pd.DataFrame, table: Table, key: str
+) -> tuple:
+    """
+    Compares incoming rows with the stored ones.
+    Args:
+        incoming_df: pd.DataFrame
+        stored_df: pd.DataFrame -> the same columns as incoming_df
+        table: Table
+        key: str
+    Returns:
+        inserted_df: pd.DataFrame -> rows with keys not yet in the table
+        updated_df: pd.DataFrame -> rows with stored keys but different values
+        deleted_keys: list -> stored keys missing from the incoming rows
+    """
+    incoming_hashes = row_hashes(incoming_df, table, key)
+    stored_hashes = row_hashes(stored_df, table, key)
+
+    is_stored = incoming_hashes.index.isin(stored_hashes.index)
+    is_changed = np.zeros(len(incoming_df), dtype=bool)
+    is_changed[is_stored] = (
+        stored_hashes.reindex(incoming_hashes.index[is_stored]).to_numpy()
+        != incoming_hashes.to_numpy()[is_stored]
+    )
+    deleted_keys = stored_hashes.index[
+        ~stored_hashes.index.isin(incoming_hashes.index)
+    ].tolist()
+
+    return incoming_df[~is_stored], incoming_df[is_changed], deleted_keys
+
+
+def upsert_statement(connection, table: Table, key: str):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE of all columns except the key. SQLite (used in tests and benchmarks)
+    gets the equivalent ON CONFLICT DO UPDATE.
+    """
+    if connection.dialect.name == "sqlite":
+        statement = sqlite.insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[key],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if column.name != key
+            },
+        )
+
+    statement = mysql.insert(table)
+    return statement.on_duplicate_key_update(
+        {
+            column.name: statement.inserted[column.name]
+            for column in table.columns
+            if column.name != key
+        }
+    )
+
+
+def write_rows(connection, table: Table, places_df: pd.DataFrame, key: str, chunksize):
+    """
+    Inserts or updates rows in batches of chunksize rows.
+    """
+    statement = upsert_statement(connection, table, key)
+    column_names = list(places_df.columns)
+    for start in range(0, len(places_df), chunksize):
+        rows = dataframe_to_rows(places_df.iloc[start : start + chunksize])
+        connection.execute(statement, [dict(zip(column_names, row)) for row in rows])
+
+
+def delete_rows(connection, table: Table, keys: list, key: str, chunksize: int):
+    """
+    Deletes rows by the key in batches of chunksize keys.
+    """
+    for start in range(0, len(keys), chunksize):
+        connection.execute(
+            table.delete().where(table.c[key].in_(keys[start : start + chunksize]))
+        )
+
+
+def plan_changes(places_df: pd.DataFrame, table_name: str, key: str) -> dict | None:
+    """
+    Reads the stored key and value columns over its own pooled connection and compares them with the dataframe.
+    Args:
+        places_df: pd.DataFrame
+        table_name: str
+        key: str
+    Returns:
+        changes: dict | None -> table, inserted_df, updated_df and deleted_keys, None if the table does not exist
+            or has different columns and has to be replaced
+    """
+    table = build_table(places_df, table_name)
+
+    with connect_to_db().connect() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table(table_name) or {
+            column["name"] for column in inspector.get_columns(table_name)
+        } != set(places_df.columns):
+            return None
+
+        stored_df = pd.read_sql(
+            select(*[table.c[column] for column in places_df.columns]), con=connection
+        )
+    inserted_df, updated_df, deleted_keys = diff_rows(places_df, stored_df, table, key)
+
+    return {
+        "table": table,
+        "inserted_df": inserted_df,
+        "updated_df": updated_df,
+        "deleted_keys": deleted_keys,
+    }
+
+
+def upsert_tables(
+    dataframes: dict,
+    key: str = "unique_name",
+    delete_missing: bool = True,
+    chunksize: int = EXECUTEMANY_CHUNKSIZE,
+) -> dict:
+    """
+    Makes the tables equal to the dataframes writing only the differences. The stored key and value columns are
+    read once to calculate the row hashes, concurrently for all tables, writes are proportional to the number of
+    changed rows. Changes of all tables are written in one transaction, so readers see either the old or the new data in all of them. If any
+    table does not exist or has different columns, all tables are replaced with the shadow table swap instead.
+    Args:
+        dataframes: dict -> table name: pd.DataFrame
+        key: str -> primary key of the tables
+        delete_missing: bool -> if True, stored rows missing from the dataframe are deleted
+        chunksize: int -> rows per INSERT or DELETE batch
+    Returns:
+        changes: dict -> table name: number of inserted, updated and deleted rows
+    """
+    engine = connect_to_db()
+    dataframes = {
+        table_name: places_df.drop_duplicates(subset=key, keep="last")
+        for table_name, places_df in dataframes.items()
+    }
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(dataframes)) as executor:
+        plans = dict(
+            zip(
+                dataframes,
+                executor.map(
+                    plan_changes,
+                    dataframes.values(),
+                    dataframes,
+                    itertools.repeat(key),
+                ),
+            )
+        )
+
+    if any(plan is None for plan in plans.values()):
+        written = refresh_tables(dataframes)
+        failed_tables = [
+            table for table, is_written in written.items() if not is_written
+        ]
+        if failed_tables:
+            raise RuntimeError(f"Tables not written: {', '.join(failed_tables)}.")
+        return {
+            table_name: {"inserted": len(places_df), "updated": 0, "deleted": 0}
+            for table_name, places_df in dataframes.items()
+        }
+
+    # Rows of the tables referred to by foreign keys are written first and deleted last
+    table_order = parents_first(plans)
+    changes = {}
+    with engine.begin() as connection:
+        for table_name in table_order:
+            plan = plans[table_name]
+            write_rows(
+                connection,
+                plan["table"],
+                pd.concat([plan["inserted_df"], plan["updated_df"]]),
+                key,
+                chunksize,
+            )
+        for table_name in reversed(table_order):
+            plan = plans[table_name]
+            deleted_keys = plan["deleted_keys"] if delete_missing else []
+            delete_rows(connection, plan["table"], deleted_keys, key, chunksize)
+            changes[table_name] = {
+                "inserted": len(plan["inserted_df"]),
+                "updated": len(plan["updated_df"]),
+                "deleted": len(deleted_keys),
+            }
+    changes = {table_name: changes[table_name] for table_name in plans}
+
+    for table_name, table_changes in changes.items():
+        print(
+            f"Table {table_name}: inserted {table_changes['inserted']}, updated {table_changes['updated']}, "
+            f"deleted {table_changes['deleted']} rows."
+        )
+    return changes
+
+
+def upsert_dataframe(
+    places_df: pd.DataFrame,
+    table_name: str,
+    key: str = "unique_name",
+    delete_missing: bool = True,
+    chunksize: int = EXECUTEMANY_CHUNKSIZE,
+) -> dict:
+    """
+    upsert_tables() for a single table.
+    Args:
+        places_df: pd.DataFrame
+        table_name: str
+        key: str -> primary key of the table
+        delete_missing: bool -> if True, stored rows missing from the dataframe are deleted
+        chunksize: int -> rows per INSERT or DELETE batch
+    Returns:
+        changes: dict -> number of inserted, updated and deleted rows
+    """
+    return upsert_tables({table_name: places_df}, key, delete_missing, chunksize)[
+        table_name
+    ]
@@ -0,0 +1,127 @@
+"""
+Driver scoring many user profiles offline. Profiles are read from a JSON lines file, one object per line with the
+arguments of create_db_data_from_website_responses() and an optional "id". The engine is loaded once and the
+profiles are evaluated in batches, results are written as JSON lines in the order of the profiles.
+recommend_profiles_file() is the main driver function
+"""
+import itertools
+import json
+import sys
+import time
+
+from db_utils.recommendation_engine import RecommendationEngine
+from config import RECOMMENDATIONS_LIMIT
+
+# Profiles read and evaluated at once, the files are streamed in blocks of this size
+PROFILES_BLOCK_SIZE = 10_000
+
+REQUIRED_FIELDS = ["state", "median_household_income", "area_feel"]
+
+
+def read_profiles(lines) -> list:
+    """
+    Parses the profiles. Invalid lines become error results instead of stopping the batch.
+    Args:
+        lines: iterable -> (line number, JSON line) pairs
+    Returns:
+        profiles: list -> (id, profile dict or None, error or None) tuples
+    """
+    profiles = []
+    for line_number, line in lines:
+        try:
+            profile = json.loads(line)
+            if not isinstance(profile, dict):
+                raise ValueError("profile is not an object")
+            missing_fields = [
+                field for field in REQUIRED_FIELDS if field not in profile
+            ]
+            if missing_fields:
+                raise ValueError(f"missing {', '.join(missing_fields)}")
+            income = profile["median_household_income"]
+            if isinstance(income, bool) or not isinstance(income, (int, float)):
+                raise ValueError("median_household_income is not a number")
+            if not isinstance(profile["state"], str):
+                raise ValueError("state is not a string")
+            area_feel = profile["area_feel"]
+            if not isinstance(area_feel, str) and not (
+                isinstance(area_feel, list)
+                and all(isinstance(area_type, str) for area_type in area_feel)
+            ):
+                raise ValueError("area_feel is not a string or a list of strings")
+            profiles.append((profile.get("id", line_number), profile, None))
+        except (ValueError, TypeError) as error:
+            profiles.append((line_number, None, f"Line {line_number}: {error}"))
+
+    return profiles
+
+
+def recommend_profiles(
+    engine: RecommendationEngine, profiles: list, limit: int = RECOMMENDATIONS_LIMIT
+) -> list:
+    """
+    Args:
+        engine: RecommendationEngine
+        profiles: list -> from read_profiles()
+        limit: int
+    Returns:
+        results: list -> dicts with "id" and "places" or "error", in order of the profiles
+    """
+    valid_profiles = [profile for _, profile, error in profiles if error is None]
+    recommendations = iter(engine.recommend_batch(valid_profiles, limit))
+
+    results = []
+    for profile_id, _, error in profiles:
+        if error is None:
+            results.append({"id": profile_id, "places": next(recommendations)})
+        else:
+            results.append({"id": profile_id, "error": error})
+
+    return results
+
+
+def recommend_profiles_file(
+    input_path: str,
+    output_path: str | None = None,
+    limit: int = RECOMMENDATIONS_LIMIT,
+    engine: RecommendationEngine | None = None,
+) -> int:
+    """
+    Writes recommendations for all profiles of the input file.
+    Args:
+        input_path: str -> JSON lines file with the profiles
+        output_path: str | None -> JSON lines file with the results, standard output if None
+        limit: int
+        engine: RecommendationEngine | None -> loaded from the database if None
+    Returns:
+        number_of_profiles: int
+    """
+    engine = engine or RecommendationEngine.from_database()
+    start = time.perf_counter()
+    number_of_profiles = 0
+
+    with open(input_path, encoding="utf-8") as input_file:
+        output_file = (
+            open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+        )
+        try:
+            lines = (
+                (line_number, line)
+                for line_number, line in enumerate(input_file, start=1)
+                if line.strip()
+            )
+            while block := list(itertools.islice(lines, PROFILES_BLOCK_SIZE)):
+                for result in recommend_profiles(engine, read_profiles(block), limit):
+                    output_file.write(json.dumps(result) + "\n")
+                number_of_profiles += len(block)
+        finally:
+            if output_path:
+                output_file.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Recommended places for {number_of_profiles} profiles in {elapsed:.2f} s "
+        f"({number_of_profiles / max(elapsed, 1e-9):.0f} profiles/s).",
+        file=sys.stderr,
+    )
+
+    return number_of_profiles
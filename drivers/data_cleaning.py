@@ -2,13 +2,76 @@
 Drivers providing a structure to data cleaning processes.
 clean_all_data() is the main driver function
 """
+import concurrent.futures
+import itertools
+from functools import partial
+
+import numpy as np
 import pandas as pd
 import utils.data_cleaning as dc
 import utils.filling_missing_crime_data as fc
-from db_utils import database_operations
+from utils.knn_imputer import knn_impute
+from utils.dtypes import apply_dtype_schema
+from utils.ranks import add_rank_columns
+from utils.storage import save_stage_data, load_stage_data, iter_stage_data
+from utils.stage_cache import run_stage
+from db_utils import database_operations, migrations
+
+from config import AREA_WEALTH_THRESHOLD, RAW_NUMBER_COLUMNS, MERGED_TABLES
+
 
+def run_stages(places_df: pd.DataFrame, stages: list) -> pd.DataFrame:
+    """
+    Runs cleaning functions one after another.
+    Args:
+        places_df: pd.DataFrame
+        stages: list -> functions taking and returning pd.DataFrame
+    Returns:
+        places_df: pd.DataFrame
+    """
+    for stage in stages:
+        places_df = stage(places_df)
 
-def data_preprocessing_from_raw(places_df: pd.DataFrame) -> pd.DataFrame:
+    return places_df
+
+
+def run_partitioned_by_state(
+    places_df: pd.DataFrame, stages: list, max_workers: int | None = None
+) -> pd.DataFrame:
+    """
+    Splits the dataframe by state and runs the stages for every state in a separate process, then concatenates the
+    results in the original row order. Stages must be state-local (use only rows from the same state), keep every
+    row and be picklable, so module level functions or functools.partial of them. Global statistics have to be
+    calculated beforehand and passed to the stages.
+    Args:
+        places_df: pd.DataFrame
+        stages: list
+        max_workers: int | None -> number of processes, number of CPUs if None
+    Returns:
+        places_df: pd.DataFrame
+    """
+    # Grouped as objects, groupby indices leave out missing values of categoricals
+    partition_rows = list(
+        places_df.groupby(
+            places_df["state"].astype("object"), sort=False, dropna=False
+        ).indices.values()
+    )
+    partitions = [places_df.iloc[rows] for rows in partition_rows]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        cleaned_partitions = list(
+            executor.map(run_stages, partitions, itertools.repeat(stages))
+        )
+
+    # Positions, not index labels, so any index keeps its order
+    original_order = np.argsort(np.concatenate(partition_rows), kind="stable")
+    return pd.concat(cleaned_partitions).iloc[original_order]
+
+
+def data_preprocessing_from_raw(
+    places_df: pd.DataFrame,
+    rent_sell_value_ratio: float | None = None,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
     """
     It runs all functions from the data_cleaning.py file. These are doing the following:
         1. Cleaning unwanted values.
@@ -17,77 +80,219 @@ def data_preprocessing_from_raw(places_df: pd.DataFrame) -> pd.DataFrame:
         4. Reassigning to desired tables in standard_of_living schema
     Args:
         places_df: pd.DataFrame
+        rent_sell_value_ratio: float | None -> global ratio when only a chunk of the raw data is passed
+        max_workers: int | None -> if passed, filling missing values runs in parallel per state
     Returns:
         places_df: pd.DataFrame
     """
     # Cleaning unwanted values
-    places_df["school_rating"] = places_df["school_rating"].map(
-        dc.remove_special_character_school_rating
-    )
-    places_df["school_rating"] = places_df["school_rating"].str.strip()
-    places_df["nightlife_rating"] = places_df["nightlife_rating"].map(
-        dc.remove_special_character_nightlife_rating
-    )
-    places_df["nightlife_rating"] = places_df["nightlife_rating"].str.strip()
-    places_df["families_rating"] = places_df["families_rating"].map(
-        dc.remove_special_character_families_rating
-    )
-    places_df["families_rating"] = places_df["families_rating"].str.strip()
-    places_df = dc.replace_incorrect_type_of_place(places_df)
+    places_df = dc.clean_rating_columns(places_df)
+    parsed_links = dc.parse_niche_links(places_df["link"])
+    places_df = dc.replace_incorrect_type_of_place(places_df, parsed_links)
     # Transforming to desired datatypes
-    places_df["population"] = places_df["population"].map(dc.number_to_int)
-    places_df["median_home_value"] = places_df["median_home_value"].map(
-        dc.number_to_int
-    )
-    places_df["median_rent"] = places_df["median_rent"].map(dc.number_to_int)
-    places_df["median_household_income"] = places_df["median_household_income"].map(
-        dc.number_to_int
+    for column in RAW_NUMBER_COLUMNS:
+        places_df[column] = dc.parse_number_column(places_df[column])
+    # Creating additional columns
+    places_df["state"] = parsed_links["state"]
+    places_df["name_with_state"] = parsed_links["name_with_state"]
+    places_df = dc.filter_rows(
+        places_df, [("state not recognised from the link", dc.has_state)]
     )
+    # Filling missing values, neighbours in the same state first, then the average rent to sell ratio
     places_df = dc.create_rent_to_sell_value_ratio(places_df)
-    places_df = dc.fill_missing_rent_and_home_values(places_df)
+    if rent_sell_value_ratio is None:
+        rent_sell_value_ratio = places_df.rent_sell_value_ratio.mean()
+    filling_stages = [
+        partial(
+            knn_impute,
+            columns=["median_home_value", "median_rent"],
+            income_threshold=AREA_WEALTH_THRESHOLD,
+        ),
+        partial(
+            dc.fill_missing_rent_and_home_values,
+            rent_sell_value_ratio=rent_sell_value_ratio,
+        ),
+    ]
+    if max_workers:
+        places_df = run_partitioned_by_state(places_df, filling_stages, max_workers)
+    else:
+        places_df = run_stages(places_df, filling_stages)
     places_df.drop("rent_sell_value_ratio", axis=1, inplace=True)
-    # Creating additional columns
-    places_df["state"] = places_df["link"].map(dc.create_state_from_link)
-    places_df["state"] = places_df["state"].map(dc.change_state_abbreviation_to_name)
-    places_df.drop(places_df[places_df["state"] == ""].index, inplace=True)
-    places_df["name_with_state"] = places_df["link"].map(dc.add_name_with_state)
+    places_df = apply_dtype_schema(places_df)
 
     return places_df
 
 
-def fill_remaining_crime_data():
+def fill_remaining_crime_data() -> pd.DataFrame:
     """
     Reads table from the database and assigns to the DataFrame.
     Fills missing values for crime after attempt by Areavibes was taken to fill missing values after previously
     scraping Niche.com
-    Saves back to the Database
+    Writing back to the database is left to the caller, so the step can be cached. The columns of the stored table
+    are kept, the crime ratios are only used for filling, so the upsert writes only the changed rows.
+    Returns:
+        crimes: pd.DataFrame
     """
     crimes = database_operations.load_database_to_dataframe("crimes")
+    stored_columns = list(crimes.columns)
     # In case any values are "no data" (they shouldn't be)
     try:
         crimes = fc.convert_crime_values_to_numeric(crimes)
     except (ValueError, AttributeError):
         pass
 
-    crimes = crimes.apply(fc.add_violent_crimes_ratio)
-    crimes = crimes.apply(fc.add_non_violent_crimes_ratio)
-    crimes = crimes.apply(fc.fill_nan_values_violent_crimes)
-    crimes = crimes.apply(fc.fill_nan_values_non_violent_crimes)
+    crimes = fc.fill_crime_values(crimes)
 
-    database_operations.save_dataframe_to_database(crimes, "crimes")
+    return crimes[stored_columns]
 
 
-def clean_all_data():
+def fill_missing_school_ratings(
+    places_df: pd.DataFrame, max_workers: int | None = None
+) -> pd.DataFrame:
     """
-    Driver to clean all data and reassign to appropriate tables.
+    Runs fill_missing_school_ratings(), in parallel per state if max_workers is passed.
+    Args:
+        places_df: pd.DataFrame
+        max_workers: int | None
+    Returns:
+        places_df: pd.DataFrame
     """
-    places_df = pd.read_csv("data_preprocessing_from_raw.csv")
-    places_df = data_preprocessing_from_raw(places_df)
-    database_operations.save_dataframe_to_database(places_df, "places_raw")
-    fill_remaining_crime_data()
-    places_df = database_operations.load_data_and_merge()
-    places_df = dc.fill_missing_school_ratings(places_df)
-    places_df = dc.drop_places_with_missing_weather_data(places_df)
-    places_df = places_df.dropna().reset_index()
+    if max_workers:
+        return run_partitioned_by_state(
+            places_df, [dc.fill_missing_school_ratings], max_workers
+        )
+    return dc.fill_missing_school_ratings(places_df)
+
+
+def drop_incomplete_places(places_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drops places with missing weather data or any other missing value and adds the grade and safety ranks used by
+    the recommendation query.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        places_df: pd.DataFrame
+    """
+    places_df = dc.filter_rows(
+        places_df,
+        [
+            ("missing weather data", dc.has_weather_data),
+            ("missing values", dc.has_no_missing_values),
+        ],
+    ).reset_index()
+    places_df = add_rank_columns(places_df)
+
+    return apply_dtype_schema(places_df)
+
+
+def calculate_rent_sell_value_ratio(stage_name: str, chunksize: int) -> float:
+    """
+    First, cheap pass over the raw data for the chunked cleaning. Reads only median_rent and median_home_value
+    columns and returns the mean rent to sell value ratio for the whole stage file.
+    Args:
+        stage_name: str
+        chunksize: int
+    Returns:
+        rent_sell_value_ratio: float
+    """
+    ratio_sum = 0.0
+    ratio_counter = 0
+    for chunk in iter_stage_data(
+        stage_name, chunksize, columns=["median_rent", "median_home_value"]
+    ):
+        ratio = dc.parse_number_column(chunk["median_rent"]) / dc.parse_number_column(
+            chunk["median_home_value"]
+        )
+        ratio_sum += ratio.sum()
+        ratio_counter += ratio.count()
+
+    return ratio_sum / ratio_counter if ratio_counter else np.nan
+
+
+def data_preprocessing_from_raw_in_chunks(
+    stage_name: str, chunksize: int, max_workers: int | None = None
+):
+    """
+    Streaming version of reading the raw data, running data_preprocessing_from_raw() and saving to places_raw table.
+    Memory used is bounded by the chunksize, not by the size of the file. The only global statistic - rent to sell
+    value ratio - is calculated in the first pass. Neighbours for the knn_impute() are searched within the chunk.
+    Args:
+        stage_name: str
+        chunksize: int
+        max_workers: int | None -> if passed, every chunk is filled in parallel per state
+    """
+    rent_sell_value_ratio = calculate_rent_sell_value_ratio(stage_name, chunksize)
+
+    if_exists = "replace"
+    for chunk_number, places_df in enumerate(iter_stage_data(stage_name, chunksize)):
+        places_df = data_preprocessing_from_raw(
+            places_df, rent_sell_value_ratio, max_workers
+        )
+        database_operations.save_dataframe_to_database(
+            places_df, "places_raw", if_exists=if_exists
+        )
+        if_exists = "append"
+        print(f"Cleaned and saved chunk number {chunk_number}.")
+
+
+def clean_all_data(
+    chunksize: int | None = None,
+    export_csv: bool = False,
+    use_cache: bool = True,
+    max_workers: int | None = None,
+):
+    """
+    Driver to clean all data and reassign to appropriate tables. Cleaned data is saved to places_cleaned stage
+    file as well.
+    Each step runs as a cached stage (run_stage) keyed by its inputs and code version. Steps reading from the
+    database are keyed by the checksums of the tables they read, so unchanged steps are loaded from the cache
+    without the database round trips. Cached stages don't write to the database, their results are written
+    after every run, so a new or rebuilt database is filled from the cache as well.
+    Args:
+        chunksize: int | None -> if passed, raw data is cleaned in chunks of this number of rows
+        export_csv: bool -> saves CSV copy of the cleaned data as well
+        use_cache: bool -> if False, all stages are run again
+        max_workers: int | None -> if passed, state-local stages run in this number of processes
+    """
+    if chunksize:
+        data_preprocessing_from_raw_in_chunks(
+            "data_preprocessing_from_raw", chunksize, max_workers
+        )
+    else:
+        places_df = run_stage(
+            "preprocessing",
+            data_preprocessing_from_raw,
+            load_stage_data("data_preprocessing_from_raw"),
+            None,
+            max_workers,
+            use_cache=use_cache,
+        )
+        database_operations.save_dataframe_to_database(places_df, "places_raw")
+    crimes = run_stage(
+        "crimes",
+        fill_remaining_crime_data,
+        fingerprint=database_operations.table_checksums(["crimes"]),
+        use_cache=use_cache,
+    )
+    # Only the changed rows are written
+    database_operations.upsert_dataframe_to_database(crimes, "crimes")
+    places_df = run_stage(
+        "merge",
+        database_operations.load_data_and_merge,
+        fingerprint=database_operations.table_checksums(MERGED_TABLES),
+        use_cache=use_cache,
+    )
+    places_df = run_stage(
+        "school_ratings",
+        fill_missing_school_ratings,
+        places_df,
+        max_workers,
+        use_cache=use_cache,
+    )
+    places_df = run_stage(
+        "drop_incomplete_places", drop_incomplete_places, places_df, use_cache=use_cache
+    )
+    save_stage_data(places_df, "places_cleaned", export_csv=export_csv)
     database_operations.save_dataframe_to_database(places_df, "places_raw")
+    migrations.migrate()
     database_operations.reassign_values_to_separate_db_tables()
@@ -5,6 +5,7 @@ get_all_data() is the main driver function
 import time
 import pandas as pd
 from utils import googlemaps
+from utils.storage import save_stage_data, load_stage_data
 
 from utils.scraping_niche import (
     scrape_get_soup_for_places_and_links,
@@ -28,7 +29,7 @@ from utils import weather
 
 def scrape_all_places_and_links_niche(page_start: int, page_finish: int):
     """
-    Triggers scraping places and links and saves to the .csv
+    Triggers scraping places and links and saves to the niche_places_and_links stage file
     Args:
         page_start: int
         page_finish: int
@@ -45,7 +46,7 @@ def scrape_all_places_and_links_niche(page_start: int, page_finish: int):
             places_and_links_list.append({"name": name, "link": link})
 
         df = pd.DataFrame(places_and_links_list)
-        df.to_csv("niche_places_and_links.csv", index=False)
+        save_stage_data(df, "niche_places_and_links")
         print(f"file saved for page number {page_number}.")
 
     print("Scraping Done.")
@@ -54,10 +55,10 @@ def scrape_all_places_and_links_niche(page_start: int, page_finish: int):
 def scrape_all_info_from_place_niche():
     """
     Function calls all scrape functions for Niche.com and merges all dictionaries into one.
-    All dictionaries are appended to the DataFrame which is periodically saved into the csv file.
+    All dictionaries are appended to the DataFrame which is periodically saved into the stage file.
     """
     scraped_data_dataframe = pd.DataFrame()
-    places_to_scrape = pd.read_csv("niche_places_and_links.csv")
+    places_to_scrape = load_stage_data("niche_places_and_links")
 
     for index, row in places_to_scrape.iterrows():
         link = row["link"]
@@ -110,12 +111,10 @@ def scrape_all_info_from_place_niche():
             print(f"Scraped place number {index}.")
 
             if (index + 1) % 10 == 0:
-                scraped_data_dataframe.to_csv(
-                    "niche_all_scraped_data_raw.csv", index=False
-                )
+                save_stage_data(scraped_data_dataframe, "niche_all_scraped_data_raw")
                 print(f"Saved {index + 1} rows of scraped data.")
 
-    scraped_data_dataframe.to_csv("niche_all_scraped_data_raw.csv", index=False)
+    save_stage_data(scraped_data_dataframe, "niche_all_scraped_data_raw")
     print(
         f"All data has been scraped and saved into the folder. Total rows: {len(scraped_data_dataframe)}"
     )
@@ -153,15 +152,17 @@ def google_data_getter(places_df: pd.DataFrame) -> pd.DataFrame:
     return places_df
 
 
-def get_all_data():
+def get_all_data(export_csv: bool = False):
     """
-    Driver to enable to get all data by one click and save to csv.
+    Driver to enable to get all data by one click and save to the stage file.
+    Args:
+        export_csv: bool -> saves CSV copy of the scraped data as well
     """
     scrape_all_places_and_links_niche(1, 2000)
     scrape_all_info_from_place_niche()
-    places_df = pd.read_csv("niche_all_scraped_data_raw.csv")
+    places_df = load_stage_data("niche_all_scraped_data_raw")
     places_df = scrape_areavibes_and_fill_missing_data(places_df)
     places_df = google_data_getter(places_df)
     places_df = weather.create_temperature_df(places_df)
     places_df = weather.fill_missing_weather_values(places_df)
-    places_df.to_csv("niche_all_scraped_data_raw.csv", index=False)
+    save_stage_data(places_df, "niche_all_scraped_data_raw", export_csv=export_csv)
@@ -0,0 +1,276 @@
+"""
+Local HTTP service answering recommendations and place profiles from memory. The recommendation engine and the
+profiles of all places are loaded at startup and loaded again in the background when the dataset generation
+changes, requests keep being served from the previous index until the new one is ready.
+Endpoints (GET, JSON responses):
+    /recommendations?state=Colorado&median_household_income=120000&area_feel=Urban,Suburban&families=true
+    /places?unique_name=...&unique_name=...
+    /metrics
+run_service() is the main driver function
+"""
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from db_utils.dataset_generation import get_dataset_generation
+from db_utils.place_profiles import load_all_place_profiles
+from db_utils.recommendation_engine import RecommendationEngine
+from config import (
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_LATENCY_WINDOW,
+    GENERATION_CHECK_SECONDS,
+)
+
+BOOLEAN_OPTIONS = [
+    "is_woman",
+    "nightlife",
+    "families",
+    "schools",
+    "restaurants",
+    "bars",
+    "cafes",
+]
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+class RecommendationIndex:
+    def __init__(self, generation: int, engine: RecommendationEngine, profiles: dict):
+        """
+        Args:
+            generation: int -> dataset generation the data was loaded for
+            engine: RecommendationEngine
+            profiles: dict -> unique name: PlaceProfile
+        """
+        self.generation = generation
+        self.engine = engine
+        self.profiles = profiles
+
+    @classmethod
+    def from_database(cls):
+        """
+        Reads the generation before the data, so a refresh during loading is picked up by the next check.
+        """
+        generation = get_dataset_generation()
+
+        return cls(
+            generation, RecommendationEngine.from_database(), load_all_place_profiles()
+        )
+
+    def return_places(self, parameters: dict) -> list:
+        """
+        Same places as database_operations.return_places().
+        Args:
+            parameters: dict -> arguments of return_places()
+        Returns:
+            profiles: list -> PlaceProfile objects, best place first
+        """
+        list_of_places = self.engine.recommend(**parameters)
+
+        return [self.profiles[name] for name in list_of_places if name in self.profiles]
+
+
+class LatencyRecorder:
+    def __init__(self, window: int = SERVICE_LATENCY_WINDOW):
+        """
+        Keeps the latencies of the last window requests per endpoint.
+        """
+        self.window = window
+        self.latencies = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self.lock:
+            if endpoint not in self.latencies:
+                self.latencies[endpoint] = deque(maxlen=self.window)
+                self.counts[endpoint] = 0
+            self.latencies[endpoint].append(seconds)
+            self.counts[endpoint] += 1
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            metrics: dict -> endpoint: requests, p50_ms and p99_ms
+        """
+        with self.lock:
+            latencies = {
+                endpoint: np.array(values)
+                for endpoint, values in self.latencies.items()
+            }
+            counts = dict(self.counts)
+
+        return {
+            endpoint: {
+                "requests": counts[endpoint],
+                "p50_ms": float(np.percentile(values, 50)) * 1000,
+                "p99_ms": float(np.percentile(values, 99)) * 1000,
+            }
+            for endpoint, values in latencies.items()
+        }
+
+
+class RecommendationService:
+    def __init__(self, index: RecommendationIndex):
+        self.index = index
+        self.latency = LatencyRecorder()
+        self.reloads = 0
+        self.stopped = threading.Event()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Loads a new index if the dataset generation changed. The index is replaced in one assignment, requests
+        in progress finish with the index they started with.
+        Returns:
+            reloaded: bool
+        """
+        if get_dataset_generation() == self.index.generation:
+            return False
+
+        self.index = RecommendationIndex.from_database()
+        self.reloads += 1
+        print(f"Reloaded places for dataset generation {self.index.generation}.")
+        return True
+
+    def watch_dataset_generation(self):
+        """
+        Checks the generation every GENERATION_CHECK_SECONDS until the service is stopped. Any error of a check
+        is printed and the previous data is served until the next check succeeds.
+        """
+        while not self.stopped.wait(GENERATION_CHECK_SECONDS):
+            try:
+                self.reload_if_changed()
+            except Exception as error:
+                print(f"Reloading places failed, serving the previous data: {error!r}")
+
+    def recommendations(self, query: dict) -> list:
+        """
+        Args:
+            query: dict -> parsed query string
+        Returns:
+            profiles: list -> dicts of the recommended places
+        """
+        missing = [
+            name
+            for name in ["state", "median_household_income", "area_feel"]
+            if name not in query
+        ]
+        if missing:
+            raise ValueError(f"Missing parameters: {', '.join(missing)}.")
+        try:
+            median_household_income = int(query["median_household_income"][0])
+        except ValueError:
+            raise ValueError("median_household_income must be an integer.") from None
+
+        parameters = {
+            "state": query["state"][0],
+            "median_household_income": median_household_income,
+            "area_feel": ",".join(query["area_feel"]),
+            **{
+                option: query.get(option, [""])[0].lower() in TRUE_VALUES
+                for option in BOOLEAN_OPTIONS
+            },
+        }
+
+        return [asdict(profile) for profile in self.index.return_places(parameters)]
+
+    def places(self, query: dict) -> list:
+        """
+        Args:
+            query: dict -> parsed query string with unique_name values
+        Returns:
+            profiles: list -> dicts of the places found, in the requested order
+        """
+        profiles = self.index.profiles
+        return [
+            asdict(profiles[name])
+            for name in query.get("unique_name", [])
+            if name in profiles
+        ]
+
+    def metrics(self, query: dict) -> dict:
+        return {
+            "generation": self.index.generation,
+            "places": len(self.index.engine),
+            "reloads": self.reloads,
+            "latency": self.latency.metrics(),
+        }
+
+    def create_handler(self):
+        """
+        Request handler class bound to this service.
+        """
+        endpoints = {
+            "/recommendations": self.recommendations,
+            "/places": self.places,
+            "/metrics": self.metrics,
+        }
+        latency = self.latency
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                start = time.perf_counter()
+                url = urlsplit(self.path)
+                endpoint = endpoints.get(url.path)
+                if endpoint is None:
+                    self.send_json(404, {"error": f"Unknown endpoint {url.path}."})
+                    return
+                try:
+                    body = endpoint(parse_qs(url.query))
+                    status = 200
+                except ValueError as error:
+                    body = {"error": str(error)}
+                    status = 400
+                except Exception as error:
+                    print(f"Request {self.path} failed: {error!r}")
+                    body = {"error": "Internal server error."}
+                    status = 500
+                self.send_json(status, body)
+                latency.record(url.path, time.perf_counter() - start)
+
+            def send_json(self, status: int, body):
+                content = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                # Latencies are reported by /metrics instead of a line per request
+                pass
+
+        return Handler
+
+
+def run_service(host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+    """
+    Loads the places and serves requests until interrupted.
+    Args:
+        host: str
+        port: int
+    """
+    start = time.perf_counter()
+    service = RecommendationService(RecommendationIndex.from_database())
+    print(
+        f"Loaded {len(service.index.engine)} places in {time.perf_counter() - start:.2f} s."
+    )
+
+    watcher = threading.Thread(target=service.watch_dataset_generation, daemon=True)
+    watcher.start()
+    server = ThreadingHTTPServer((host, port), service.create_handler())
+    print(f"Serving recommendations on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stopped.set()
+        server.server_close()
@@ -11,17 +11,62 @@ import click
 from drivers.data_collection import get_all_data
 from drivers.data_cleaning import clean_all_data
 from db_utils.database_operations import return_places
+from db_utils.migrations import migrate
+from drivers.batch_recommendations import recommend_profiles_file
+from drivers.recommendation_service import run_service
 
 
 @click.command()
 @click.option("--get", is_flag=True, help="Get all data")
 @click.option("--clean", is_flag=True, help="Clean all data")
 @click.option("--enter-details", is_flag=True, help="Enter your details")
-def main(get, clean, enter_details):
-    if get:
-        get_all_data()
+@click.option("--migrate", "run_migrations", is_flag=True, help="Migrate the schema")
+@click.option(
+    "--batch",
+    "profiles_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Recommend places for the profiles in a JSON lines file",
+)
+@click.option(
+    "--output", "output_path", default=None, help="JSON lines file for --batch results"
+)
+@click.option(
+    "--serve", is_flag=True, help="Serve recommendations over HTTP from memory"
+)
+@click.option(
+    "--chunksize", type=int, default=None, help="Clean raw data in chunks of rows"
+)
+@click.option("--export-csv", is_flag=True, help="Save CSV copies of the data")
+@click.option("--no-cache", is_flag=True, help="Run all cleaning stages again")
+@click.option(
+    "--workers", type=int, default=None, help="Clean data per state in processes"
+)
+def main(
+    get,
+    clean,
+    enter_details,
+    run_migrations,
+    profiles_path,
+    output_path,
+    serve,
+    chunksize,
+    export_csv,
+    no_cache,
+    workers,
+):
+    if run_migrations:
+        migrate()
+    elif profiles_path:
+        recommend_profiles_file(profiles_path, output_path)
+    elif serve:
+        run_service()
+    elif get:
+        get_all_data(export_csv)
     elif clean:
-        clean_all_data()
+        clean_all_data(
+            chunksize, export_csv, use_cache=not no_cache, max_workers=workers
+        )
     elif enter_details:
         state = click.prompt("Enter your state", type=str)
         median_household_income = click.prompt(
@@ -55,9 +100,12 @@ def main(get, clean, enter_details):
         # Print or further process the returned places
         print("Recommended Places:")
         for place in places:
-            print(place)
+            print(f"{place.name}, {place.state} ({place.type_of_place})")
     else:
-        click.echo("Please select an option: --get, --clean, or --enter-details")
+        click.echo(
+            "Please select an option: --get, --clean, --enter-details, --batch, --serve "
+            "or --migrate"
+        )
 
 
 if __name__ == "__main__":
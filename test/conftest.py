@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from db_utils import (
+    bulk_load,
+    database_operations,
+    dataset_generation,
+    table_swap,
+    upsert,
+)
+
+
+@pytest.fixture
+def places_df() -> pd.DataFrame:
+    """
+    Joined place tables with the columns used by the recommendation engine.
+    """
+    return pd.DataFrame(
+        {
+            "unique_name": ["a", "b", "c", "d", "e", "f"],
+            "state": ["Iowa", "Iowa", "Iowa", "Iowa", "Ohio", None],
+            "median_household_income": [50000, 60000, 70000, None, 50000, 50000],
+            "area_feel": ["Urban", "Suburban", "Urban", "Urban", "Urban", "Urban"],
+            "restaurants": [30, 10, 25, 40, 30, 30],
+            "cafes": [5, 20, 15, 15, 5, 5],
+            "bars": [12, 12, 2, 12, 12, 12],
+            "families_rating_rank": [2, 1, 2, 1, 1, 1],
+            "school_rating_rank": [1, 3, 1, 1, 1, 1],
+            "nightlife_rating_rank": [6, 6, 1, 1, 1, 1],
+            "safety_rank": [3, 2, None, 1, 1, 1],
+            "safety_rank_women": [1, 2, 3, 4, 1, 1],
+        }
+    )
+
+
+@pytest.fixture
+def sqlite_engine(monkeypatch):
+    """
+    In-memory SQLite database returned by connect_to_db() of the db_utils modules writing and reading the tables.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for module in (
+        bulk_load,
+        database_operations,
+        dataset_generation,
+        table_swap,
+        upsert,
+    ):
+        monkeypatch.setattr(module, "connect_to_db", lambda: engine)
+
+    return engine
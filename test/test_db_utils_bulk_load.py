@@ -0,0 +1,60 @@
+import pandas as pd
+from sqlalchemy import String, Text
+
+from db_utils.bulk_load import build_table, parents_first, insert_with_load_data
+from config import ACTIVITIES_COLUMNS
+
+
+def test_build_table_from_dataclass():
+    table = build_table(
+        pd.DataFrame(columns=ACTIVITIES_COLUMNS),
+        "activities__shadow",
+        model_name="activities",
+        referred_tables={"places": "places__shadow"},
+    )
+
+    assert table.c["unique_name"].primary_key
+    assert table.c["unique_name"].type.length == 255
+    assert [
+        foreign_key.target_fullname
+        for foreign_key in table.c["unique_name"].foreign_keys
+    ] == ["places__shadow.unique_name"]
+    assert [index.name for index in table.indexes] == [
+        "ix_activities_restaurants_cafes_bars"
+    ]
+
+
+def test_build_table_without_dataclass():
+    places_df = pd.DataFrame({"unique_name": ["a"], "state": ["Iowa"], "note": ["b"]})
+    table = build_table(places_df, "places_raw")
+
+    assert not table.c["unique_name"].primary_key
+    assert not table.c["unique_name"].foreign_keys
+    assert isinstance(table.c["state"].type, String)
+    assert isinstance(table.c["note"].type, Text)
+
+
+def test_parents_first():
+    assert parents_first(["crimes", "places", "wealth"]) == [
+        "places",
+        "crimes",
+        "wealth",
+    ]
+
+
+def test_insert_with_load_data_writes_null_marker():
+    class Connection:
+        def exec_driver_sql(self, query):
+            self.query = query
+            file_path = query.split("'")[1]
+            with open(file_path, encoding="utf-8") as f:
+                self.content = f.read()
+
+    places_df = pd.DataFrame(
+        {"unique_name": ["miasto", "NULL", "C:\\city"], "population": [1.5, None, 2.0]}
+    )
+    connection = Connection()
+    insert_with_load_data(connection, build_table(places_df, "places_raw"), places_df)
+
+    assert connection.content == "miasto,1.5\nNULL,\\N\nC:\\\\city,2.0\n"
+    assert "ESCAPED BY '\\\\'" in connection.query
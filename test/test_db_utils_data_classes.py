@@ -0,0 +1,18 @@
+from db_utils.data_classes import Places, AreaFeel
+from config import US_STATES
+
+# Longest values seen in the scraped data
+LONGEST_VALUES = {
+    Places.__table__.c.type_of_place: [
+        "Neighborhood in Colorado Springs, CO",
+        "Neighborhood in San Buenaventura (Ventura), CA",
+        "Suburb of Louisville/Jefferson County, KY",
+    ],
+    Places.__table__.c.state: list(US_STATES.values()),
+    AreaFeel.__table__.c.area_feel: ["Dense Suburban", "Sparse Suburban"],
+}
+
+
+def test_longest_values_fit_column_lengths():
+    for column, values in LONGEST_VALUES.items():
+        assert max(len(value) for value in values) <= column.type.length, column.name
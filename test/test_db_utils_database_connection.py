@@ -0,0 +1,31 @@
+import threading
+import time
+
+from db_utils import database_connection
+from db_utils.database_connection import connect_to_db
+
+
+def test_threads_share_one_engine(monkeypatch):
+    created = []
+
+    def create_engine(*args, **kwargs):
+        # Slow enough for all threads to pass the first check before the engine exists
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(database_connection, "create_engine", create_engine)
+    monkeypatch.setattr(database_connection, "_engine", None)
+    monkeypatch.setattr(database_connection, "_session_factory", None)
+    engines = []
+    threads = [
+        threading.Thread(target=lambda: engines.append(connect_to_db()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(engine is created[0] for engine in engines)
@@ -0,0 +1,124 @@
+import pandas as pd
+from sqlalchemy import String, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from db_utils import database_operations, upsert
+from db_utils.bulk_load import MODEL_COLUMNS
+from db_utils.database_operations import (
+    load_database_to_dataframe,
+    load_merged_dataset,
+    reassign_values_to_separate_db_tables,
+    save_dataframe_to_database,
+)
+from db_utils.dataset_generation import get_dataset_generation
+from config import (
+    CRIMES_COLUMNS,
+    SAFETY_RANK_ORDER,
+    ACTIVITIES_COLUMNS,
+    AREA_FEEL_COLUMNS,
+    WEALTH_COLUMNS,
+    FAMILIES_COLUMNS,
+    WEATHER_COLUMNS,
+    PLACES_COLUMNS,
+)
+
+PLACE_TABLE_COLUMNS = {
+    "crimes": CRIMES_COLUMNS + list(SAFETY_RANK_ORDER),
+    "activities": ACTIVITIES_COLUMNS,
+    "area_feel": AREA_FEEL_COLUMNS,
+    "wealth": WEALTH_COLUMNS,
+    "families": FAMILIES_COLUMNS,
+    "weather": WEATHER_COLUMNS,
+    "places": PLACES_COLUMNS,
+}
+
+
+def test_load_merged_dataset_with_duplicated_names_and_columns(monkeypatch, capsys):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    monkeypatch.setattr(database_operations, "connect_to_db", lambda: engine)
+    pd.DataFrame(
+        {
+            "unique_name": ["miasto", "city", "miasto"],
+            "state": ["Iowa", "Texas", "Ohio"],
+        }
+    ).to_sql("places", engine, index=False)
+    pd.DataFrame(
+        {
+            "unique_name": ["city", "town"],
+            "state": ["Utah", "Utah"],
+            "median_rent": [1000.0, 800.0],
+        }
+    ).to_sql("wealth", engine, index=False)
+
+    places_df = load_merged_dataset(table_names=["places", "wealth"])
+
+    assert list(places_df.columns) == ["unique_name", "state", "median_rent"]
+    assert places_df["unique_name"].tolist() == ["city", "miasto", "town"]
+    assert places_df["state"].tolist()[:2] == ["Texas", "Ohio"]
+    assert places_df["state"].isna().tolist() == [False, False, True]
+    assert places_df["median_rent"].tolist()[::2] == [1000.0, 800.0]
+    assert capsys.readouterr().out == (
+        "Table places: dropped 1 rows with duplicated unique_name.\n"
+    )
+
+
+def create_places_raw(median_rent: float) -> pd.DataFrame:
+    places_raw = pd.DataFrame({"unique_name": ["miasto", "city"]})
+    for column in {
+        *CRIMES_COLUMNS,
+        *SAFETY_RANK_ORDER,
+        *ACTIVITIES_COLUMNS,
+        *AREA_FEEL_COLUMNS,
+        *WEALTH_COLUMNS,
+        *FAMILIES_COLUMNS,
+        *WEATHER_COLUMNS,
+        *PLACES_COLUMNS,
+    } - {"unique_name"}:
+        model_column = MODEL_COLUMNS[column]
+        places_raw[column] = "A" if isinstance(model_column.type, String) else 1
+    places_raw["median_rent"] = median_rent
+    return places_raw
+
+
+def save_place_tables(places_raw: pd.DataFrame):
+    save_dataframe_to_database(places_raw, "places_raw")
+    for table_name, columns in PLACE_TABLE_COLUMNS.items():
+        save_dataframe_to_database(places_raw[columns], table_name)
+
+
+def test_reassign_values_writes_changed_tables(sqlite_engine):
+    save_place_tables(create_places_raw(1000.0))
+    save_dataframe_to_database(create_places_raw(1200.0), "places_raw")
+
+    written = reassign_values_to_separate_db_tables()
+
+    assert written == {table_name: True for table_name in PLACE_TABLE_COLUMNS}
+    assert load_database_to_dataframe("wealth")["median_rent"].tolist() == [1200, 1200]
+    assert get_dataset_generation() == 1
+
+
+def test_reassign_values_leaves_tables_unchanged_on_failure(sqlite_engine, monkeypatch):
+    save_place_tables(create_places_raw(1000.0))
+    places_raw = create_places_raw(1200.0)
+    places_raw["name"] = "Renamed"
+    save_dataframe_to_database(places_raw, "places_raw")
+    write_rows = upsert.write_rows
+
+    def fail_for_wealth(connection, table, places_df, key, chunksize):
+        if table.name == "wealth":
+            raise OperationalError("INSERT INTO wealth", {}, Exception("disk full"))
+        write_rows(connection, table, places_df, key, chunksize)
+
+    monkeypatch.setattr(upsert, "write_rows", fail_for_wealth)
+    # places is written before wealth fails
+    written = reassign_values_to_separate_db_tables()
+
+    assert written == {table_name: False for table_name in PLACE_TABLE_COLUMNS}
+    assert load_database_to_dataframe("wealth")["median_rent"].tolist() == [1000, 1000]
+    assert load_database_to_dataframe("places")["name"].tolist() == ["A", "A"]
+    assert get_dataset_generation() == 0
@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from db_utils import dataset_generation
+from db_utils.dataset_generation import bump_dataset_generation, get_dataset_generation
+
+
+def test_reading_generation_does_not_create_table(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    monkeypatch.setattr(dataset_generation, "connect_to_db", lambda: engine)
+
+    assert get_dataset_generation() == 0
+    assert not inspect(engine).has_table("dataset_generation")
+
+    bump_dataset_generation()
+    bump_dataset_generation()
+
+    assert get_dataset_generation() == 2
@@ -0,0 +1,19 @@
+from dataclasses import fields
+
+from sqlalchemy.dialects import mysql
+
+from db_utils.place_profiles import PROFILES_QUERY, PlaceProfile
+
+
+def test_profiles_query_selects_all_profile_fields():
+    assert [column.name for column in PROFILES_QUERY.selected_columns] == [
+        field.name for field in fields(PlaceProfile)
+    ]
+
+
+def test_profiles_query_is_one_joined_query():
+    sql = str(PROFILES_QUERY.compile(dialect=mysql.dialect()))
+
+    assert sql.count("SELECT") == 1
+    assert sql.count("LEFT OUTER JOIN") == 6
+    assert "places.unique_name IN" in sql
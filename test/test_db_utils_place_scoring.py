@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from config import US_AVERAGE_CRIMES, COMFORT_TEMPERATURE
+from db_utils.place_scoring import (
+    PlaceScorer,
+    FEATURES,
+    CRIME_COLUMNS,
+    TEMPERATURE_COLUMNS,
+    create_feature_matrix,
+)
+
+
+def create_places_df() -> pd.DataFrame:
+    places_df = pd.DataFrame(
+        {
+            "unique_name": ["a", "b", "c"],
+            "state": ["Iowa", "Iowa", "Ohio"],
+            "median_household_income": [50000, 100000, 200000],
+            "families_rating_rank": [1, 6, 3],
+            "school_rating_rank": [6, 1, 3],
+            "nightlife_rating_rank": [6, 6, 1],
+            "restaurants": [20, 0, None],
+            "bars": [10, 0, 30],
+            "cafes": [10, 0, 30],
+        }
+    )
+    for column in CRIME_COLUMNS:
+        places_df[column] = [
+            US_AVERAGE_CRIMES[f"US_AVERAGE_{column.upper()}"],
+            0,
+            None,
+        ]
+    for column in TEMPERATURE_COLUMNS:
+        places_df[column] = [COMFORT_TEMPERATURE, COMFORT_TEMPERATURE - 10, -100]
+
+    return places_df
+
+
+def test_create_feature_matrix():
+    features_df = pd.DataFrame(
+        create_feature_matrix(create_places_df()), columns=FEATURES
+    )
+
+    assert features_df["safety"].tolist() == pytest.approx([0.5, 1, 0.75])
+    assert features_df["families"].tolist() == pytest.approx([1, 0, 0.6])
+    assert features_df["restaurants"].tolist() == pytest.approx([0.5, 0, 0.25])
+    assert features_df["climate"].tolist() == pytest.approx([1, 0.5, 0])
+
+
+def test_score_returns_best_places_with_scores():
+    scorer = PlaceScorer(create_places_df())
+
+    assert scorer.score({"safety": 1}) == [("b", 1), ("c", 0.75), ("a", 0.5)]
+    places = scorer.score({"families": 1, "schools": 1}, limit=2)
+
+    assert [name for name, _ in places] == ["c", "a"]
+    assert [score for _, score in places] == pytest.approx([0.6, 0.5])
+    assert scorer.score({"income": 1}, 100000, state="Iowa") == [("b", 1), ("a", 0)]
+    assert scorer.score({"bars": 1}, state="Texas") == []
+
+
+def test_score_rejects_unknown_or_zero_weights():
+    scorer = PlaceScorer(create_places_df())
+
+    with pytest.raises(ValueError):
+        scorer.score({"beaches": 1})
+    with pytest.raises(ValueError):
+        scorer.score({"safety": 0})
+    with pytest.raises(ValueError):
+        scorer.score({"income": 1})
+
+
+def test_score_matches_state_regardless_of_case():
+    places_df = create_places_df()
+    places_df["state"] = ["Iowa", "IOWA", "Ohio"]
+    scorer = PlaceScorer(places_df)
+
+    assert scorer.score({"safety": 1}, state="iowa") == [("b", 1), ("a", 0.5)]
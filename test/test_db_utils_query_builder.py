@@ -0,0 +1,33 @@
+from sqlalchemy.dialects import mysql
+
+from db_utils.query_builder import (
+    build_recommendation_query,
+    recommendation_parameters,
+)
+
+
+def test_build_recommendation_query_is_cached():
+    query = build_recommendation_query(families=True, restaurants=True)
+
+    assert build_recommendation_query(families=True, restaurants=True) is query
+    assert build_recommendation_query(schools=True) is not query
+
+
+def test_build_recommendation_query_binds_user_input():
+    query = build_recommendation_query(is_woman=True, schools=True, cafes=True)
+    compiled = query.compile(dialect=mysql.dialect())
+    sql = str(compiled)
+
+    assert "families.school_rating_rank, crimes.safety_rank_women" in sql
+    assert "activities.cafes >" in sql
+    assert "activities.bars" not in sql
+    assert {"state", "median_household_income", "area_feel"} <= set(compiled.params)
+
+
+def test_recommendation_parameters():
+    parameters = recommendation_parameters(
+        "Iowa'; DROP TABLE places; --", 120000, "Urban, Suburban,"
+    )
+
+    assert parameters["state"] == "Iowa'; DROP TABLE places; --"
+    assert parameters["area_feel"] == ["Urban", "Suburban"]
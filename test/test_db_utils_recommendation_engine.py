@@ -0,0 +1,85 @@
+import pandas as pd
+
+from db_utils.recommendation_engine import RecommendationEngine
+
+
+def test_recommend_filters_like_the_query(places_df):
+    engine = RecommendationEngine(places_df)
+
+    assert engine.recommend("Iowa", 65000, ["Urban", "Suburban"]) == ["b", "a"]
+    assert engine.recommend("Iowa", 100000, "Urban", restaurants=True) == ["c", "a"]
+    assert engine.recommend("Iowa", 100000, ["Suburban"], cafes=True) == ["b"]
+    assert engine.recommend("Iowa", 100000, ["Rural"]) == []
+    assert engine.recommend("Texas", 100000, ["Urban"]) == []
+
+
+def test_recommend_orders_by_wanted_ranks_then_safety(places_df):
+    engine = RecommendationEngine(places_df)
+
+    assert engine.recommend("Iowa", 100000, "Urban, Suburban") == ["c", "b", "a"]
+    assert engine.recommend("Iowa", 100000, "Urban, Suburban", is_woman=True) == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert engine.recommend("Iowa", 100000, "Urban, Suburban", families=True) == [
+        "b",
+        "c",
+        "a",
+    ]
+    assert engine.recommend(
+        "Iowa", 100000, "Urban, Suburban", families=True, nightlife=True
+    ) == ["b", "c", "a"]
+    assert engine.recommend(
+        "Iowa", 100000, "Urban, Suburban", schools=True, nightlife=True
+    ) == ["c", "a", "b"]
+
+
+def test_recommend_returns_limit_places_in_name_order_for_equal_ranks(places_df):
+    places_df = pd.concat([places_df] * 3, ignore_index=True)
+    places_df["unique_name"] = [f"place-{i:02}" for i in range(len(places_df))]
+    engine = RecommendationEngine(places_df)
+
+    assert engine.recommend("Iowa", 100000, ["Urban"], limit=4) == [
+        "place-02",
+        "place-08",
+        "place-14",
+        "place-00",
+    ]
+
+
+def test_recommend_batch_matches_recommend(places_df):
+    engine = RecommendationEngine(places_df)
+    profiles = [
+        {"state": "Iowa", "median_household_income": 100000, "area_feel": "Urban"},
+        {
+            "state": "Iowa",
+            "median_household_income": 65000,
+            "area_feel": ["Urban", "Suburban"],
+            "families": True,
+            "cafes": True,
+        },
+        {"state": "Texas", "median_household_income": 100000, "area_feel": "Urban"},
+        {
+            "state": "Iowa",
+            "median_household_income": 100000,
+            "area_feel": "Urban, Suburban",
+            "is_woman": True,
+            "restaurants": True,
+        },
+    ]
+
+    assert engine.recommend_batch(profiles) == [
+        engine.recommend(**profile) for profile in profiles
+    ]
+    assert engine.recommend_batch(profiles, limit=1) == [["c"], ["b"], [], ["a"]]
+
+
+def test_recommend_compares_state_and_area_feel_case_insensitively(places_df):
+    places_df.loc[0, "area_feel"] = "URBAN"
+    engine = RecommendationEngine(places_df)
+
+    assert engine.recommend("iowa", 100000, "urban") == ["c", "a"]
+    assert engine.recommend_batch(
+        [{"state": "IOWA", "median_household_income": 100000, "area_feel": "Urban"}]
+    ) == [["c", "a"]]
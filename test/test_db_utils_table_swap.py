@@ -0,0 +1,68 @@
+import pandas as pd
+from sqlalchemy import inspect
+
+from db_utils import table_swap
+from db_utils.bulk_load import bulk_load_dataframe
+from db_utils.table_swap import refresh_tables, rename_statement
+
+
+def test_rename_statement():
+    statement = rename_statement(["places", "wealth"], {"places", "crimes"})
+
+    assert statement == (
+        "RENAME TABLE `places` TO `places__old`, `places__shadow` TO `places`, "
+        "`wealth__shadow` TO `wealth`"
+    )
+
+
+def create_dataframes(names: list, median_rent: int) -> dict:
+    return {
+        "places": pd.DataFrame({"unique_name": names, "name": names}),
+        "wealth": pd.DataFrame(
+            {"unique_name": names, "median_rent": [median_rent] * len(names)}
+        ),
+    }
+
+
+def read_tables(engine) -> dict:
+    return {
+        table_name: pd.read_sql_table(table_name, engine).to_dict("records")
+        for table_name in ["places", "wealth"]
+    }
+
+
+def test_refresh_tables_swaps_in_only_complete_loads(
+    sqlite_engine, monkeypatch, capsys
+):
+    for table_name, places_df in create_dataframes(["a"], 100).items():
+        bulk_load_dataframe(places_df, table_name)
+    tables_before = read_tables(sqlite_engine)
+
+    def fail_for_wealth(places_df, table_name, **kwargs):
+        if table_name == "wealth__shadow":
+            raise RuntimeError("connection lost")
+        bulk_load_dataframe(places_df, table_name, **kwargs)
+
+    monkeypatch.setattr(table_swap, "bulk_load_dataframe", fail_for_wealth)
+    written = refresh_tables(create_dataframes(["b", "c"], 200))
+
+    assert written == {"places": True, "wealth": False}
+    assert read_tables(sqlite_engine) == tables_before
+    assert "live tables are unchanged" in capsys.readouterr().out
+
+    monkeypatch.setattr(table_swap, "bulk_load_dataframe", bulk_load_dataframe)
+    written = refresh_tables(create_dataframes(["b", "c"], 200))
+
+    assert written == {"places": True, "wealth": True}
+    assert "Dropped stale tables: places__shadow." in capsys.readouterr().out
+    assert read_tables(sqlite_engine) == {
+        "places": [
+            {"unique_name": "b", "name": "b"},
+            {"unique_name": "c", "name": "c"},
+        ],
+        "wealth": [
+            {"unique_name": "b", "median_rent": 200},
+            {"unique_name": "c", "median_rent": 200},
+        ],
+    }
+    assert sorted(inspect(sqlite_engine).get_table_names()) == ["places", "wealth"]
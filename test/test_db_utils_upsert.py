@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from db_utils import upsert
+from db_utils.bulk_load import build_table, bulk_load_dataframe
+from db_utils.upsert import diff_rows, upsert_tables
+
+
+def create_test_wealth(median_rent):
+    return pd.DataFrame(
+        {
+            "unique_name": ["a", "b", "c"],
+            "median_home_value": np.array([1000.25, 2000.5, 3000.75], dtype="float32"),
+            "median_rent": median_rent,
+        }
+    )
+
+
+def test_diff_rows_ignores_database_representation():
+    incoming_df = create_test_wealth([100.4, 200.5, -300.5])
+    stored_df = create_test_wealth([100, 201, -301])
+    stored_df["median_home_value"] = stored_df["median_home_value"].astype("float64")
+    table = build_table(incoming_df, "wealth")
+
+    inserted_df, updated_df, deleted_keys = diff_rows(
+        incoming_df, stored_df, table, "unique_name"
+    )
+
+    assert inserted_df.empty
+    assert updated_df.empty
+    assert deleted_keys == []
+
+
+def test_diff_rows():
+    incoming_df = create_test_wealth([100, 250, 300]).iloc[1:]
+    incoming_df = pd.concat(
+        [
+            incoming_df,
+            pd.DataFrame(
+                {"unique_name": ["d"], "median_home_value": [1.0], "median_rent": [2]}
+            ),
+        ]
+    )
+    stored_df = create_test_wealth([100, 200, 300])
+    table = build_table(incoming_df, "wealth")
+
+    inserted_df, updated_df, deleted_keys = diff_rows(
+        incoming_df, stored_df, table, "unique_name"
+    )
+
+    assert inserted_df["unique_name"].tolist() == ["d"]
+    assert updated_df["unique_name"].tolist() == ["b"]
+    assert deleted_keys == ["a"]
+
+
+def read_table(engine, table_name: str) -> list:
+    return (
+        pd.read_sql_table(table_name, engine)
+        .sort_values("unique_name")
+        .to_dict("records")
+    )
+
+
+def save_places_and_wealth():
+    bulk_load_dataframe(
+        pd.DataFrame({"unique_name": ["a", "b"], "name": ["Ames", "Boone"]}), "places"
+    )
+    bulk_load_dataframe(
+        pd.DataFrame({"unique_name": ["a", "b"], "median_rent": [100, 200]}), "wealth"
+    )
+
+
+def test_upsert_tables_writes_only_changes(sqlite_engine):
+    save_places_and_wealth()
+
+    changes = upsert_tables(
+        {
+            "places": pd.DataFrame(
+                {"unique_name": ["a", "b", "c"], "name": ["Ames", "Bone", "Clive"]}
+            ),
+            "wealth": pd.DataFrame({"unique_name": ["a"], "median_rent": [150]}),
+        }
+    )
+
+    assert changes == {
+        "places": {"inserted": 1, "updated": 1, "deleted": 0},
+        "wealth": {"inserted": 0, "updated": 1, "deleted": 1},
+    }
+    assert [row["name"] for row in read_table(sqlite_engine, "places")] == [
+        "Ames",
+        "Bone",
+        "Clive",
+    ]
+    assert read_table(sqlite_engine, "wealth") == [
+        {"unique_name": "a", "median_rent": 150}
+    ]
+
+
+def test_upsert_tables_rolls_back_all_tables_if_one_fails(sqlite_engine, monkeypatch):
+    save_places_and_wealth()
+    places_before = read_table(sqlite_engine, "places")
+    write_rows = upsert.write_rows
+
+    def fail_for_wealth(connection, table, places_df, key, chunksize):
+        # places are written first, as the parent table
+        if table.name == "wealth":
+            raise RuntimeError("wealth write failed")
+        write_rows(connection, table, places_df, key, chunksize)
+
+    monkeypatch.setattr(upsert, "write_rows", fail_for_wealth)
+
+    with pytest.raises(RuntimeError):
+        upsert_tables(
+            {
+                "places": pd.DataFrame({"unique_name": ["c"], "name": ["Clive"]}),
+                "wealth": pd.DataFrame({"unique_name": ["c"], "median_rent": [300]}),
+            }
+        )
+
+    assert read_table(sqlite_engine, "places") == places_before
+    assert len(read_table(sqlite_engine, "wealth")) == 2
+
+
+def test_upsert_tables_replaces_tables_with_new_columns(sqlite_engine, monkeypatch):
+    save_places_and_wealth()
+    refreshed = []
+
+    def refresh_tables(dataframes):
+        refreshed.append(list(dataframes))
+        return {table_name: True for table_name in dataframes}
+
+    monkeypatch.setattr(upsert, "refresh_tables", refresh_tables)
+    changes = upsert_tables(
+        {
+            "places": pd.DataFrame({"unique_name": ["a"], "name": ["Ames"]}),
+            "wealth": pd.DataFrame(
+                {"unique_name": ["a"], "median_household_income": [1]}
+            ),
+        }
+    )
+
+    assert refreshed == [["places", "wealth"]]
+    assert changes["wealth"] == {"inserted": 1, "updated": 0, "deleted": 0}
@@ -0,0 +1,69 @@
+import json
+
+from db_utils.recommendation_engine import RecommendationEngine
+from drivers.batch_recommendations import read_profiles, recommend_profiles_file
+
+
+def test_read_profiles_reports_invalid_lines():
+    profiles = read_profiles(
+        [
+            (
+                1,
+                '{"id": "x", "state": "Iowa", "median_household_income": 1, "area_feel": ""}',
+            ),
+            (2, "{"),
+            (3, '{"state": "Iowa", "median_household_income": "1", "area_feel": ""}'),
+            (4, '{"state": "Iowa"}'),
+            (5, '{"state": 1, "median_household_income": 1, "area_feel": ""}'),
+            (6, '{"state": "Iowa", "median_household_income": 1, "area_feel": 1}'),
+            (
+                7,
+                '{"state": "Iowa", "median_household_income": 1, "area_feel": ["Urban", 1]}',
+            ),
+        ]
+    )
+
+    assert profiles[0][0] == "x"
+    assert profiles[0][2] is None
+    assert [profile_id for profile_id, _, _ in profiles[1:]] == [2, 3, 4, 5, 6, 7]
+    assert all(error.startswith("Line ") for _, _, error in profiles[1:])
+    assert "missing median_household_income, area_feel" in profiles[3][2]
+    assert profiles[4][2] == "Line 5: state is not a string"
+    assert profiles[5][2] == "Line 6: area_feel is not a string or a list of strings"
+    assert profiles[6][2] == "Line 7: area_feel is not a string or a list of strings"
+
+
+def test_recommend_profiles_file_writes_results_in_order(tmp_path, places_df):
+    input_path = tmp_path / "profiles.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    profiles = [
+        {
+            "state": "Iowa",
+            "median_household_income": 100000,
+            "area_feel": "Urban, Suburban",
+        },
+        {"state": "Iowa", "median_household_income": 100000, "area_feel": ["Urban"]},
+        {"state": "Iowa"},
+        {
+            "id": 7,
+            "state": "Iowa",
+            "median_household_income": 100000,
+            "area_feel": "Suburban",
+            "is_woman": True,
+        },
+    ]
+    input_path.write_text("\n".join(json.dumps(profile) for profile in profiles))
+
+    assert (
+        recommend_profiles_file(
+            input_path, output_path, engine=RecommendationEngine(places_df.iloc[:2])
+        )
+        == 4
+    )
+
+    results = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert results[0] == {"id": 1, "places": ["b", "a"]}
+    assert results[1] == {"id": 2, "places": ["a"]}
+    assert results[2]["id"] == 3
+    assert "error" in results[2]
+    assert results[3] == {"id": 7, "places": ["b"]}
@@ -0,0 +1,73 @@
+from functools import partial
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import utils.data_cleaning as dc
+from db_utils import database_operations, upsert
+from db_utils.bulk_load import build_table
+from drivers.data_cleaning import (
+    run_partitioned_by_state,
+    run_stages,
+    fill_remaining_crime_data,
+)
+from config import CRIMES_COLUMNS
+
+
+def test_run_partitioned_by_state_matches_sequential_run():
+    places_df = pd.DataFrame(
+        {
+            "unique_name": ["miasto", "city", "place", "town"],
+            "state": pd.Categorical(["Iowa", "Texas", None, "Texas"]),
+            "median_rent": [1000.0, None, 1500.0, 800.0],
+            "median_home_value": [None, 300000.0, 200000.0, None],
+        },
+        index=[3, 0, 2, 1],
+    )
+    stages = [partial(dc.fill_missing_rent_and_home_values, rent_sell_value_ratio=2.0)]
+
+    partitioned = run_partitioned_by_state(places_df.copy(), stages, max_workers=2)
+    sequential = run_stages(places_df.copy(), stages)
+
+    pd.testing.assert_frame_equal(partitioned, sequential)
+    assert partitioned.index.tolist() == [3, 0, 2, 1]
+    assert partitioned["median_home_value"].tolist() == [
+        2000.0,
+        300000.0,
+        200000.0,
+        1600.0,
+    ]
+
+
+def test_fill_remaining_crime_data_second_run_writes_no_rows(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    monkeypatch.setattr(database_operations, "connect_to_db", lambda: engine)
+    monkeypatch.setattr(upsert, "connect_to_db", lambda: engine)
+    crimes = pd.DataFrame(
+        {
+            "unique_name": ["miasto", "city"],
+            **{column: [1.0, None] for column in CRIMES_COLUMNS[1:]},
+        }
+    )
+    crimes.loc[1, "assault"] = 2.0
+    build_table(crimes, "crimes").create(engine)
+    crimes.to_sql("crimes", engine, index=False, if_exists="append")
+
+    changes = []
+    for _ in range(2):
+        filled_crimes = fill_remaining_crime_data()
+        changes.append(
+            database_operations.upsert_dataframe_to_database(filled_crimes, "crimes")
+        )
+
+    assert list(filled_crimes.columns) == CRIMES_COLUMNS
+    assert not filled_crimes.isna().any().any()
+    assert changes == [
+        {"inserted": 0, "updated": 1, "deleted": 0},
+        {"inserted": 0, "updated": 0, "deleted": 0},
+    ]
@@ -0,0 +1,138 @@
+import json
+import threading
+from dataclasses import fields
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from db_utils.place_profiles import PlaceProfile
+from db_utils.recommendation_engine import RecommendationEngine
+from drivers import recommendation_service
+from drivers.recommendation_service import (
+    RecommendationIndex,
+    RecommendationService,
+)
+
+
+def create_index(generation: int, places_df: pd.DataFrame) -> RecommendationIndex:
+    engine = RecommendationEngine(places_df.iloc[:2])
+    profiles = {
+        name: PlaceProfile(name, *[None] * (len(fields(PlaceProfile)) - 1))
+        for name in ["a", "b", "c"]
+    }
+
+    return RecommendationIndex(generation, engine, profiles)
+
+
+@pytest.fixture
+def service_url(places_df):
+    service = RecommendationService(create_index(1, places_df))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), service.create_handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(url: str):
+    with urlopen(url) as response:
+        return json.load(response)
+
+
+def test_recommendations_endpoint(service_url):
+    places = get_json(
+        f"{service_url}/recommendations?state=Iowa&median_household_income=100000"
+        "&area_feel=Urban,Suburban&is_woman=true"
+    )
+    restaurant_places = get_json(
+        f"{service_url}/recommendations?state=Iowa&median_household_income=100000"
+        "&area_feel=Urban&area_feel=Suburban&restaurants=1"
+    )
+
+    assert [place["unique_name"] for place in places] == ["a", "b"]
+    assert [place["unique_name"] for place in restaurant_places] == ["a"]
+
+
+def test_places_and_metrics_endpoints(service_url):
+    places = get_json(f"{service_url}/places?unique_name=c&unique_name=x&unique_name=a")
+    metrics = get_json(f"{service_url}/metrics")
+
+    assert [place["unique_name"] for place in places] == ["c", "a"]
+    assert metrics["generation"] == 1
+    assert metrics["places"] == 2
+    assert metrics["latency"]["/places"]["requests"] == 1
+    assert metrics["latency"]["/places"]["p99_ms"] >= 0
+
+
+def test_invalid_requests(service_url):
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"{service_url}/recommendations?state=Iowa")
+    assert error.value.code == 400
+
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"{service_url}/recommendations?state=Iowa&median_household_income=1")
+    assert error.value.code == 400
+    assert json.load(error.value) == {"error": "Missing parameters: area_feel."}
+
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"{service_url}/unknown")
+    assert error.value.code == 404
+
+
+def test_unexpected_errors_return_500(service_url, monkeypatch, capsys):
+    def fail(index, parameters):
+        raise RuntimeError("index is broken")
+
+    monkeypatch.setattr(RecommendationIndex, "return_places", fail)
+
+    with pytest.raises(HTTPError) as error:
+        urlopen(
+            f"{service_url}/recommendations?state=Iowa&median_household_income=1"
+            "&area_feel=Urban"
+        )
+    assert error.value.code == 500
+    assert json.load(error.value) == {"error": "Internal server error."}
+    assert "index is broken" in capsys.readouterr().out
+    assert (
+        get_json(f"{service_url}/metrics")["latency"]["/recommendations"]["requests"]
+        == 1
+    )
+
+
+def test_watch_dataset_generation_survives_errors(monkeypatch, places_df, capsys):
+    service = RecommendationService(create_index(1, places_df))
+    calls = []
+
+    def reload_if_changed():
+        calls.append(1)
+        if len(calls) == 3:
+            service.stopped.set()
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(recommendation_service, "GENERATION_CHECK_SECONDS", 0)
+    monkeypatch.setattr(service, "reload_if_changed", reload_if_changed)
+    service.watch_dataset_generation()
+
+    assert len(calls) == 3
+    assert capsys.readouterr().out.count("database is down") == 3
+
+
+def test_reload_if_changed(monkeypatch, places_df):
+    service = RecommendationService(create_index(1, places_df))
+    monkeypatch.setattr(recommendation_service, "get_dataset_generation", lambda: 1)
+
+    assert not service.reload_if_changed()
+
+    monkeypatch.setattr(recommendation_service, "get_dataset_generation", lambda: 2)
+    monkeypatch.setattr(
+        RecommendationIndex,
+        "from_database",
+        classmethod(lambda cls: create_index(2, places_df)),
+    )
+
+    assert service.reload_if_changed()
+    assert service.index.generation == 2
@@ -1,7 +1,17 @@
+import pandas as pd
+
 from utils.data_cleaning import (
     remove_special_character_school_rating,
     remove_special_character_nightlife_rating,
     create_state_from_link,
+    clean_rating_columns,
+    parse_number_column,
+    parse_niche_links,
+    add_name_with_state,
+    replace_incorrect_type_of_place,
+    filter_rows,
+    has_state,
+    has_no_missing_values,
 )
 
 
@@ -31,3 +41,99 @@ def test_create_state_from_link():
     test_link = "https://www.niche.com/places-to-live/north-bethesda-montgomery-md/"
     state = create_state_from_link(test_link)
     assert state == "MD"
+
+
+def test_clean_rating_columns():
+    places_df = pd.DataFrame(
+        {
+            "school_rating": ["ÂÂC+ \n", "A+", "no data", None],
+            "nightlife_rating": ["gradeÂ \n A+ \n", " C+", "gradeÂB minus", None],
+            "families_rating": ["gradeÂA minus", "B", "A+", "C"],
+        }
+    )
+    places_df = clean_rating_columns(places_df)
+    assert places_df["school_rating"].tolist()[:3] == ["C+", "A+", "no data"]
+    assert places_df["nightlife_rating"].tolist()[:3] == ["A+", "C+", "B-"]
+    assert places_df["families_rating"].tolist() == ["A-", "B", "A+", "C"]
+    assert places_df["school_rating"].isna().tolist() == [False, False, False, True]
+
+
+def test_parse_number_column():
+    numbers = pd.Series(["$1,234", "15,000", "No Data", None, 12])
+    parsed = parse_number_column(numbers)
+    assert parsed.dtype == "float64"
+    assert parsed.tolist()[:2] == [1234.0, 15000.0]
+    assert parsed.isna().tolist() == [False, False, True, True, False]
+
+
+def test_parse_niche_links():
+    links = pd.Series(
+        [
+            "https://www.niche.com/places-to-live/north-bethesda-montgomery-md/",
+            "https://www.niche.com/places-to-live/n/capitol-hill-seattle-wa/",
+            "https://www.niche.com/places-to-live/north-bethesda-montgomery-md/",
+        ],
+        index=[3, 4, 5],
+    )
+    parsed_links = parse_niche_links(links)
+    assert parsed_links.index.tolist() == [3, 4, 5]
+    assert parsed_links["state"].tolist() == ["Maryland", "Washington", "Maryland"]
+    assert parsed_links.loc[4, "type_of_place"] == "Neighborhood in Seattle, WA"
+    assert parsed_links.loc[3, "type_of_place"] == "Suburb of Montgomery, MD"
+    assert parsed_links.loc[5, "name_with_state"] == "North Bethesda, Montgomery, MD"
+
+
+def test_replace_incorrect_type_of_place():
+    places_df = pd.DataFrame(
+        {
+            "type_of_place": ["Town in Iowa", "Cars", None],
+            "link": [
+                "https://www.niche.com/places-to-live/ames-story-ia/",
+                "https://www.niche.com/places-to-live/n/capitol-hill-seattle-wa/",
+                "https://www.niche.com/places-to-live/ardmore-montgomery-pa/",
+            ],
+        }
+    )
+    places_df = replace_incorrect_type_of_place(places_df)
+    assert places_df["type_of_place"].tolist() == [
+        "Town in Iowa",
+        "Neighborhood in Seattle, WA",
+        "Suburb of Montgomery, PA",
+    ]
+
+
+def test_filter_rows(capsys):
+    places_df = pd.DataFrame(
+        {
+            "state": ["Iowa", "", "Texas", None],
+            "population": [100, 200, None, 400],
+        }
+    )
+    places_df = filter_rows(
+        places_df,
+        [
+            ("missing state", has_state),
+            ("missing values", has_no_missing_values),
+        ],
+    )
+    assert places_df.index.tolist() == [0]
+    assert capsys.readouterr().out.splitlines() == [
+        "Removed 2 rows: missing state.",
+        "Removed 1 rows: missing values.",
+    ]
+
+
+def test_parse_niche_links_missing_and_long_links():
+    links = pd.Series(
+        [
+            "https://www.niche.com/places-to-live/ames-story-ia/",
+            None,
+            "https://www.niche.com/places-to-live/n/upper-east-side-new-york-city-ny/",
+        ]
+    )
+    parsed_links = parse_niche_links(links)
+    assert parsed_links.loc[0, "name_with_state"] == add_name_with_state(links[0])
+    assert parsed_links.loc[1].drop("is_neighborhood").isna().all()
+    assert not parsed_links.loc[1, "is_neighborhood"]
+    assert parsed_links.loc[2, "state"] == "New York"
+    assert parsed_links.loc[2, "name_with_state"] == "Upper East Side New York City, NY"
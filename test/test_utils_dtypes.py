@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from utils.dtypes import apply_dtype_schema
+
+
+def test_apply_dtype_schema():
+    places_df = pd.DataFrame(
+        {
+            "unique_name": ["miasto", "city", "place"],
+            "school_rating": ["A+", "no data", "B-"],
+            "state": ["Iowa", "Iowa", "Texas"],
+            "population": ["1200", 15000.0, None],
+            "median_rent": [1200, 1500, None],
+            "under_ten": [12.4, 0.3, None],
+        }
+    )
+    places_df = apply_dtype_schema(places_df)
+    assert places_df["school_rating"].cat.ordered
+    assert places_df["school_rating"].isna().tolist() == [False, True, False]
+    assert (places_df["school_rating"] > "B").tolist() == [True, False, False]
+    assert places_df["state"].dtype == "category"
+    assert places_df["population"].dtype == "Int32"
+    assert places_df["median_rent"].dtype == "float32"
+    assert places_df["under_ten"].dtype == "float32"
+    assert places_df["under_ten"].tolist()[:2] == pytest.approx([12.4, 0.3])
@@ -0,0 +1,43 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from utils.filling_missing_crime_data import (
+    add_violent_crimes_ratio,
+    add_non_violent_crimes_ratio,
+    fill_crime_values,
+)
+
+
+def create_test_crimes():
+    return pd.DataFrame(
+        {
+            "unique_name": ["miasto", "city", "place"],
+            "assault": [282.7, np.nan, np.nan],
+            "murder": [0.0, 12.2, np.nan],
+            "rape": [np.nan, np.nan, np.nan],
+            "robbery": [135.5, np.nan, np.nan],
+            "burglary": [np.nan, 1000.2, np.nan],
+            "theft": [2042.8, np.nan, np.nan],
+            "motor_vehicle_theft": [568.0, 284.0, np.nan],
+        }
+    )
+
+
+def test_fill_crime_values_ratios_match_row_functions():
+    crimes = create_test_crimes()
+    expected_violent = crimes.apply(add_violent_crimes_ratio, axis=1)
+    expected_non_violent = crimes.apply(add_non_violent_crimes_ratio, axis=1)
+    result = fill_crime_values(crimes)
+    np.testing.assert_allclose(result["violent_crime_ratio"], expected_violent)
+    np.testing.assert_allclose(result["non_violent_crime_ratio"], expected_non_violent)
+    assert result.loc[0, "violent_crime_ratio"] == pytest.approx(2 / 3)
+    assert result.loc[2, "violent_crime_ratio"] == 0
+
+
+def test_fill_crime_values_fills_only_nan_values():
+    result = fill_crime_values(create_test_crimes())
+    assert not result.isna().any().any()
+    assert result.loc[0, "assault"] == 282.7
+    assert result.loc[0, "rape"] == pytest.approx(40.7 * 2 / 3)
+    assert result.loc[1, "theft"] == pytest.approx(2042.8 * 1.5)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from utils.knn_imputer import knn_impute
+
+
+def create_test_places():
+    return pd.DataFrame(
+        {
+            "unique_name": ["a", "b", "c", "d", "e"],
+            "state": ["Iowa", "Iowa", "Iowa", "Iowa", "Texas"],
+            "latitude": [41.60, 41.61, 41.62, 45.00, 41.60],
+            "longitude": [-93.60, -93.61, -93.60, -93.60, -93.60],
+            "school_rating": ["no data", "A", "B+", "C", "F"],
+            "median_rent": [np.nan, 1000.0, 1200.0, 5000.0, 9000.0],
+            "median_household_income": [100000, 50000, 120000, 200000, 100000],
+        }
+    )
+
+
+def test_knn_impute_grade_column():
+    places_df = knn_impute(create_test_places(), ["school_rating"], k=2)
+    assert places_df["school_rating"].tolist() == ["A-", "A", "B+", "C", "F"]
+
+
+def test_knn_impute_numeric_column_with_income_threshold():
+    places_df = knn_impute(
+        create_test_places(), ["median_rent"], k=2, income_threshold=0.8
+    )
+    assert places_df.loc[0, "median_rent"] == 1200.0
+
+
+def test_knn_impute_leaves_places_without_neighbours():
+    places_df = create_test_places()
+    places_df.loc[1:2, "median_rent"] = np.nan
+    places_df = knn_impute(places_df, ["median_rent"], k=2, max_distance_km=25)
+    assert places_df["median_rent"].isna().sum() == 3
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from utils.ranks import add_rank_columns, grade_rank, lexicographic_rank
+
+
+def test_grade_rank():
+    grades = pd.Series(["A+", "B", "C-", None, "A-"])
+
+    assert grade_rank(grades).tolist() == [1, 5, 6, 6, 3]
+
+
+def test_lexicographic_rank_matches_sort():
+    places_df = pd.DataFrame(
+        {
+            "assault": [2.0, 1.0, 1.0, 1.0, np.nan],
+            "theft": [5.0, 3.0, 4.0, 3.0, 1.0],
+        }
+    )
+    ranks = lexicographic_rank(places_df, [("assault", True), ("theft", False)])
+
+    assert ranks.tolist() == [4, 3, 2, 3, 1]
+
+
+def test_lexicographic_rank_sorts_missing_values_like_mysql():
+    places_df = pd.DataFrame(
+        {
+            "assault": [1.0, np.nan, 1.0, 1.0],
+            "theft": [np.nan, 2.0, 3.0, np.nan],
+        }
+    )
+    ranks = lexicographic_rank(places_df, [("assault", True), ("theft", False)])
+
+    # Missing assault first (ascending), missing theft last (descending)
+    assert ranks.tolist() == [3, 1, 2, 3]
+
+
+def test_add_rank_columns():
+    places_df = pd.DataFrame(
+        {
+            "school_rating": ["A", "B+"],
+            "assault": [2.0, 1.0],
+            "murder": [1.0, 1.0],
+            "rape": [0.0, 3.0],
+            "robbery": [1.0, 1.0],
+            "theft": [1.0, 1.0],
+        }
+    )
+    places_df = add_rank_columns(places_df)
+
+    assert places_df["school_rating_rank"].tolist() == [2, 4]
+    assert "families_rating_rank" not in places_df
+    assert places_df["safety_rank"].tolist() == [2, 1]
+    assert places_df["safety_rank_women"].tolist() == [1, 2]
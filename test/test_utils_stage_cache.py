@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+
+from drivers.data_cleaning import drop_incomplete_places
+from utils import stage_cache
+from utils.stage_cache import run_stage, code_version, project_source_files
+
+
+def double_population(places_df):
+    places_df["population"] = places_df["population"] * 2
+    return places_df
+
+
+def test_run_stage_uses_cache_for_unchanged_inputs(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    places_df = pd.DataFrame({"unique_name": ["miasto", "city"], "population": [1, 2]})
+
+    first_result = run_stage("double", double_population, places_df.copy())
+    second_result = run_stage("double", double_population, places_df.copy())
+    pd.testing.assert_frame_equal(first_result, second_result)
+
+    places_df.loc[0, "population"] = 5
+    changed_result = run_stage("double", double_population, places_df.copy())
+    assert changed_result["population"].tolist() == [10, 4]
+    assert capsys.readouterr().out.splitlines() == [
+        "Stage double cached.",
+        "Stage double loaded from cache.",
+        "Stage double cached.",
+    ]
+    assert len(list((tmp_path / ".stage_cache").iterdir())) == 1
+
+
+def test_code_version_changes_with_imported_project_modules(tmp_path, monkeypatch):
+    (tmp_path / "cleaning_helpers.py").write_text("LIMIT = 1\n")
+    (tmp_path / "cleaning_stage.py").write_text(
+        "import cleaning_helpers\n\n\ndef stage(places_df):\n    return places_df\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(stage_cache, "PROJECT_DIRECTORY", str(tmp_path))
+    import cleaning_stage
+
+    version = code_version(cleaning_stage.stage)
+    (tmp_path / "cleaning_helpers.py").write_text("LIMIT = 2\n")
+
+    assert code_version(cleaning_stage.stage) != version
+
+
+def test_project_source_files_include_config_and_helpers():
+    source_files = project_source_files(drop_incomplete_places)
+
+    assert any(
+        path.endswith(os.path.join("utils", "dtypes.py")) for path in source_files
+    )
+    assert any(path.endswith("config.py") for path in source_files)
+    assert not any("site-packages" in path for path in source_files)
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from utils import storage
+from utils.storage import save_stage_data, load_stage_data, iter_stage_data
+
+
+def create_test_places():
+    return pd.DataFrame(
+        {
+            "unique_name": ["miasto", "city", "place"],
+            "state": ["Iowa", "Texas", "Iowa"],
+            "assault": [12.5, "no data", 30.1],
+            "population": [1200, 15000, 300],
+        }
+    )
+
+
+def test_save_and_load_stage_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_stage_data(create_test_places(), "places", export_csv=True)
+    assert (tmp_path / "places.parquet").exists()
+    assert (tmp_path / "places.csv").exists()
+
+    places_df = load_stage_data(
+        "places",
+        columns=["unique_name", "population"],
+        filters=[("state", "==", "Iowa")],
+    )
+    assert places_df.columns.tolist() == ["unique_name", "population"]
+    assert places_df["unique_name"].tolist() == ["miasto", "place"]
+
+
+def test_load_stage_data_from_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_test_places().to_csv("places.csv", index=False)
+    places_df = load_stage_data("places", filters=[("population", ">", 1000)])
+    assert places_df["unique_name"].tolist() == ["miasto", "city"]
+    chunks = list(iter_stage_data("places", chunksize=2, columns=["state"]))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+
+def test_load_stage_data_from_csv_filters_on_other_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_test_places().to_csv("places.csv", index=False)
+    places_df = load_stage_data(
+        "places", columns=["unique_name"], filters=[("state", "==", "Iowa")]
+    )
+    assert places_df.columns.tolist() == ["unique_name"]
+    assert places_df["unique_name"].tolist() == ["miasto", "place"]
+
+
+def test_save_stage_data_in_csv_format(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "INTERMEDIATE_DATA_FORMAT", "csv")
+    save_stage_data(create_test_places(), "places")
+    assert (tmp_path / "places.csv").exists()
+    assert not (tmp_path / "places.parquet").exists()
+    assert load_stage_data("places")["unique_name"].tolist() == [
+        "miasto",
+        "city",
+        "place",
+    ]
@@ -0,0 +1,74 @@
+from utils.ttl_cache import TTLCache, MISSING
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_stored_value_and_counts_hits():
+    cache = TTLCache(maxsize=2, ttl=10, clock=FakeClock())
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is MISSING
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+    assert cache.metrics()["hit_ratio"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=10, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+
+    assert cache.get("a") == 1
+
+    clock.now = 10.0
+
+    assert cache.get("a") is MISSING
+    assert cache.metrics()["expirations"] == 1
+    assert cache.metrics()["size"] == 0
+
+
+def test_new_generation_clears_entries():
+    cache = TTLCache(maxsize=2, ttl=10, clock=FakeClock())
+    cache.check_generation(1)
+    cache.set("a", 1)
+    cache.check_generation(1)
+
+    assert cache.get("a") == 1
+
+    cache.check_generation(2)
+
+    assert cache.get("a") is MISSING
+    assert cache.metrics()["generation"] == 2
+
+
+def test_value_read_for_previous_generation_is_not_stored():
+    cache = TTLCache(maxsize=2, ttl=10, clock=FakeClock())
+    cache.check_generation(1)
+    # Another lookup moves the cache to the new generation before the value read for generation 1 is stored
+    cache.check_generation(2)
+
+    assert not cache.set("a", 1, generation=1)
+    assert cache.get("a") is MISSING
+    assert cache.set("a", 2, generation=2)
+    assert cache.get("a") == 2
@@ -1,12 +1,32 @@
 """
 Data cleaning functions to work with raw data
 """
+import re
+
 import pandas as pd
 import numpy as np
 
 from db_utils import database_operations
+from utils.knn_imputer import knn_impute
+
+from config import US_STATES, WEATHER_COLUMNS
+
+# Characters left after scraping Niche.com grades, the first pattern is replaced with "-", the second one removed
+RATING_CLEANING_PATTERNS = {
+    "school_rating": (None, re.compile("[Â\xa0]")),
+    "nightlife_rating": (re.compile("minus"), re.compile("gradeÂ| ")),
+    "families_rating": (re.compile("minus"), re.compile("gradeÂ| ")),
+}
+
+NUMBER_CLEANING_PATTERN = re.compile(r"[,$\s]")
+
+# https://www.niche.com/places-to-live/n/<neighborhood-slug>/ or https://www.niche.com/places-to-live/<place-slug>/
+NICHE_LINK_PATTERN = re.compile(
+    r"^https://www\.niche\.com/places-to-live/(?P<neighborhood>n/)?"
+    r"(?P<slug>(?:[^/]*-)?(?P<city>[^/-]+)-(?P<state_abbreviation>[^/-]+))/?$"
+)
 
-from config import US_STATES
+PLACE_TYPES = ["City", "Town", "Neighborhood", "Suburb"]
 
 
 def remove_special_character_school_rating(school_rating: str) -> str:
@@ -52,6 +72,44 @@ def remove_special_character_families_rating(families_rating: str) -> str:
     )
 
 
+def clean_rating_columns(places_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized version of remove_special_character_*_rating functions for all columns in RATING_CLEANING_PATTERNS.
+    Ratings are returned as "string" dtype, missing values stay missing.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        places_df: pd.DataFrame
+    """
+    for column, (minus_pattern, removed_pattern) in RATING_CLEANING_PATTERNS.items():
+        # Only a few distinct grades exist, so the patterns run on unique values and are mapped back with the codes
+        codes, ratings = pd.factorize(places_df[column])
+        ratings = pd.Series(ratings, dtype="string")
+        if minus_pattern is not None:
+            ratings = ratings.str.replace(minus_pattern, "-", regex=True)
+        ratings = ratings.str.replace(removed_pattern, "", regex=True).str.strip()
+        places_df[column] = pd.Series(
+            ratings.array.take(codes, allow_fill=True), index=places_df.index
+        )
+
+    return places_df
+
+
+def parse_number_column(numbers: pd.Series) -> pd.Series:
+    """
+    Vectorized version of number_to_int. Removes commas, $ signs and whitespaces and converts to float64, values
+    that are not numbers become NaN.
+    Args:
+        numbers: pd.Series
+    Returns:
+        numbers: pd.Series
+    """
+    cleaned_numbers = numbers.astype("string").str.replace(
+        NUMBER_CLEANING_PATTERN, "", regex=True
+    )
+    return pd.to_numeric(cleaned_numbers, errors="coerce").astype("float64")
+
+
 def create_state_from_link(link: str) -> str:
     """
     Gets the state Abbreviation from the link
@@ -89,24 +147,102 @@ def number_to_int(number: str) -> int | float:
         return np.nan
 
 
-def replace_incorrect_type_of_place(places_df: pd.DataFrame) -> pd.DataFrame:
+def replace_incorrect_type_of_place(
+    places_df: pd.DataFrame, parsed_links: pd.DataFrame | None = None
+) -> pd.DataFrame:
     """
     Finds rows with incorrect type_of_place values and replaces with correct.
     Args:
         places_df: pd.DataFrame
+        parsed_links: pd.DataFrame | None -> output of parse_niche_links(), parsed here if not passed
 
     Returns:
         places_df: pd.DataFrame
     """
-    place_types_list = ["City", "Town", "Neighborhood", "Suburb"]
-    for index, row in places_df.iterrows():
-        split_place_type = row["type_of_place"].split(" ")
-        if split_place_type[0] not in place_types_list:
-            new_type = fill_missing_type_of_place(row["link"])
-            places_df.loc[index, "type_of_place"] = new_type
+    if parsed_links is None:
+        parsed_links = parse_niche_links(places_df["link"])
+    first_word = places_df["type_of_place"].astype("string").str.split(" ", n=1).str[0]
+    is_incorrect = ~first_word.isin(PLACE_TYPES).fillna(False).astype(bool)
+    places_df.loc[is_incorrect, "type_of_place"] = parsed_links.loc[
+        is_incorrect, "type_of_place"
+    ]
     return places_df
 
 
+def parse_niche_links(links: pd.Series) -> pd.DataFrame:
+    """
+    Parses Niche.com links once with NICHE_LINK_PATTERN and derives all link based columns together. Gives the same
+    values as create_state_from_link, change_state_abbreviation_to_name, fill_missing_type_of_place and
+    add_name_with_state, except for slugs with 6 or more parts: add_name_with_state returns only the first part
+    and the second one as the state, here all parts before the state are kept in the name. Duplicated links are
+    parsed only once, missing links give missing values.
+    Args:
+        links: pd.Series
+    Returns:
+        parsed_links: pd.DataFrame -> columns: state_abbreviation, state, is_neighborhood, type_of_place,
+        name_with_state; same index as links
+    """
+    codes, unique_links = pd.factorize(links)
+    parts = pd.Series(unique_links, dtype="string").str.extract(NICHE_LINK_PATTERN)
+
+    is_neighborhood = parts["neighborhood"].notna().to_numpy()
+    state_abbreviation = parts["state_abbreviation"].str[-2:].str.upper()
+    city = parts["city"].str.capitalize()
+    state_suffix = ", " + parts["state_abbreviation"].str.upper()
+    type_of_place = np.where(
+        is_neighborhood, "Neighborhood in " + city, "Suburb of " + city
+    )
+
+    slug_parts = parts["slug"].str.split("-", expand=True)
+    slug_parts = slug_parts.reindex(columns=range(max(5, slug_parts.shape[1])))
+    slug_parts = slug_parts.astype("string")
+    number_of_parts = slug_parts.notna().sum(axis=1).to_numpy()
+    name = [slug_parts[i].str.capitalize() for i in range(4)]
+    long_name = pd.Series(
+        [
+            " ".join(part.capitalize() for part in slug.split("-")[:-1])
+            if isinstance(slug, str)
+            else slug
+            for slug in parts["slug"]
+        ],
+        dtype="string",
+    )
+    name_with_state = np.select(
+        [
+            number_of_parts >= 6,
+            number_of_parts == 5,
+            number_of_parts == 4,
+            number_of_parts == 3,
+        ],
+        [
+            long_name,
+            name[0] + " " + name[1] + ", " + name[2] + " " + name[3],
+            name[0] + " " + name[1] + ", " + name[2],
+            name[0] + ", " + name[1],
+        ],
+        default=name[0],
+    )
+
+    parsed_links = pd.DataFrame(
+        {
+            "state_abbreviation": state_abbreviation,
+            "state": state_abbreviation.map(US_STATES).fillna(""),
+            "is_neighborhood": is_neighborhood,
+            "type_of_place": pd.Series(type_of_place, dtype="string") + state_suffix,
+            "name_with_state": pd.Series(name_with_state, dtype="string")
+            + state_suffix,
+        }
+    )
+    # Missing links have code -1, which is not in the index, so reindex gives missing values for them
+    parsed_links = parsed_links.reindex(codes)
+    parsed_links["is_neighborhood"] = np.where(
+        codes >= 0, is_neighborhood[codes], False
+    )
+    parsed_links.index = links.index
+
+    return parsed_links
+
+
 def fill_missing_type_of_place(link: str) -> str | float:
     """
     Link has "/n/" part for Neighbourhoods, otherwise it will be Suburb.
@@ -198,17 +334,22 @@ def create_rent_to_sell_value_ratio(places_df: pd.DataFrame) -> pd.DataFrame:
     return places_df
 
 
-def fill_missing_rent_and_home_values(places_df: pd.DataFrame) -> pd.DataFrame:
+def fill_missing_rent_and_home_values(
+    places_df: pd.DataFrame, rent_sell_value_ratio: float | None = None
+) -> pd.DataFrame:
     """
     If any of the values for median_home_value or median_rent are NaN, the function uses the rent_to_sell ratio to
-    assign missing values.
+    assign missing values. The ratio is the mean of rent_sell_value_ratio column, unless it is passed (e.g. when the
+    data is cleaned in chunks and the mean is calculated for the whole file).
     Args:
         places_df: pd.DataFrame
+        rent_sell_value_ratio: float | None
 
     Returns:
         places_df: pd.DataFrame
     """
-    rent_sell_value_ratio = places_df.rent_sell_value_ratio.mean()
+    if rent_sell_value_ratio is None:
+        rent_sell_value_ratio = places_df.rent_sell_value_ratio.mean()
     for index, row in places_df.iterrows():
         if pd.isna(row["median_home_value"]):
             try:
@@ -230,22 +371,77 @@ def fill_missing_rent_and_home_values(places_df: pd.DataFrame) -> pd.DataFrame:
 
 def fill_missing_school_ratings(places_df: pd.DataFrame) -> pd.DataFrame:
     """
-    Fills missing school ratings for purpose of model fitting. It assigns the same rating to the school rating as the
-    families_rating. This will create some small discrepancies, but on the most of the occasions the ratings are
-    similar for both. Args: places_df: pd.DataFrame
+    Fills missing school ratings for purpose of model fitting. First it uses ratings of the closest schools in the
+    same state (knn_impute), then for places without any rated neighbour it assigns the same rating to the school
+    rating as the families_rating. This will create some small discrepancies, but on the most of the occasions the
+    ratings are similar for both. Args: places_df: pd.DataFrame
 
     Returns:
         places_df: pd.DataFrame
     """
-    for index, row in places_df.iterrows():
-        if row["school_rating"] == "no data":
-            places_df.loc[index, "school_rating"] = row["families_rating"]
-        else:
-            places_df.loc[index, "school_rating"] = row["school_rating"]
+    places_df = knn_impute(places_df, ["school_rating"])
+    is_missing = places_df["school_rating"].isna() | (
+        places_df["school_rating"] == "no data"
+    )
+    places_df["school_rating"] = places_df["school_rating"].where(
+        ~is_missing, places_df["families_rating"]
+    )
 
     return places_df
 
 
+def has_weather_data(places_df: pd.DataFrame) -> pd.Series:
+    """
+    Row filter, True for places with all weather columns filled.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        mask: pd.Series
+    """
+    return places_df[WEATHER_COLUMNS[1:]].notna().all(axis=1)
+
+
+def has_state(places_df: pd.DataFrame) -> pd.Series:
+    """
+    Row filter, True for places where state was recognised from the link.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        mask: pd.Series
+    """
+    return places_df["state"].notna() & (places_df["state"] != "")
+
+
+def has_no_missing_values(places_df: pd.DataFrame) -> pd.Series:
+    """
+    Row filter, True for places without any missing value.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        mask: pd.Series
+    """
+    return places_df.notna().all(axis=1)
+
+
+def filter_rows(places_df: pd.DataFrame, row_filters: list) -> pd.DataFrame:
+    """
+    Combines row filters (functions returning boolean mask, True for rows to keep) and selects the rows once at the
+    end. Prints how many rows each filter removed, rows already removed by previous filters are not counted again.
+    Args:
+        places_df: pd.DataFrame
+        row_filters: list -> list of (reason, row_filter) tuples
+    Returns:
+        places_df: pd.DataFrame
+    """
+    rows_to_keep = np.ones(len(places_df), dtype=bool)
+    for reason, row_filter in row_filters:
+        mask = row_filter(places_df).to_numpy(dtype=bool)
+        print(f"Removed {np.count_nonzero(rows_to_keep & ~mask)} rows: {reason}.")
+        rows_to_keep &= mask
+
+    return places_df[rows_to_keep]
+
+
 def drop_places_with_missing_weather_data(places_df: pd.DataFrame) -> pd.DataFrame:
     """
     Drops places with missing temperature. There is very little places without data, so for the purpose
@@ -255,15 +451,7 @@ def drop_places_with_missing_weather_data(places_df: pd.DataFrame) -> pd.DataFra
     Returns:
         places_df: pd.DataFrame
     """
-    weather_df = database_operations.load_database_to_dataframe("weather")
-    weather_data_cols = weather_df.columns[1:]
-
-    for col in weather_data_cols:
-        for index, row in places_df.iterrows():
-            if pd.isna(row[col]):
-                places_df.drop(index, inplace=True)
-
-    return places_df
+    return filter_rows(places_df, [("missing weather data", has_weather_data)])
 
 
 def weather_bucketing_per_season():
@@ -281,16 +469,7 @@ def weather_bucketing_per_season():
             means.append(mean)
         new_data.append(means)
 
-    new_columns = [
-        "temp_first_quarter",
-        "temp_second_quarter",
-        "temp_third_quarter",
-        "temp_fourth_quarter",
-        "prcp_first_quarter",
-        "prcp_second_quarter",
-        "prcp_third_quarter",
-        "prcp_fourth_quarter",
-    ]
+    new_columns = WEATHER_COLUMNS[1:]
 
     new_weather = pd.DataFrame(new_data, columns=new_columns)
     new_weather.insert(0, "unique_name", weather["unique_name"])
@@ -0,0 +1,88 @@
+"""
+Central dtype schema for the places data. Built from the column lists in config.py and applied when the data is
+cleaned and loaded from the database:
+    - grades as ordered categoricals (F < ... < A+), so grade comparisons are integer comparisons on the codes
+    - low cardinality strings as categoricals
+    - downcast integers and float32 for the numbers, float32 for the age group percentages
+"""
+import pandas as pd
+
+from config import (
+    GRADES,
+    GRADE_COLUMNS,
+    GRADE_RANK_COLUMNS,
+    SAFETY_RANK_ORDER,
+    CATEGORY_COLUMNS,
+    AGE_GROUP_NAMES,
+    WEALTH_COLUMNS,
+    CRIMES_COLUMNS,
+    WEATHER_COLUMNS,
+)
+
+GRADE_DTYPE = pd.CategoricalDtype(categories=GRADES[::-1], ordered=True)
+
+
+def build_dtype_schema() -> dict:
+    """
+    Returns dictionary of column name to dtype.
+    Returns:
+        schema: dict
+    """
+    schema = {column: GRADE_DTYPE for column in GRADE_COLUMNS}
+    schema.update({column: "Int8" for column in GRADE_RANK_COLUMNS.values()})
+    schema.update({column: "Int32" for column in SAFETY_RANK_ORDER})
+    schema.update({column: "category" for column in CATEGORY_COLUMNS})
+    schema["population"] = "Int32"
+    # Percentages with decimals
+    schema.update({column: "float32" for column in AGE_GROUP_NAMES})
+    schema.update({column: "Int16" for column in ["restaurants", "bars", "cafes"]})
+    schema.update({column: "float32" for column in WEALTH_COLUMNS[1:]})
+    schema.update({column: "float32" for column in CRIMES_COLUMNS[1:]})
+    schema.update({column: "float32" for column in WEATHER_COLUMNS[1:]})
+    schema.update(
+        {
+            column: "float32"
+            for column in ["violent_crime_ratio", "non_violent_crime_ratio"]
+        }
+    )
+
+    return schema
+
+
+DTYPE_SCHEMA = build_dtype_schema()
+
+
+def apply_dtype_schema(
+    places_df: pd.DataFrame, schema: dict | None = None
+) -> pd.DataFrame:
+    """
+    Converts columns present in the dataframe to the dtypes from the schema. Values that do not fit the dtype
+    (e.g. "no data" grade or text in the number column) become missing values.
+    Args:
+        places_df: pd.DataFrame
+        schema: dict | None -> DTYPE_SCHEMA if not passed
+    Returns:
+        places_df: pd.DataFrame
+    """
+    schema = DTYPE_SCHEMA if schema is None else schema
+    for column, dtype in schema.items():
+        if column not in places_df.columns:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Values outside the categories are masked first, casting them is deprecated
+            values = places_df[column].astype("object")
+            places_df[column] = values.where(values.isin(dtype.categories)).astype(
+                dtype
+            )
+        elif dtype == "category":
+            places_df[column] = places_df[column].astype("object").astype(dtype)
+        elif dtype.startswith("Int"):
+            places_df[column] = (
+                pd.to_numeric(places_df[column], errors="coerce").round().astype(dtype)
+            )
+        else:
+            places_df[column] = pd.to_numeric(
+                places_df[column], errors="coerce"
+            ).astype(dtype)
+
+    return places_df
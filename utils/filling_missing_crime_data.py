@@ -99,8 +99,8 @@ def convert_crime_values_to_numeric(crimes: pd.DataFrame) -> pd.DataFrame:
         crimes: pd.DataFrame
     """
     numeric_columns = crimes.columns.difference(["unique_name"])
-    crimes[numeric_columns] = crimes[numeric_columns].applymap(
-        lambda x: float(x) if x != "no data" else np.nan
+    crimes[numeric_columns] = crimes[numeric_columns].apply(
+        pd.to_numeric, errors="coerce"
     )
 
     return crimes
@@ -214,3 +214,66 @@ def fill_nan_values_non_violent_crimes(row: pd.Series) -> pd.Series:
             pass
 
     return row
+
+
+def crime_averages_vector(crime_columns: list) -> np.ndarray:
+    """
+    Builds the vector of US averages aligned with the given crime columns.
+    Args:
+        crime_columns: list
+    Returns:
+        averages: np.ndarray
+    """
+    return np.array(
+        [US_AVERAGE_CRIMES[f"US_AVERAGE_{column.upper()}"] for column in crime_columns],
+        dtype=np.float64,
+    )
+
+
+def crime_ratio_and_fill(
+    crime_values: np.ndarray, averages: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Columnar version of the ratio and NaN filling functions above. Ratio is the mean of value / US average over the
+    non-NaN columns of each row (0 when the whole row is NaN), NaN values are replaced with ratio * US average.
+    Args:
+        crime_values: np.ndarray -> 2D array, rows are places, columns are crimes
+        averages: np.ndarray -> US averages aligned with the columns
+
+    Returns:
+        ratio: np.ndarray
+        filled_values: np.ndarray
+    """
+    relative_values = crime_values / averages
+    non_nan_counter = np.count_nonzero(~np.isnan(relative_values), axis=1)
+    ratio = np.nansum(relative_values, axis=1) / np.maximum(non_nan_counter, 1)
+
+    filled_values = np.where(
+        np.isnan(crime_values), ratio[:, np.newaxis] * averages, crime_values
+    )
+
+    return ratio, filled_values
+
+
+def fill_crime_values(crimes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds violent_crime_ratio and non_violent_crime_ratio columns and fills NaN crime values for whole table at once.
+    Gives the same result as applying add_*_crimes_ratio and fill_nan_values_* functions row by row.
+    Args:
+        crimes: pd.DataFrame
+
+    Returns:
+        crimes: pd.DataFrame
+    """
+    for crime_columns, ratio_column in (
+        (VIOLENT_CRIMES_COLUMNS, "violent_crime_ratio"),
+        (NON_VIOLENT_CRIMES_COLUMNS, "non_violent_crime_ratio"),
+    ):
+        crime_values = crimes[crime_columns].to_numpy(dtype=np.float64)
+        ratio, filled_values = crime_ratio_and_fill(
+            crime_values, crime_averages_vector(crime_columns)
+        )
+        crimes[ratio_column] = ratio
+        crimes[crime_columns] = filled_values
+
+    return crimes
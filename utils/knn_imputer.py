@@ -0,0 +1,214 @@
+"""
+Spatial k-nearest-neighbour imputer. Fills missing values of any numeric or grade column with the values of the
+closest places in the same state.
+"""
+import numpy as np
+import pandas as pd
+
+from config import (
+    KNN_NEIGHBOURS,
+    KNN_MAX_DISTANCE_KM,
+    EARTH_RADIUS_KM,
+    GRADES,
+    GRADE_COLUMNS,
+)
+
+MISSING_VALUES = ["no data", ""]
+
+# Maximum number of target x donor distances held in memory at once
+DISTANCE_BLOCK_SIZE = 4_000_000
+
+
+def coordinates_to_unit_vectors(
+    latitude: np.ndarray, longitude: np.ndarray
+) -> np.ndarray:
+    """
+    Converts latitude and longitude in degrees to 3D unit vectors, so the distances can be computed with a dot
+    product.
+    Args:
+        latitude: np.ndarray
+        longitude: np.ndarray
+    Returns:
+        unit_vectors: np.ndarray
+    """
+    latitude = np.radians(latitude)
+    longitude = np.radians(longitude)
+    return np.column_stack(
+        (
+            np.cos(latitude) * np.cos(longitude),
+            np.cos(latitude) * np.sin(longitude),
+            np.sin(latitude),
+        )
+    )
+
+
+def great_circle_distances(targets: np.ndarray, donors: np.ndarray) -> np.ndarray:
+    """
+    Distance in kilometres between every target and every donor unit vector.
+    Args:
+        targets: np.ndarray
+        donors: np.ndarray
+    Returns:
+        distances: np.ndarray -> shape (len(targets), len(donors))
+    """
+    cosine = np.clip(targets @ donors.T, -1.0, 1.0)
+    return EARTH_RADIUS_KM * np.arccos(cosine)
+
+
+def column_to_numeric(values: pd.Series, is_grade: bool) -> np.ndarray:
+    """
+    Numeric representation of the column, missing values are NaN. Grades are replaced with their position in GRADES.
+    Args:
+        values: pd.Series
+        is_grade: bool
+    Returns:
+        numeric_values: np.ndarray
+    """
+    if is_grade:
+        values = values.astype("object")
+        codes = pd.Categorical(
+            values.where(values.isin(GRADES)), categories=GRADES
+        ).codes
+        return np.where(codes >= 0, codes, np.nan)
+    values = values.astype("object").where(~values.isin(MISSING_VALUES))
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def nearest_neighbours_mean(
+    target_vectors: np.ndarray,
+    donor_vectors: np.ndarray,
+    donor_values: np.ndarray,
+    k: int,
+    max_distance_km: float,
+    target_incomes: np.ndarray | None = None,
+    donor_incomes: np.ndarray | None = None,
+    income_threshold: float | None = None,
+) -> np.ndarray:
+    """
+    Mean value of k closest donors for every target. Donors further than max_distance_km or, when income_threshold is
+    set, poorer than income_threshold * target income are not used. Targets without any valid donor get NaN.
+    Args:
+        target_vectors: np.ndarray
+        donor_vectors: np.ndarray
+        donor_values: np.ndarray
+        k: int
+        max_distance_km: float
+        target_incomes: np.ndarray | None
+        donor_incomes: np.ndarray | None
+        income_threshold: float | None
+    Returns:
+        imputed_values: np.ndarray
+    """
+    imputed_values = np.full(len(target_vectors), np.nan)
+    k = min(k, len(donor_vectors))
+    if k == 0:
+        return imputed_values
+
+    block_size = max(1, DISTANCE_BLOCK_SIZE // len(donor_vectors))
+    for start in range(0, len(target_vectors), block_size):
+        block = slice(start, start + block_size)
+        distances = great_circle_distances(target_vectors[block], donor_vectors)
+        distances[distances > max_distance_km] = np.inf
+        if income_threshold is not None:
+            poorer = donor_incomes[np.newaxis, :] <= (
+                target_incomes[block, np.newaxis] * income_threshold
+            )
+            distances[poorer] = np.inf
+
+        neighbours = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        is_valid = np.isfinite(np.take_along_axis(distances, neighbours, axis=1))
+        neighbour_values = np.where(is_valid, donor_values[neighbours], 0.0)
+        valid_counter = is_valid.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            imputed_values[block] = np.where(
+                valid_counter > 0, neighbour_values.sum(axis=1) / valid_counter, np.nan
+            )
+
+    return imputed_values
+
+
+def knn_impute(
+    places_df: pd.DataFrame,
+    columns: list,
+    k: int = KNN_NEIGHBOURS,
+    max_distance_km: float = KNN_MAX_DISTANCE_KM,
+    income_threshold: float | None = None,
+) -> pd.DataFrame:
+    """
+    Fills missing values ("no data", empty string or NaN) of the given columns with the mean of k closest places in
+    the same state. Grade columns (GRADE_COLUMNS) are averaged on their position in GRADES and rounded back to grade.
+    Optional income_threshold works like AREA_WEALTH_THRESHOLD when filling crimes - neighbours poorer than
+    income_threshold * median_household_income of the place are skipped.
+    Places without coordinates or without any neighbour in range are left unchanged.
+    Args:
+        places_df: pd.DataFrame -> requires state, latitude and longitude columns
+        columns: list
+        k: int
+        max_distance_km: float
+        income_threshold: float | None
+    Returns:
+        places_df: pd.DataFrame
+    """
+    latitude = pd.to_numeric(places_df["latitude"], errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+    longitude = pd.to_numeric(places_df["longitude"], errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+    has_coordinates = ~(np.isnan(latitude) | np.isnan(longitude))
+    unit_vectors = coordinates_to_unit_vectors(latitude, longitude)
+
+    incomes = None
+    if income_threshold is not None:
+        incomes = pd.to_numeric(
+            places_df["median_household_income"], errors="coerce"
+        ).to_numpy(dtype=np.float64)
+
+    # Row positions grouped by state, so every state is one contiguous range
+    state_codes, states = pd.factorize(places_df["state"])
+    order = np.argsort(state_codes, kind="stable")
+    boundaries = np.searchsorted(state_codes[order], np.arange(len(states) + 1))
+
+    for column in columns:
+        is_grade = column in GRADE_COLUMNS
+        values = column_to_numeric(places_df[column], is_grade)
+        imputed_values = values.copy()
+
+        for state_index in range(len(states)):
+            rows = order[boundaries[state_index] : boundaries[state_index + 1]]
+            rows = rows[has_coordinates[rows]]
+            targets = rows[np.isnan(values[rows])]
+            donors = rows[~np.isnan(values[rows])]
+            if len(targets) == 0 or len(donors) == 0:
+                continue
+
+            imputed_values[targets] = nearest_neighbours_mean(
+                unit_vectors[targets],
+                unit_vectors[donors],
+                values[donors],
+                k,
+                max_distance_km,
+                target_incomes=incomes[targets] if incomes is not None else None,
+                donor_incomes=incomes[donors] if incomes is not None else None,
+                income_threshold=income_threshold,
+            )
+
+        filled = np.isnan(values) & ~np.isnan(imputed_values)
+        if not filled.any():
+            continue
+        if is_grade:
+            filled_values = np.asarray(GRADES, dtype=object)[
+                np.rint(imputed_values[filled]).astype(np.int64)
+            ]
+        else:
+            filled_values = imputed_values[filled]
+        dtype = places_df[column].dtype
+        column_values = places_df[column].astype("object").to_numpy(copy=True)
+        column_values[filled] = filled_values
+        column_values = pd.Series(column_values, index=places_df.index).infer_objects()
+        # Keeps categorical and float dtypes from apply_dtype_schema()
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_float_dtype(dtype):
+            column_values = column_values.astype(dtype)
+        places_df[column] = column_values
+
+    return places_df
@@ -0,0 +1,83 @@
+"""
+Integer rank columns stored next to the letter grades and crime values. The recommendation query orders by them
+directly instead of evaluating CASE expressions over the grades for every joined row.
+"""
+import numpy as np
+import pandas as pd
+
+from config import (
+    RANKED_GRADES,
+    UNRANKED_GRADE,
+    GRADE_RANK_COLUMNS,
+    SAFETY_RANK_ORDER,
+)
+
+
+def grade_rank(grades: pd.Series) -> pd.Series:
+    """
+    Rank of the grade: 1 for A+ up to 5 for B, UNRANKED_GRADE for other grades and missing values.
+    Args:
+        grades: pd.Series
+    Returns:
+        ranks: pd.Series
+    """
+    codes = pd.Index(RANKED_GRADES).get_indexer(grades.astype("object"))
+    ranks = np.where(codes >= 0, codes + 1, UNRANKED_GRADE)
+
+    return pd.Series(ranks, index=grades.index, dtype="Int8")
+
+
+def lexicographic_rank(places_df: pd.DataFrame, order: list) -> pd.Series:
+    """
+    Dense rank of the rows sorted by the columns one after another, so sorting by the rank gives the same order as
+    sorting by the columns. Rows with equal values get the same rank. Missing values are the smallest values like
+    in MySQL, so they are sorted first in ascending and last in descending columns.
+    Args:
+        places_df: pd.DataFrame
+        order: list -> (column, ascending) pairs
+    Returns:
+        ranks: pd.Series
+    """
+    columns = [column for column, _ in order]
+    # Every column is sorted by "is not missing" first, in the direction of the column
+    sort_keys = {}
+    ascending = []
+    for number, (column, is_ascending) in enumerate(order):
+        sort_keys[f"{number}_not_missing"] = places_df[column].notna()
+        sort_keys[f"{number}_value"] = places_df[column]
+        ascending += [is_ascending, is_ascending]
+    sorted_index = (
+        pd.DataFrame(sort_keys)
+        .sort_values(list(sort_keys), ascending=ascending, kind="stable")
+        .index
+    )
+    ordered_df = places_df.loc[sorted_index, columns]
+    previous_df = ordered_df.shift()
+    is_same_value = ordered_df.eq(previous_df) | (
+        ordered_df.isna() & previous_df.isna()
+    )
+    is_new_value = ~is_same_value.all(axis=1)
+    is_new_value.iloc[:1] = True
+    ranks = is_new_value.cumsum()
+
+    return ranks.reindex(places_df.index).astype("Int32")
+
+
+def add_rank_columns(places_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds grade ranks (GRADE_RANK_COLUMNS) and safety ranks (SAFETY_RANK_ORDER) for the columns present in the
+    dataframe.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        places_df: pd.DataFrame
+    """
+    for grade_column, rank_column in GRADE_RANK_COLUMNS.items():
+        if grade_column in places_df:
+            places_df[rank_column] = grade_rank(places_df[grade_column])
+
+    for rank_column, order in SAFETY_RANK_ORDER.items():
+        if all(column in places_df for column, _ in order):
+            places_df[rank_column] = lexicographic_rank(places_df, order)
+
+    return places_df
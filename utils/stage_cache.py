@@ -0,0 +1,154 @@
+"""
+Content-hash memoization of pipeline stages. Output of the stage is cached on disk, keyed by a hash of the stage
+inputs and the code version of the stage function, so unchanged stages are loaded from the cache instead of being
+run again. Stages should not write to the database, the writes would be skipped when the stage is loaded from the
+cache.
+"""
+import glob
+import hashlib
+import inspect
+import os
+import sys
+import types
+
+import pandas as pd
+
+import config
+from config import STAGE_CACHE_DIRECTORY
+from utils.storage import prepare_for_parquet
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.abspath(config.__file__))
+
+
+def hash_input(value) -> bytes:
+    """
+    Digest of the stage input. DataFrames are hashed by columns, dtypes and row values.
+    Args:
+        value: any
+    Returns:
+        digest: bytes
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        dtypes = value.dtypes if isinstance(value, pd.DataFrame) else value.dtype
+        digest = hashlib.sha256(repr(dtypes).encode())
+        digest.update(
+            pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        )
+        return digest.digest()
+    return hashlib.sha256(repr(value).encode()).digest()
+
+
+def is_project_file(file_path: str | None) -> bool:
+    """
+    True for source files of this project, False for the standard library and installed packages.
+    """
+    if not file_path:
+        return False
+    file_path = os.path.abspath(file_path)
+    return file_path.startswith(PROJECT_DIRECTORY + os.sep) and not any(
+        part in file_path
+        for part in ("site-packages", f"{os.sep}.venv", f"{os.sep}venv")
+    )
+
+
+def project_source_files(func) -> list:
+    """
+    Source files of the function module, config.py and, transitively, of every project module they import or
+    take functions and classes from.
+    Args:
+        func: function
+    Returns:
+        source_files: list -> sorted paths
+    """
+    pending = [inspect.getmodule(func), config]
+    visited = set()
+    source_files = set()
+    while pending:
+        module = pending.pop()
+        if module is None or module.__name__ in visited:
+            continue
+        visited.add(module.__name__)
+        source_file = getattr(module, "__file__", None)
+        if not is_project_file(source_file):
+            continue
+        source_files.add(os.path.abspath(source_file))
+        for value in list(vars(module).values()):
+            if isinstance(value, types.ModuleType):
+                pending.append(value)
+            elif isinstance(value, (types.FunctionType, type)):
+                pending.append(sys.modules.get(value.__module__))
+
+    return sorted(source_files)
+
+
+def code_version(func) -> str:
+    """
+    Hash of the project source files the function depends on (project_source_files), so changing any cleaning rule,
+    helper or setting in config.py changes the version.
+    Args:
+        func: function
+    Returns:
+        version: str
+    """
+    digest = hashlib.sha256(func.__qualname__.encode())
+    for source_file in project_source_files(func):
+        with open(source_file, "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def stage_key(stage_name: str, func, inputs: tuple, fingerprint=None) -> str:
+    """
+    Cache key of the stage.
+    Args:
+        stage_name: str
+        func: function
+        inputs: tuple
+        fingerprint: any -> additional input not passed to the function, e.g. checksum of the database tables
+    Returns:
+        key: str
+    """
+    digest = hashlib.sha256(stage_name.encode())
+    digest.update(code_version(func).encode())
+    for value in (*inputs, fingerprint):
+        digest.update(hash_input(value))
+
+    return digest.hexdigest()[:32]
+
+
+def run_stage(
+    stage_name: str, func, *inputs, fingerprint=None, use_cache: bool = True
+) -> pd.DataFrame:
+    """
+    Runs func(*inputs) or loads its output from the cache if the inputs and the code did not change since the
+    last run. Only the latest output of every stage is kept.
+    Args:
+        stage_name: str
+        func: function returning pd.DataFrame
+        inputs: any
+        fingerprint: any
+        use_cache: bool
+    Returns:
+        places_df: pd.DataFrame
+    """
+    if not use_cache:
+        return func(*inputs)
+
+    key = stage_key(stage_name, func, inputs, fingerprint)
+    cache_path = os.path.join(STAGE_CACHE_DIRECTORY, f"{stage_name}-{key}.parquet")
+    if os.path.exists(cache_path):
+        print(f"Stage {stage_name} loaded from cache.")
+        return pd.read_parquet(cache_path)
+
+    places_df = func(*inputs)
+
+    os.makedirs(STAGE_CACHE_DIRECTORY, exist_ok=True)
+    for old_cache_path in glob.glob(
+        os.path.join(STAGE_CACHE_DIRECTORY, f"{stage_name}-*.parquet")
+    ):
+        os.remove(old_cache_path)
+    prepare_for_parquet(places_df).to_parquet(cache_path)
+    print(f"Stage {stage_name} cached.")
+
+    return places_df
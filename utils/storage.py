@@ -0,0 +1,159 @@
+"""
+Intermediate storage for the data passed between pipeline stages. Stages are saved in INTERMEDIATE_DATA_FORMAT,
+Parquet by default, so dtypes are kept and reading supports column projection and predicate pushdown. CSV is kept as
+an export option and as a fallback when only the CSV version of the stage exists.
+"""
+import os
+import operator
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from config import INTERMEDIATE_DATA_FORMAT
+
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, values: column.isin(values),
+    "not in": lambda column, values: ~column.isin(values),
+}
+
+
+def stage_file_path(
+    stage_name: str, data_format: str = INTERMEDIATE_DATA_FORMAT
+) -> str:
+    """
+    Returns file name of the stage, e.g. niche_all_scraped_data_raw.parquet
+    Args:
+        stage_name: str
+        data_format: str -> "parquet" or "csv"
+    Returns:
+        file_path: str
+    """
+    return f"{stage_name}.{data_format}"
+
+
+def existing_stage_file(stage_name: str) -> tuple:
+    """
+    Stage file to read: the one in INTERMEDIATE_DATA_FORMAT, or the other format if only that one exists.
+    Args:
+        stage_name: str
+    Returns:
+        file_path: str
+        data_format: str -> "parquet" or "csv"
+    """
+    other_format = "csv" if INTERMEDIATE_DATA_FORMAT == "parquet" else "parquet"
+    for data_format in [INTERMEDIATE_DATA_FORMAT, other_format]:
+        file_path = stage_file_path(stage_name, data_format)
+        if os.path.exists(file_path):
+            return file_path, data_format
+
+    return stage_file_path(stage_name), INTERMEDIATE_DATA_FORMAT
+
+
+def prepare_for_parquet(places_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Scraped columns can mix numbers with text like "no data", which Parquet can't store in one column.
+    Such columns are saved as strings.
+    Args:
+        places_df: pd.DataFrame
+    Returns:
+        places_df: pd.DataFrame
+    """
+    mixed_columns = [
+        column
+        for column in places_df.columns[places_df.dtypes == "object"]
+        if pd.api.types.infer_dtype(places_df[column], skipna=True)
+        not in ("string", "empty")
+    ]
+    if mixed_columns:
+        places_df = places_df.astype({column: "string" for column in mixed_columns})
+
+    return places_df
+
+
+def save_stage_data(places_df: pd.DataFrame, stage_name: str, export_csv: bool = False):
+    """
+    Saves the dataframe as the stage file in INTERMEDIATE_DATA_FORMAT. Optionally exports CSV copy as well.
+    Args:
+        places_df: pd.DataFrame
+        stage_name: str
+        export_csv: bool
+    """
+    if INTERMEDIATE_DATA_FORMAT == "parquet":
+        prepare_for_parquet(places_df).to_parquet(
+            stage_file_path(stage_name, "parquet"), index=False
+        )
+    if export_csv or INTERMEDIATE_DATA_FORMAT == "csv":
+        places_df.to_csv(stage_file_path(stage_name, "csv"), index=False)
+
+
+def apply_filters(places_df: pd.DataFrame, filters: list) -> pd.DataFrame:
+    """
+    Applies filters in the pyarrow format, [(column, operator, value), ...], to the dataframe read from the CSV.
+    Args:
+        places_df: pd.DataFrame
+        filters: list
+    Returns:
+        places_df: pd.DataFrame
+    """
+    for column, filter_operator, value in filters:
+        places_df = places_df[
+            FILTER_OPERATORS[filter_operator](places_df[column], value)
+        ]
+
+    return places_df
+
+
+def load_stage_data(
+    stage_name: str, columns: list | None = None, filters: list | None = None
+) -> pd.DataFrame:
+    """
+    Loads the stage file. Only the requested columns are read and filters are pushed down to the Parquet reader, so
+    row groups that can't match are skipped.
+    Args:
+        stage_name: str
+        columns: list | None
+        filters: list | None -> pyarrow format, e.g. [("state", "==", "Iowa"), ("population", ">", 1000)]
+    Returns:
+        places_df: pd.DataFrame
+    """
+    file_path, data_format = existing_stage_file(stage_name)
+    if data_format == "parquet":
+        return pd.read_parquet(file_path, columns=columns, filters=filters)
+
+    filter_columns = [column for column, _, _ in filters or []]
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys([*columns, *filter_columns]))
+    places_df = pd.read_csv(file_path, usecols=read_columns)
+    if filters:
+        places_df = apply_filters(places_df, filters).reset_index(drop=True)
+    if columns is not None:
+        places_df = places_df[columns]
+
+    return places_df
+
+
+def iter_stage_data(stage_name: str, chunksize: int, columns: list | None = None):
+    """
+    Yields the stage file in chunks of chunksize rows, only the requested columns are read.
+    Args:
+        stage_name: str
+        chunksize: int
+        columns: list | None
+    Yields:
+        places_df: pd.DataFrame
+    """
+    file_path, data_format = existing_stage_file(stage_name)
+    if data_format == "parquet":
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunksize)
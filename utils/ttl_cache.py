@@ -0,0 +1,94 @@
+"""
+Thread-safe in-process cache with bounded size (least recently used entries are evicted) and time to live.
+Entries are stored together with the dataset generation, the whole cache is cleared when the generation changes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic):
+        """
+        Args:
+            maxsize: int -> maximum number of entries
+            ttl: float -> seconds after which an entry expires
+            clock: callable -> returns current time in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.generation = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def check_generation(self, generation):
+        """
+        Clears the cache if the dataset generation changed since the entries were stored.
+        """
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.generation = generation
+
+    def get(self, key, default=MISSING):
+        """
+        Returns the value stored under the key, default if it is missing or expired.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation=MISSING) -> bool:
+        """
+        Stores the value, evicting the least recently used entry if the cache is full. If the generation the value
+        was read for is passed and the cache moved to another generation in the meantime, the value is stale and
+        it is not stored.
+        Returns:
+            stored: bool
+        """
+        with self.lock:
+            if generation is not MISSING and generation != self.generation:
+                return False
+            self.entries[key] = (self.clock() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            metrics: dict -> hits, misses, hit_ratio, evictions, expirations, size and generation
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self.entries),
+                "generation": self.generation,
+            }